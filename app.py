@@ -28,16 +28,14 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 import numpy as np
-import matplotlib.pyplot as plt
-import sympy as sp
-import pandas as pd
-import plotly.graph_objects as go
-import plotly.express as px
-from PIL import Image
-import io
-from utils.interpolacion_newton import diferencias_divididas, interpolacion_newton, evaluar_polinomio
-from utils.image_processor import procesar_imagen, extraer_puntos_interpolacion, mostrar_imagen_procesada
-from utils.interpolacion_mejorada import crear_interfaz_interpolacion
+from utils import instrumentacion
+from utils.carga_diferida import modulo_diferido
+from utils.trabajos import enviar_trabajo, recoger_trabajo, olvidar_trabajo, COMPLETADO, CANCELADO
+
+# Cada página importa lo suyo la primera vez que se usa (matplotlib, sympy, plotly...)
+plt = modulo_diferido('matplotlib.pyplot')
+lu = modulo_diferido('utils.lu_descomposicion')
+interpolacion = modulo_diferido('utils.interpolacion_mejorada')
 
 st.set_page_config(page_title="Métodos Numéricos - Junnior", layout="wide")
 
@@ -59,6 +57,39 @@ opcion = st.sidebar.selectbox(
 
 st.sidebar.info("Creado por **Junnior Chinchay**, Alice Saboya y Jannpier García 👨‍💻")
 
+# Panel de rendimiento: la instrumentación es de cada sesión (no mezcla lo
+# que miden otros usuarios) y el panel se llena antes que la página, porque
+# seguir_trabajo vuelve a ejecutar el script mientras un trabajo está en curso
+if 'instrumentacion' not in st.session_state:
+    st.session_state.instrumentacion = instrumentacion.Sesion()
+instrumentacion.usar_sesion(st.session_state.instrumentacion)
+
+medir_rendimiento = st.sidebar.checkbox("⏱️ Medir rendimiento", value=instrumentacion.activa())
+medir_memoria = medir_rendimiento and st.sidebar.checkbox(
+    "Incluir memoria (tracemalloc, más lento)", value=instrumentacion.configuracion()[1])
+instrumentacion.activar(medir_rendimiento, medir_memoria)
+
+if medir_rendimiento:
+    with st.sidebar.expander("⏱️ Rendimiento", expanded=True):
+        resumen = instrumentacion.resumen()
+        if resumen:
+            st.dataframe(
+                [{'etapa': f['etapa'], 'veces': f['veces'], 'total ms': round(f['total_ms'], 1),
+                  'p95 ms': round(f['p95_ms'], 1),
+                  'CPU ms': round(f['cpu_ms'], 1) if f['cpu_ms'] is not None else None,
+                  'pico KB': round(f['pico_kb']) if f['pico_kb'] is not None else None}
+                 for f in resumen],
+                use_container_width=True, hide_index=True
+            )
+            st.caption("Incluye hasta la ejecución anterior; los trabajos en segundo plano aparecen al terminar")
+        else:
+            st.caption("Todavía no hay mediciones: usa algún método y vuelve a mirar aquí")
+        st.download_button("📥 Exportar mediciones (.json)", instrumentacion.exportar_json(),
+                           file_name="rendimiento.json", mime="application/json")
+        if st.button("🗑️ Limpiar mediciones"):
+            instrumentacion.limpiar()
+            st.rerun()
+
 # --- MÉTODOS DIRECTOS ---
 if opcion == "Métodos Directos":
     st.header("📘 Introducción a los Métodos Directos")
@@ -88,60 +119,57 @@ elif opcion == "Descomposición LU":
     if st.button("Calcular Descomposición LU"):
         try:
             # --- Conversión de texto a numpy ---
-            A = np.array([[float(num) for num in row.split(',')] for row in A_text.split(';')])
-            b = np.array([float(x) for x in b_text.split(',')])
-
-            n = len(A)
-            L = np.zeros((n, n))
-            U = np.zeros((n, n))
-
-            # --- Cálculo manual LU ---
-            for i in range(n):
-                # Calcular U
-                for k in range(i, n):
-                    suma = sum(L[i][j] * U[j][k] for j in range(i))
-                    U[i][k] = A[i][k] - suma
-                # Calcular L
-                for k in range(i, n):
-                    if i == k:
-                        L[i][i] = 1
-                    else:
-                        suma = sum(L[k][j] * U[j][i] for j in range(i))
-                        L[k][i] = (A[k][i] - suma) / U[i][i]
-
-            # --- Sustitución hacia adelante (Ly = b) ---
-            y = np.zeros(n)
-            for i in range(n):
-                y[i] = b[i] - np.dot(L[i, :i], y[:i])
+            with instrumentacion.medir('app.parsear'):
+                A = np.array([[float(num) for num in row.split(',')] for row in A_text.split(';')])
+                b = np.array([float(x) for x in b_text.split(',')])
+
+            # --- Cálculo en segundo plano para no bloquear la interfaz ---
+            if st.session_state.get("trabajo_lu") is not None:
+                olvidar_trabajo(st.session_state.trabajo_lu['id'])
+            st.session_state.trabajo_lu = {
+                'id': enviar_trabajo(lu.descomposicion_lu, (A, b), descripcion="Descomposición LU"),
+                'entrada': (A_text, b_text),
+                'A': A
+            }
+        except Exception as e:
+            st.error(f"⚠️ Error en el ingreso o cálculo: {e}")
 
-            # --- Sustitución hacia atrás (Ux = y) ---
-            x = np.zeros(n)
-            for i in range(n-1, -1, -1):
-                x[i] = (y[i] - np.dot(U[i, i+1:], x[i+1:])) / U[i][i]
-
-            # --- Mostrar resultados ---
-            st.subheader("📊 Resultados del Cálculo")
-            st.write("**Matriz A:**")
-            st.write(A)
-            st.write("**Matriz L (Triangular Inferior):**")
-            st.write(L)
-            st.write("**Matriz U (Triangular Superior):**")
-            st.write(U)
-            st.write("**Vector Solución (x):**")
-            st.success(x)
-
-            # --- Visualización de las matrices ---
-            fig, ax = plt.subplots(1, 3, figsize=(14, 4))
-            ax[0].imshow(A, cmap='Purples', interpolation='nearest')
-            ax[0].set_title("Matriz A")
-            ax[1].imshow(L, cmap='Blues', interpolation='nearest')
-            ax[1].set_title("Matriz L (Inferior)")
-            ax[2].imshow(U, cmap='Oranges', interpolation='nearest')
-            ax[2].set_title("Matriz U (Superior)")
-            for a in ax:
-                a.set_xticks(range(n))
-                a.set_yticks(range(n))
-            st.pyplot(fig)
+    trabajo_lu = st.session_state.get("trabajo_lu")
+    if trabajo_lu is not None and trabajo_lu['entrada'] == (A_text, b_text):
+        try:
+            estado = recoger_trabajo(trabajo_lu, "🔄 Calculando descomposición LU...")
+            if estado['estado'] == CANCELADO:
+                st.warning("⚠️ Cálculo cancelado")
+                del st.session_state.trabajo_lu
+            elif estado['estado'] == COMPLETADO:
+                L, U, x = trabajo_lu['resultado']
+                A = trabajo_lu['A']
+                n = len(A)
+
+                # --- Mostrar resultados ---
+                st.subheader("📊 Resultados del Cálculo")
+                st.write("**Matriz A:**")
+                st.write(A)
+                st.write("**Matriz L (Triangular Inferior):**")
+                st.write(L)
+                st.write("**Matriz U (Triangular Superior):**")
+                st.write(U)
+                st.write("**Vector Solución (x):**")
+                st.success(x)
+
+                # --- Visualización de las matrices ---
+                fig, ax = plt.subplots(1, 3, figsize=(14, 4))
+                ax[0].imshow(A, cmap='Purples', interpolation='nearest')
+                ax[0].set_title("Matriz A")
+                ax[1].imshow(L, cmap='Blues', interpolation='nearest')
+                ax[1].set_title("Matriz L (Inferior)")
+                ax[2].imshow(U, cmap='Oranges', interpolation='nearest')
+                ax[2].set_title("Matriz U (Superior)")
+                for a in ax:
+                    a.set_xticks(range(n))
+                    a.set_yticks(range(n))
+                with instrumentacion.medir('st.pyplot'):
+                    st.pyplot(fig)
 
         except Exception as e:
             st.error(f"⚠️ Error en el ingreso o cálculo: {e}")
@@ -161,8 +189,9 @@ elif opcion == "Cholesky":
     if st.button("Calcular Descomposición de Cholesky"):
         try:
             # Convertir texto a matriz y vector
-            A = np.array([[float(num) for num in fila.split(',')] for fila in A_input.split(';')])
-            b = np.array([float(num) for num in b_input.split(',')])
+            with instrumentacion.medir('app.parsear'):
+                A = np.array([[float(num) for num in fila.split(',')] for fila in A_input.split(';')])
+                b = np.array([float(num) for num in b_input.split(',')])
 
             # Verificar dimensiones
             if A.shape[0] != A.shape[1]:
@@ -173,13 +202,15 @@ elif opcion == "Cholesky":
                 st.error("⚠️ La matriz A no es simétrica. Cholesky requiere A simétrica y definida positiva.")
             else:
                 # Descomposición de Cholesky
-                L = np.linalg.cholesky(A)
+                with instrumentacion.medir('cholesky.factorizar'):
+                    L = np.linalg.cholesky(A)
                 st.subheader("✅ Matriz L (Triangular inferior):")
                 st.write(L)
 
                 # Resolver el sistema A·x = b
-                y = np.linalg.solve(L, b)
-                x = np.linalg.solve(L.T, y)
+                with instrumentacion.medir('cholesky.resolver'):
+                    y = np.linalg.solve(L, b)
+                    x = np.linalg.solve(L.T, y)
 
                 st.subheader("📊 Solución del sistema (valores de x):")
                 for i, valor in enumerate(x, start=1):
@@ -210,8 +241,9 @@ elif opcion == "Eliminación Gaussiana":
 
     try:
         # Convertir texto a matrices NumPy
-        A = np.array([[float(num) for num in row.split(',')] for row in A_text.split(';')])
-        b = np.array([float(x) for x in b_text.split(',')])
+        with instrumentacion.medir('app.parsear'):
+            A = np.array([[float(num) for num in row.split(',')] for row in A_text.split(';')])
+            b = np.array([float(x) for x in b_text.split(',')])
         n = len(b)
 
         # Crear copia para no modificar original
@@ -221,12 +253,13 @@ elif opcion == "Eliminación Gaussiana":
         pasos = []
 
         # Generar lista de matrices paso a paso
-        for i in range(n-1):
-            for j in range(i+1, n):
-                factor = A_proc[j][i] / A_proc[i][i]
-                A_proc[j] = A_proc[j] - factor * A_proc[i]
-                b_proc[j] = b_proc[j] - factor * b_proc[i]
-                pasos.append((i, j, A_proc.copy(), b_proc.copy()))
+        with instrumentacion.medir('gauss.eliminar'):
+            for i in range(n-1):
+                for j in range(i+1, n):
+                    factor = A_proc[j][i] / A_proc[i][i]
+                    A_proc[j] = A_proc[j] - factor * A_proc[i]
+                    b_proc[j] = b_proc[j] - factor * b_proc[i]
+                    pasos.append((i, j, A_proc.copy(), b_proc.copy()))
 
         paso_actual = min(st.session_state.paso, len(pasos))
         st.write(f"**Paso {paso_actual} de {len(pasos)}:**")
@@ -247,7 +280,8 @@ elif opcion == "Eliminación Gaussiana":
         im = ax.imshow(Ab, cmap='coolwarm', interpolation='nearest')
         ax.set_title(f"Transformación paso {paso_actual}")
         plt.colorbar(im)
-        st.pyplot(fig)
+        with instrumentacion.medir('st.pyplot'):
+            st.pyplot(fig)
 
         # Si ya terminó la eliminación → resolver por sustitución regresiva
         if paso_actual == len(pasos):
@@ -264,7 +298,7 @@ elif opcion == "Eliminación Gaussiana":
 
 # --- INTERPOLACIÓN DE NEWTON ---
 elif opcion == "Interpolación de Newton":
-    crear_interfaz_interpolacion()
+    interpolacion.crear_interfaz_interpolacion()
 
 
 # --- GAUSS–JORDAN ---
@@ -291,8 +325,9 @@ elif opcion == "Gauss – Jordan":
 
     try:
         # Convertir texto a matrices
-        A = np.array([[float(num) for num in row.split(',')] for row in A_text.split(';')])
-        b = np.array([float(x) for x in b_text.split(',')])
+        with instrumentacion.medir('app.parsear'):
+            A = np.array([[float(num) for num in row.split(',')] for row in A_text.split(';')])
+            b = np.array([float(x) for x in b_text.split(',')])
         n = len(b)
 
         # Matriz aumentada
@@ -300,17 +335,18 @@ elif opcion == "Gauss – Jordan":
         pasos = []
 
         # Guardar pasos del proceso Gauss–Jordan
-        for i in range(n):
-            # Normalizar fila pivote
-            Ab[i] = Ab[i] / Ab[i, i]
-            pasos.append((i, f"Normalizamos fila {i+1}", Ab.copy()))
-
-            # Eliminar en las demás filas
-            for j in range(n):
-                if i != j:
-                    factor = Ab[j, i]
-                    Ab[j] = Ab[j] - factor * Ab[i]
-                    pasos.append((j, f"Eliminamos elemento ({j+1},{i+1})", Ab.copy()))
+        with instrumentacion.medir('gauss_jordan.reducir'):
+            for i in range(n):
+                # Normalizar fila pivote
+                Ab[i] = Ab[i] / Ab[i, i]
+                pasos.append((i, f"Normalizamos fila {i+1}", Ab.copy()))
+
+                # Eliminar en las demás filas
+                for j in range(n):
+                    if i != j:
+                        factor = Ab[j, i]
+                        Ab[j] = Ab[j] - factor * Ab[i]
+                        pasos.append((j, f"Eliminamos elemento ({j+1},{i+1})", Ab.copy()))
 
         # Mostrar paso actual
         paso_actual = min(st.session_state.paso_gj, len(pasos))
@@ -331,7 +367,8 @@ elif opcion == "Gauss – Jordan":
         im = ax.imshow(matriz, cmap='plasma', interpolation='nearest')
         ax.set_title(f"Transformación paso {paso_actual}")
         plt.colorbar(im)
-        st.pyplot(fig)
+        with instrumentacion.medir('st.pyplot'):
+            st.pyplot(fig)
 
         # Resultado final
         if paso_actual == len(pasos):
@@ -344,4 +381,3 @@ elif opcion == "Gauss – Jordan":
 
     except Exception as e:
         st.error(f"⚠️ Error: {e}")
-
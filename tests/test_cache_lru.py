@@ -0,0 +1,26 @@
+"""
+CacheLRU acotada por entradas y por bytes
+"""
+import numpy as np
+
+from utils.cache_lru import CacheLRU
+
+def test_descarta_por_bytes():
+    cache = CacheLRU(max_entradas=10, max_bytes=1000)
+    for i in range(4):
+        cache.guardar(i, np.zeros(300, dtype=np.uint8))
+    assert len(cache) == 3 and 0 not in cache
+    assert cache.bytes == 900
+
+    cache.obtener(1)
+    cache.guardar(9, b'x' * 300)
+    assert 1 in cache and 2 not in cache
+    assert cache.bytes == 900
+
+def test_reemplazo_y_valor_demasiado_grande():
+    cache = CacheLRU(max_entradas=10, max_bytes=1000)
+    cache.guardar('a', np.zeros(600, dtype=np.uint8))
+    cache.guardar('a', np.zeros(100, dtype=np.uint8))
+    assert cache.bytes == 100
+    cache.guardar('b', np.zeros(2000, dtype=np.uint8))
+    assert 'b' not in cache and cache.bytes == 100
@@ -0,0 +1,67 @@
+"""
+Caché de OCR: persistencia en SQLite entre procesos y huella perceptual
+"""
+import multiprocessing
+
+import cv2
+import numpy as np
+import pytest
+
+from utils import cache_ocr
+
+RESULTADO = {'x': [1.0, 2.0], 'y': [3.0, 4.0], 'motor': 'easyocr', 'variante': 'CLAHE',
+             'confianza': 0.9, 'numeros': 4}
+
+@pytest.fixture
+def disco(monkeypatch, tmp_path):
+    archivo = str(tmp_path / 'ocr.sqlite')
+    monkeypatch.setattr(cache_ocr, 'ARCHIVO_CACHE', archivo)
+    cache_ocr.limpiar_cache()
+    yield archivo
+    cache_ocr.limpiar_cache()
+
+def _guardar_en_otro_proceso(archivo, clave):
+    cache_ocr.ARCHIVO_CACHE = archivo
+    cache_ocr.guardar(clave, dict(RESULTADO, tiempos={'total': 1.0}))
+
+def test_resultado_sobrevive_en_disco(disco):
+    # Escrito por otro proceso: en este solo puede salir del archivo
+    proceso = multiprocessing.get_context('spawn').Process(target=_guardar_en_otro_proceso,
+                                                           args=(disco, 'clave'))
+    proceso.start()
+    proceso.join(60)
+    assert proceso.exitcode == 0
+
+    assert cache_ocr.buscar('clave') == RESULTADO
+    assert cache_ocr.buscar('clave') == RESULTADO
+    assert cache_ocr.buscar('otra') is None
+    assert cache_ocr.estadisticas_cache() == {'memoria': 1, 'disco': 1, 'fallos': 1, 'entradas': 1}
+
+    cache_ocr.limpiar_cache(disco=True)
+    assert cache_ocr.buscar('clave') is None
+
+def test_clave_depende_de_imagen_y_configuracion():
+    config = {'motores': ['easyocr'], 'alto_minimo': 30}
+    clave = cache_ocr.clave_ocr(b'foto', config)
+    assert cache_ocr.clave_ocr(b'foto', dict(reversed(list(config.items())))) == clave
+    assert cache_ocr.clave_ocr(b'foto', dict(config, alto_minimo=40)) != clave
+    assert cache_ocr.clave_ocr(b'otra', config) != clave
+
+def _hoja(semilla):
+    """Bloques de alto contraste, como celdas de una tabla"""
+    bloques = np.random.default_rng(semilla).choice([30, 220], (16, 17)).astype(np.uint8)
+    return cv2.resize(bloques, (17 * 24, 16 * 24), interpolation=cv2.INTER_NEAREST)
+
+def test_huella_perceptual_resiste_recompresion_y_escala(monkeypatch):
+    hoja = _hoja(1)
+    png = cv2.imencode('.png', hoja)[1].tobytes()
+    jpg = cv2.imencode('.jpg', cv2.resize(hoja, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA),
+                       [cv2.IMWRITE_JPEG_QUALITY, 70])[1].tobytes()
+    assert cache_ocr.huella_perceptual(png) == cache_ocr.huella_perceptual(jpg)
+    assert cache_ocr.huella_perceptual(png) == cache_ocr.huella_perceptual(hoja)
+    assert cache_ocr.huella_perceptual(png) != cache_ocr.huella_perceptual(_hoja(2))
+
+    # Por defecto la clave usa los bytes exactos; con MN_CACHE_OCR_PERCEPTUAL, la dHash
+    assert cache_ocr.huella_imagen(png) != cache_ocr.huella_imagen(jpg)
+    monkeypatch.setattr(cache_ocr, 'HUELLA_PERCEPTUAL', True)
+    assert cache_ocr.huella_imagen(png) == cache_ocr.huella_imagen(jpg)
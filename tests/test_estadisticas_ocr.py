@@ -0,0 +1,66 @@
+"""
+Las estadísticas de variantes se guardan en el archivo por tandas y
+sumando lo de cada proceso
+"""
+import json
+import multiprocessing
+
+import pytest
+
+from utils import ocr_pipeline
+
+@pytest.fixture
+def archivo(monkeypatch, tmp_path):
+    archivo = tmp_path / 'estadisticas.json'
+    monkeypatch.setattr(ocr_pipeline, 'ARCHIVO_ESTADISTICAS', str(archivo))
+    monkeypatch.setattr(ocr_pipeline, '_estadisticas', None)
+    monkeypatch.setattr(ocr_pipeline, '_pendientes', {})
+    monkeypatch.setattr(ocr_pipeline, '_sin_guardar', 0)
+    return archivo
+
+def _leer(archivo):
+    return json.loads(archivo.read_text(encoding='utf-8'))
+
+def test_guardado_por_tandas(monkeypatch, archivo):
+    monkeypatch.setattr(ocr_pipeline, 'GUARDAR_CADA', 3)
+
+    for _ in range(2):
+        ocr_pipeline.registrar_lecturas('directo', 'falso', [('gris', True)])
+    assert not archivo.exists()
+
+    ocr_pipeline.registrar_lecturas('directo', 'falso', [('gris', False)])
+    assert _leer(archivo)['directo|falso|gris'] == {'intentos': 3, 'victorias': 2}
+
+    ocr_pipeline.registrar_lecturas('directo', 'falso', [('gris', True)])
+    ocr_pipeline.guardar_estadisticas()
+    assert _leer(archivo)['directo|falso|gris'] == {'intentos': 4, 'victorias': 3}
+    assert ocr_pipeline.tasa_exito('directo', 'falso', 'gris') == 4 / 6
+
+def test_guardar_suma_lo_que_escribio_otro_proceso(archivo):
+    archivo.write_text(json.dumps({'directo|falso|gris': {'intentos': 5, 'victorias': 1}}))
+    ocr_pipeline.registrar_lecturas('directo', 'falso', [('gris', True), ('clahe', False)])
+    ocr_pipeline.guardar_estadisticas()
+    guardadas = _leer(archivo)
+    assert guardadas['directo|falso|gris'] == {'intentos': 6, 'victorias': 2}
+    assert guardadas['directo|falso|clahe'] == {'intentos': 1, 'victorias': 0}
+
+def _registrar_en_proceso(ruta, veces):
+    ocr_pipeline.ARCHIVO_ESTADISTICAS = ruta
+    ocr_pipeline.GUARDAR_CADA = 1
+    for _ in range(veces):
+        ocr_pipeline.registrar_lecturas('directo', 'falso', [('gris', True), ('clahe', False)])
+
+def test_varios_procesos_no_pierden_conteos(archivo):
+    contexto = multiprocessing.get_context('spawn')
+    procesos = [contexto.Process(target=_registrar_en_proceso, args=(str(archivo), 25))
+                for _ in range(3)]
+    for proceso in procesos:
+        proceso.start()
+    for proceso in procesos:
+        proceso.join(120)
+        assert proceso.exitcode == 0
+
+    guardadas = _leer(archivo)
+    assert guardadas['directo|falso|gris'] == {'intentos': 75, 'victorias': 75}
+    assert guardadas['directo|falso|clahe'] == {'intentos': 75, 'victorias': 0}
+    assert not list(archivo.parent.glob('*.tmp'))
@@ -0,0 +1,17 @@
+"""
+Escritura de polinomios en el desarrollo: coeficientes unitarios y signos
+"""
+import pytest
+
+from utils.generador_desarrollo import formatear_polinomio
+
+@pytest.mark.parametrize("coeficientes, txt, latex", [
+    ([0, -1, 1], "x**2 - x", "x^{2} - x"),
+    ([1, -1], "-x + 1", "-x + 1"),
+    ([-1, 0, -1], "-x**2 - 1", "-x^{2} - 1"),
+    ([0.5, 2, -3], "-3*x**2 + 2*x + 0.5", "-3 x^{2} + 2 x + 0.5"),
+    ([0, 0], "0", "0"),
+])
+def test_coeficientes_unitarios_y_signos(coeficientes, txt, latex):
+    assert formatear_polinomio(coeficientes) == txt
+    assert formatear_polinomio(coeficientes, 'latex') == latex
@@ -0,0 +1,19 @@
+"""
+Resultado del trabajo de interpolación: todo lo que la interfaz muestra
+ya viene calculado
+"""
+import numpy as np
+import sympy as sp
+
+from utils.interpolacion_newton import evaluar_newton, interpolacion_completa
+
+def test_resultado_completo():
+    x, y = [0.0, 1.0, 2.0, 3.0], [1.0, 2.0, 5.0, 10.0]
+    resultado = interpolacion_completa(x, y)
+
+    assert sp.simplify(resultado['simplificado'] - (sp.Symbol('x') ** 2 + 1)) == 0
+    assert resultado['latex_expandido'] == sp.latex(resultado['expandido'])
+    assert all('latex' in detalle for detalle in resultado['detalles'])
+    np.testing.assert_allclose(evaluar_newton(x, resultado['coeficientes'], np.array(x)), y)
+    assert set(resultado['desarrollo']) == {'txt', 'md', 'latex'}
+    assert resultado['desarrollo']['md'].startswith('# ')
@@ -0,0 +1,78 @@
+"""
+OCR por lotes: lectura de las imágenes de una carpeta o un ZIP y
+resultados repetidos desde la caché del pipeline
+"""
+import io
+import zipfile
+
+import cv2
+import numpy as np
+import pytest
+
+from utils import cache_ocr, lote_ocr, ocr_pipeline
+
+def _png(semilla):
+    imagen = np.random.default_rng(semilla).integers(0, 256, (60, 80), dtype=np.uint8)
+    return cv2.imencode('.png', imagen)[1].tobytes()
+
+ARCHIVOS = {'a.png': _png(1), 'sub/b.jpg': _png(2), 'notas.txt': b'texto', '.oculta.png': _png(3)}
+
+@pytest.fixture
+def carpeta(tmp_path):
+    for nombre, datos in ARCHIVOS.items():
+        ruta = tmp_path / nombre
+        ruta.parent.mkdir(exist_ok=True)
+        ruta.write_bytes(datos)
+    return str(tmp_path)
+
+@pytest.fixture
+def zip_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as z:
+        for nombre, datos in ARCHIVOS.items():
+            z.writestr(nombre, datos)
+        z.writestr('__MACOSX/._a.png', b'basura')
+    return buffer.getvalue()
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """OCR falso: cada imagen se lee como la tabla x = 1 2, y = 3 4"""
+    hechas = []
+
+    def leer_falso(variantes, config, nombre_config, motor, tiempos, *args, **kwargs):
+        hechas.append(motor)
+        numeros = [{'val': v, 'x': x, 'y': y, 'conf': 0.9}
+                   for v, x, y in ((1, 0, 0), (2, 50, 0), (3, 0, 100), (4, 50, 100))]
+        return numeros, 'falsa'
+
+    monkeypatch.setattr(ocr_pipeline, 'variantes_a_medida', lambda *args, **kwargs: iter(()))
+    monkeypatch.setattr(ocr_pipeline, '_leer_con_estadisticas', leer_falso)
+    monkeypatch.setattr(cache_ocr, 'ARCHIVO_CACHE', None)
+    cache_ocr.limpiar_cache()
+    yield hechas
+    cache_ocr.limpiar_cache()
+
+def test_carpeta_y_zip_listan_las_mismas_imagenes(carpeta, zip_bytes):
+    en_carpeta = lote_ocr.listar_imagenes(carpeta)
+    en_zip = lote_ocr.listar_imagenes(zip_bytes)
+    assert [n for n, _ in en_carpeta] == [n for n, _ in en_zip] == ['a.png', 'sub/b.jpg']
+    assert [leer() for _, leer in en_carpeta] == [leer() for _, leer in en_zip] == [_png(1), _png(2)]
+
+def test_lote_repetido_sale_de_la_cache_del_pipeline(carpeta, zip_bytes, lecturas):
+    primero = lote_ocr.procesar_lote(zip_bytes)
+    assert [f['archivo'] for f in primero['filas']] == ['a.png', 'sub/b.jpg']
+    assert all(f['x'] == [1.0, 2.0] and f['y'] == [3.0, 4.0] for f in primero['filas'])
+    assert primero['metricas']['desde_cache'] == 0
+    assert len(lecturas) == 2
+
+    # Mismos bytes desde la carpeta: no se vuelve a leer ninguna
+    segundo = lote_ocr.procesar_lote(carpeta)
+    assert [f['x'] for f in segundo['filas']] == [[1.0, 2.0], [1.0, 2.0]]
+    assert segundo['metricas']['desde_cache'] == 2
+    assert len(lecturas) == 2
+
+def test_imagen_ilegible_queda_como_error(tmp_path, lecturas):
+    (tmp_path / 'rota.png').write_bytes(b'no es una imagen')
+    [fila] = lote_ocr.procesar_lote(str(tmp_path))['filas']
+    assert fila['x'] is None and fila['error']
+    assert lecturas == []
@@ -0,0 +1,62 @@
+"""
+Pool de lectores: la carga de un lector no bloquea al resto del pool
+"""
+import queue
+import threading
+
+import pytest
+
+from utils import pool_easyocr
+
+@pytest.fixture
+def pool(monkeypatch):
+    monkeypatch.setattr(pool_easyocr, '_libres', queue.LifoQueue())
+    monkeypatch.setattr(pool_easyocr, '_creados', [])
+    monkeypatch.setattr(pool_easyocr, '_reservados', 0)
+    monkeypatch.setattr(pool_easyocr, '_en_uso', 0)
+    monkeypatch.setattr(pool_easyocr, '_REVISION_ESPERA', 0.05)
+    return pool_easyocr
+
+def test_la_carga_ocurre_fuera_del_candado(pool, monkeypatch):
+    monkeypatch.setattr(pool, 'TAMANO_POOL', 2)
+    cargando, seguir = threading.Event(), threading.Event()
+
+    def crear_lento():
+        cargando.set()
+        assert seguir.wait(5)
+        return 'lento'
+
+    pool._creados.append('listo')
+    pool._libres.put('listo')
+    monkeypatch.setattr(pool, '_crear_lector', crear_lento)
+
+    with pool.lector_ocr() as primero:
+        hilo = threading.Thread(target=lambda: pool.lector_ocr().__enter__())
+        hilo.start()
+        assert cargando.wait(5)
+        # Mientras el otro hilo carga, el pool sigue respondiendo
+        assert primero == 'listo'
+        assert pool.uso_memoria()['lectores'] == 1
+    with pool.lector_ocr(timeout=1) as reader:
+        assert reader == 'listo'
+    seguir.set()
+    hilo.join(5)
+    assert sorted(pool._creados) == ['lento', 'listo']
+
+def test_carga_fallida_libera_el_lugar(pool, monkeypatch):
+    monkeypatch.setattr(pool, 'TAMANO_POOL', 1)
+    intentos = []
+
+    def crear():
+        intentos.append(1)
+        if len(intentos) == 1:
+            raise ImportError("sin modelos")
+        return 'segundo'
+
+    monkeypatch.setattr(pool, '_crear_lector', crear)
+    with pytest.raises(ImportError):
+        with pool.lector_ocr():
+            pass
+    with pool.lector_ocr(timeout=1) as reader:
+        assert reader == 'segundo'
+    assert pool._reservados == 0 and pool.uso_memoria()['en_uso'] == 0
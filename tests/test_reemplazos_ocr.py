@@ -0,0 +1,31 @@
+"""
+Limpieza de lo que lee EasyOCR: 'definitivo' sigue leyendo 'l' como 1,
+igual que el ocr_definitivo original
+"""
+from contextlib import contextmanager
+
+from utils import ocr_pipeline
+
+class _LectorFalso:
+    def detect(self, imagen, **argumentos):
+        return [[None]], [[]]
+
+    def recognize(self, imagen, horizontales, libres, **argumentos):
+        caja = [[0, 0], [20, 0], [20, 10], [0, 10]]
+        return [(caja, '1l', 0.9), (caja, 'O.5', 0.9)]
+
+def _valores(monkeypatch, nombre_config):
+    @contextmanager
+    def lector_ocr():
+        yield _LectorFalso()
+
+    monkeypatch.setattr(ocr_pipeline, 'lector_ocr', lector_ocr)
+    config = ocr_pipeline.CONFIGURACIONES[nombre_config]
+    [(_, numeros)] = ocr_pipeline._leer_easyocr('CLAHE', None, config, {})
+    return [n['val'] for n in numeros]
+
+def test_definitivo_lee_l_como_uno(monkeypatch):
+    assert _valores(monkeypatch, 'definitivo') == [11.0, 0.5]
+
+def test_rapido_conserva_la_limpieza_basica(monkeypatch):
+    assert _valores(monkeypatch, 'rapido') == [1.0, 0.5]
@@ -0,0 +1,100 @@
+"""
+Servicio de OCR: respuestas de error, lotes con imágenes repetidas y
+respaldo local solo cuando no se puede conectar
+"""
+import asyncio
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from utils import ocr_pipeline, servicio_ocr
+from utils.servicio_ocr import ErrorServicio, ServicioNoDisponible, ServicioOCR
+
+@pytest.fixture
+def lecturas(monkeypatch):
+    """Reemplaza el pipeline por uno falso que anota cada lectura"""
+    hechas = []
+
+    def pipeline_falso(datos, config='definitivo', **kwargs):
+        hechas.append((bytes(datos), config))
+        time.sleep(0.05)
+        if datos == b'rompe':
+            raise RuntimeError("imagen ilegible")
+        return {'x': [1.0, 2.0], 'y': [3.0, 4.0], 'confianza': 0.9, 'motor': 'falso'}
+
+    monkeypatch.setattr(ocr_pipeline, 'ejecutar_pipeline', pipeline_falso)
+    return hechas
+
+@pytest.fixture
+def servicio(lecturas):
+    carpeta = tempfile.mkdtemp(prefix='mn')
+    direccion = f"unix:{os.path.join(carpeta, 'ocr.sock')}"
+    servicio = ServicioOCR(simultaneas=2, espera_lote=0.3)
+    loop = asyncio.new_event_loop()
+    hilo = threading.Thread(target=loop.run_forever, daemon=True)
+    hilo.start()
+    servidor = asyncio.run_coroutine_threadsafe(servicio.iniciar(direccion), loop).result(30)
+    yield servicio, direccion
+
+    async def cerrar():
+        servidor.close()
+        await servidor.wait_closed()
+        servicio._despachador.cancel()
+        await asyncio.gather(servicio._despachador, return_exceptions=True)
+
+    asyncio.run_coroutine_threadsafe(cerrar(), loop).result(5)
+    loop.call_soon_threadsafe(loop.stop)
+    hilo.join(5)
+    loop.close()
+    servicio._ejecutor.shutdown()
+    shutil.rmtree(carpeta, ignore_errors=True)
+
+def _crudo(direccion, peticion):
+    """Envía una petición HTTP tal cual y devuelve el código de estado"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as s:
+        s.settimeout(5)
+        s.connect(direccion[len('unix:'):])
+        s.sendall(peticion)
+        return int(s.recv(4096).split()[1])
+
+def test_content_length_invalido_o_enorme(servicio):
+    _, direccion = servicio
+    assert _crudo(direccion, b"POST /ocr HTTP/1.1\r\nContent-Length: abc\r\n\r\n") == 400
+    assert _crudo(direccion, b"POST /ocr HTTP/1.1\r\nContent-Length: -5\r\n\r\n") == 400
+    enorme = servicio_ocr.TAMANO_MAXIMO + 1
+    assert _crudo(direccion, f"POST /ocr HTTP/1.1\r\nContent-Length: {enorme}\r\n\r\n".encode()) == 413
+
+def test_imagenes_repetidas_se_leen_una_vez(servicio, lecturas):
+    servicio_, direccion = servicio
+    with ThreadPoolExecutor(4) as hilos:
+        resultados = list(hilos.map(lambda datos: servicio_ocr.extraer_remoto(datos, direccion=direccion),
+                                    [b'foto', b'foto', b'foto', b'otra']))
+    assert all(r['x'] == [1.0, 2.0] for r in resultados)
+    assert sorted(lecturas) == [(b'foto', 'definitivo'), (b'otra', 'definitivo')]
+    assert servicio_.metricas['repetidas'] == 2
+
+def test_error_del_servicio_no_repite_el_ocr_localmente(servicio, lecturas, monkeypatch):
+    _, direccion = servicio
+    monkeypatch.setattr(servicio_ocr, 'DIRECCION', direccion)
+    with pytest.raises(ErrorServicio) as error:
+        servicio_ocr.extraer_con_respaldo(b'rompe')
+    assert error.value.estado == 500
+    with pytest.raises(ErrorServicio) as error:
+        servicio_ocr.extraer_con_respaldo(b'foto', 'no_existe')
+    assert error.value.estado == 400
+    # Solo la lectura del servicio: ninguna en este proceso
+    assert lecturas == [(b'rompe', 'definitivo')]
+
+def test_sin_servicio_se_lee_localmente(lecturas, monkeypatch, tmp_path):
+    direccion = f"unix:{tmp_path / 'no_hay.sock'}"
+    with pytest.raises(ServicioNoDisponible):
+        servicio_ocr.extraer_remoto(b'foto', direccion=direccion)
+    monkeypatch.setattr(servicio_ocr, 'DIRECCION', direccion)
+    assert servicio_ocr.extraer_con_respaldo(b'foto')['motor'] == 'falso'
+    assert lecturas == [(b'foto', 'definitivo')]
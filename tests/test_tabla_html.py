@@ -0,0 +1,28 @@
+"""
+Tabla HTML de diferencias divididas y desarrollo en Markdown
+"""
+import numpy as np
+
+from utils import generador_desarrollo as desarrollo
+from utils.interpolacion_newton import diferencias_divididas
+
+def _columnas(html):
+    return html.count('<th ')
+
+def test_un_punto_no_repite_la_columna_f():
+    html = desarrollo.generar_tabla_html([2.0], [5.0], np.array([[5.0]]))
+    assert _columnas(html) == 3
+    assert html.count('5.000000') == 1
+
+def test_ventana_de_columnas():
+    x = [0.0, 1.0, 2.0, 3.0]
+    tabla, _ = diferencias_divididas(x, [1.0, 2.0, 5.0, 10.0])
+    assert _columnas(desarrollo.generar_tabla_html(x, x, tabla)) == 3 + 3
+    assert _columnas(desarrollo.generar_tabla_html(x, x, tabla, col_inicio=0, num_cols=2)) == 3 + 2
+    assert _columnas(desarrollo.generar_tabla_html(x, x, tabla, col_inicio=9)) == 3 + 1
+
+def test_markdown_separa_los_parrafos():
+    x = [1.0, 2.0, 3.0]
+    tabla, _ = diferencias_divididas(x, [1.0, 4.0, 9.0])
+    md = desarrollo.generar_desarrollo_completo(x, x, tabla, formato='md')
+    assert "Número de puntos: 3\n\nGrado del polinomio: 2\n" in md
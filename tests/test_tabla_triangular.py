@@ -0,0 +1,62 @@
+"""
+Indexación de TablaTriangular comparada con la de una matriz densa
+"""
+import numpy as np
+import pytest
+
+from utils.tabla_triangular import TablaTriangular
+
+def _tablas(n=5):
+    tabla = TablaTriangular(n)
+    densa = np.zeros((n, n))
+    for j in range(n):
+        tabla.columna(j)[:] = np.arange(n - j) + 10 * j
+        densa[:n - j, j] = tabla.columna(j)
+    return tabla, densa
+
+@pytest.mark.parametrize('clave', [
+    (2, 1), (-1, 0), (0, -1), (slice(None), 1), (slice(None, None, -1), 1), (slice(None, None, -1), 0),
+    (slice(1, 4), 2), (0, slice(None)), (-2, slice(None, None, -1)), (slice(None), slice(None)),
+    ([0, 2], 1), (np.array([-1, 0]), 0), (1, [0, 3]), ([3, 1], slice(None)), (slice(None), np.array([0, 2])),
+    ([0, 4, 2], [1, 0, 3]), ([1, 2], [0]), (np.int64(2), np.int64(1)),
+])
+def test_lectura_como_densa(clave):
+    tabla, densa = _tablas()
+    np.testing.assert_array_equal(tabla[clave], densa[clave])
+
+def test_escritura_con_negativos_y_slices():
+    tabla, densa = _tablas()
+    for clave, valor in [((-1, 0), 5), ((0, slice(None)), 7), ((slice(3, None, -1), 1), [1, 2, 3, 4]),
+                         ((slice(0, 2), slice(0, 2)), [[1, 2], [3, 4]])]:
+        tabla[clave] = valor
+        densa[clave] = valor
+    np.testing.assert_array_equal(tabla[:, :], densa)
+
+def test_escritura_fuera_del_triangulo():
+    tabla, _ = _tablas()
+    with pytest.raises(IndexError):
+        tabla[-1, 1] = 3
+    with pytest.raises(IndexError):
+        tabla[:, 1] = 0
+
+def test_escritura_con_arrays():
+    tabla, densa = _tablas()
+    for clave, valor in [(([0, 2], 1), [8, 9]), (([0, 1], [3, 0]), [5, 6]), ((np.array([4, 3]), 0), 2)]:
+        tabla[clave] = valor
+        densa[clave] = valor
+    np.testing.assert_array_equal(tabla[:, :], densa)
+    with pytest.raises(IndexError):
+        tabla[[0, 4], [0, 1]] = 1
+
+@pytest.mark.parametrize('clave', [(1.0, 0), ([True, False, True, False, True], 0), (np.zeros((2, 2), int), 0)])
+def test_indices_no_admitidos(clave):
+    tabla, _ = _tablas()
+    with pytest.raises(TypeError, match="no admitido"):
+        tabla[clave]
+
+def test_arrays_fuera_de_rango_o_de_distinto_largo():
+    tabla, _ = _tablas()
+    with pytest.raises(IndexError):
+        tabla[[0, 5], 0]
+    with pytest.raises(IndexError):
+        tabla[[0, 1, 2], [0, 1]]
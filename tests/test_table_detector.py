@@ -0,0 +1,60 @@
+"""
+Detector de tablas: reparto de las palabras de Tesseract en celdas,
+recorte de la región de la tabla y enderezado de la foto
+"""
+import cv2
+import numpy as np
+import pytest
+
+from utils.table_detector import (angulo_inclinacion, asignar_a_celdas, cuadrilatero_tabla,
+                                  enderezar, region_tabla)
+
+CAJAS = [(0, 0, 100, 50), (100, 0, 100, 50)]
+
+def test_palabras_pegadas_forman_un_numero():
+    # --psm 11 parte "1.25" y "-3" en varias palabras contiguas
+    palabras = [(10, 10, 10, 20, '1'), (20, 10, 5, 20, '.'), (25, 10, 20, 20, '25'),
+                (110, 10, 8, 20, '-'), (118, 10, 10, 20, '3')]
+    assert asignar_a_celdas(CAJAS, palabras) == [(0, 0, 1.25), (100, 0, -3.0)]
+
+def test_trozos_separados_se_queda_con_el_mayor():
+    # Ruido pegado al borde de la celda lejos del número
+    palabras = [(92, 10, 10, 20, '7'), (20, 10, 40, 20, '123')]
+    assert asignar_a_celdas(CAJAS, palabras) == [(0, 0, 123.0)]
+
+def test_palabras_fuera_de_las_celdas_se_ignoran():
+    assert asignar_a_celdas(CAJAS, [(300, 300, 10, 10, '5')]) == []
+    assert asignar_a_celdas([], [(0, 0, 10, 10, '5')]) == []
+
+def _tabla():
+    """Tabla de 2 x 4 celdas en una hoja blanca"""
+    img = np.full((400, 700), 255, np.uint8)
+    for y in (100, 175, 250):
+        cv2.line(img, (100, y), (600, y), 0, 3)
+    for x in range(100, 601, 125):
+        cv2.line(img, (x, 100), (x, 250), 0, 3)
+    for i, x in enumerate(range(130, 600, 125)):
+        cv2.putText(img, str(i), (x, 150), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+        cv2.putText(img, str(i * i), (x, 225), cv2.FONT_HERSHEY_SIMPLEX, 1, 0, 2)
+    return img
+
+def test_region_tabla_encierra_las_lineas_con_margen():
+    x, y, w, h = region_tabla(_tabla())
+    assert x < 100 and y < 100 and x + w > 600 and y + h > 250
+    assert w < 700 and h < 400
+    assert region_tabla(np.full((300, 300), 255, np.uint8)) is None
+
+def test_tabla_derecha_no_se_toca():
+    gris = _tabla()
+    assert enderezar(gris) is gris
+
+def test_tabla_girada_queda_rectangular():
+    matriz = cv2.getRotationMatrix2D((350, 200), 7, 1)
+    girada = cv2.warpAffine(_tabla(), matriz, (700, 400), borderValue=255)
+    assert angulo_inclinacion(girada) == pytest.approx(-7, abs=1)
+    esquinas = cuadrilatero_tabla(enderezar(girada))
+    # Bordes horizontales y verticales con la proporción original (500 x 150)
+    assert np.abs(esquinas[1, 1] - esquinas[0, 1]) <= 3
+    assert np.abs(esquinas[3, 0] - esquinas[0, 0]) <= 3
+    ancho, alto = esquinas[1, 0] - esquinas[0, 0], esquinas[3, 1] - esquinas[0, 1]
+    assert ancho / alto == pytest.approx(500 / 150, rel=0.05)
@@ -0,0 +1,47 @@
+"""
+Lectura de puntos en el texto del OCR: las cinco heurísticas y los casos
+raros que _recorrer copia de la cascada de expresiones regulares
+"""
+import numpy as np
+import pytest
+
+from utils.banco_puntos import cascada_regex, texto_aleatorio
+from utils.texto_puntos import puntos_de_texto
+
+CASOS = [
+    # 1. pares "x, y" con o sin paréntesis, la coma puede ir en otra línea
+    ("(1, 2) (3, 4)", ([1.0, 3.0], [2.0, 4.0])),
+    ("1, 2\n3, 4", ([1.0, 3.0], [2.0, 4.0])),
+    ("1\n, 2\n3\n, 4", ([1.0, 3.0], [2.0, 4.0])),
+    # 2. línea con x y después línea con y o f (aunque haya otra fila entre medio)
+    ("x 1 2\n7 8\ny 4 5", ([1.0, 2.0], [4.0, 5.0])),
+    ("xi | 0 | 1 | 2\nf(xi) | 1 | 3 | 7", ([0.0, 1.0, 2.0], [1.0, 3.0, 7.0])),
+    # 3. dos líneas con la misma cantidad de números
+    ("a 1 2 3\nb 4 5 6", ([1.0, 2.0, 3.0], [4.0, 5.0, 6.0])),
+    ("1 2 3\n9 9\n4 5 6", ([1.0, 2.0, 3.0], [4.0, 5.0, 6.0])),
+    # 4. todos los números, mitad x y mitad y
+    ("1 2 3 4 5 6", ([1.0, 2.0, 3.0], [4.0, 5.0, 6.0])),
+    # 5. una línea por punto: con dos o más líneas de dos números gana
+    # antes la 3 (igual que en la cascada)
+    ("1 2\n3 4\n5 6", ([1.0, 2.0], [3.0, 4.0])),
+    # El número que sigue a un punto reintenta desde sus decimales
+    ("1.5., 3\n4, 5", ([5.0, 4.0], [3.0, 5.0])),
+    ("1.5.25, 3 7, 8", ([5.25, 7.0], [3.0, 8.0])),
+    # Negativos y etiquetas pegadas
+    ("(-1, -2.5) (0, 3)", ([-1.0, 0.0], [-2.5, 3.0])),
+    # Sin datos suficientes
+    ("ab", (None, None)),
+    ("1 2 3", (None, None)),
+    ("x 1 2 3", (None, None)),
+]
+
+@pytest.mark.parametrize("texto, esperado", CASOS)
+def test_casos(texto, esperado):
+    assert puntos_de_texto(texto) == esperado
+    assert cascada_regex(texto) == esperado
+
+def test_igual_a_la_cascada_en_textos_aleatorios():
+    rng = np.random.default_rng(1)
+    for _ in range(3000):
+        texto = texto_aleatorio(rng)
+        assert puntos_de_texto(texto) == cascada_regex(texto), texto
@@ -0,0 +1,38 @@
+"""
+Registro de trabajos: el error de un trabajo fallido llega al estado y
+los trabajos terminados que nadie recogió se olvidan
+"""
+import time
+
+import pytest
+
+from utils import trabajos
+
+@pytest.fixture(scope='module', autouse=True)
+def pool():
+    yield
+    trabajos.cerrar_pool()
+
+def _esperar(id_trabajo):
+    trabajos._trabajos[id_trabajo]['future'].exception(timeout=60)
+    while trabajos._trabajos[id_trabajo]['terminado'] is None:
+        time.sleep(0.01)
+
+def test_trabajo_fallido_informa_el_error():
+    id_trabajo = trabajos.enviar_trabajo(int, ('no es número',), descripcion="Conversión")
+    _esperar(id_trabajo)
+    estado = trabajos.estado_trabajo(id_trabajo)
+    assert estado['estado'] == trabajos.FALLIDO
+    assert 'no es número' in estado['error']
+    trabajos.olvidar_trabajo(id_trabajo)
+    assert id_trabajo not in trabajos._trabajos
+    assert id_trabajo not in trabajos._progreso
+
+def test_se_olvidan_los_trabajos_terminados_viejos(monkeypatch):
+    viejo = trabajos.enviar_trabajo(abs, (-3,))
+    _esperar(viejo)
+    assert trabajos.estado_trabajo(viejo)['error'] is None
+    monkeypatch.setattr(trabajos, 'RETENCION_TRABAJOS', 0.0)
+    nuevo = trabajos.enviar_trabajo(abs, (-4,))
+    assert viejo not in trabajos._trabajos
+    assert trabajos.obtener_resultado(nuevo, timeout=60) == 4
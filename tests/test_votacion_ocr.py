@@ -0,0 +1,69 @@
+"""
+Salida temprana con combinar='votacion': se fusionan las lecturas que
+llegaron al acuerdo, aunque el futuro de alguna todavía no se recogió
+"""
+import threading
+import time
+
+from utils import ocr_pipeline
+
+def _tabla(desplazamiento=0):
+    """Dos filas X/Y de cuatro celdas con posiciones"""
+    numeros = []
+    for fila, valores in enumerate(([1, 2, 3, 4], [10, 20, 30, 40])):
+        for col, valor in enumerate(valores):
+            numeros.append({'val': float(valor), 'x': 100.0 + 80 * col + desplazamiento,
+                            'y': 50.0 + 60 * fila, 'conf': 0.9, 'h': 20.0, 'w': 30.0})
+    return numeros
+
+class _ValidadorLento:
+    """
+    Envuelve al validador real: cuando una lectura no alcanza el acuerdo,
+    su hilo tarda en terminar, así la lectura que sí lo alcanza se recoge
+    primero
+    """
+
+    def __init__(self, validar, primera_votada):
+        self.validar = validar
+        self.primera_votada = primera_votada
+
+    @property
+    def acordadas(self):
+        return self.validar.acordadas
+
+    def __call__(self, numeros):
+        if self.validar(numeros):
+            return True
+        self.primera_votada.set()
+        time.sleep(0.3)
+        return False
+
+def test_votacion_fusiona_las_lecturas_del_acuerdo(monkeypatch):
+    monkeypatch.setitem(ocr_pipeline.MOTORES, 'falso',
+                        lambda nombre, img, config, tiempos: [(nombre, _tabla(img))])
+    monkeypatch.setattr(ocr_pipeline, 'registrar_lecturas', lambda *args, **kwargs: None)
+
+    primera_votada = threading.Event()
+    validadores = []
+    original = ocr_pipeline._validador_acuerdo
+
+    def validador_lento(config, previas):
+        validadores.append(_ValidadorLento(original(config, previas), primera_votada))
+        return validadores[-1]
+
+    monkeypatch.setattr(ocr_pipeline, '_validador_acuerdo', validador_lento)
+
+    def variantes():
+        yield 0, 'a', 0
+        primera_votada.wait(2)
+        yield 1, 'b', 2
+
+    previas = []
+    numeros, nombre = ocr_pipeline._leer_con_estadisticas(
+        variantes(), ocr_pipeline._configuracion('directo'), 'directo', 'falso', {}, previas=previas)
+
+    acordadas = validadores[-1].acordadas
+    assert acordadas is not None and len(acordadas) == 2
+    assert nombre.startswith(f"votación ({len(acordadas)} lecturas")
+    assert len(previas) == len(acordadas)
+    assert sorted(n['val'] for n in numeros) == [1, 2, 3, 4, 10, 20, 30, 40]
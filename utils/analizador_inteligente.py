@@ -6,6 +6,11 @@ import cv2
 import numpy as np
 from PIL import Image
 import re
+from utils.ocr_pipeline import generar_variantes, leer_variantes
+from utils.organizador import organizar
+from utils.registro import obtener_registro
+
+log = obtener_registro(__name__)
 
 def analizar_imagen_internamente(imagen):
     """
@@ -29,128 +34,23 @@ def analizar_imagen_internamente(imagen):
     
     # Método 1: EasyOCR con análisis de posición
     try:
-        import easyocr
-        reader = easyocr.Reader(['es', 'en'], gpu=False, verbose=False)
-        
-        # Leer con alta precisión
-        detecciones = reader.readtext(gray, detail=1, paragraph=False)
-        
-        # Extraer números con posición EXACTA
-        numeros_detectados = []
-        for (bbox, text, confidence) in detecciones:
-            # Solo considerar detecciones con buena confianza
-            if confidence > 0.3:
-                # Buscar números (incluyendo negativos y decimales)
-                nums = re.findall(r'-?\d+\.?\d*', text)
-                for num_str in nums:
-                    try:
-                        valor = float(num_str)
-                        # Posición del centro del bbox
-                        x_centro = int((bbox[0][0] + bbox[2][0]) / 2)
-                        y_centro = int((bbox[0][1] + bbox[2][1]) / 2)
-                        numeros_detectados.append({
-                            'valor': valor,
-                            'x': x_centro,
-                            'y': y_centro,
-                            'confianza': confidence
-                        })
-                    except:
-                        continue
+        numeros_detectados, _ = leer_variantes([('Gris', gray)], 'analizador', 'easyocr')
         
-        # Organizar por filas (Y similar)
-        if len(numeros_detectados) >= 4:
-            # Ordenar por Y primero
-            numeros_detectados.sort(key=lambda n: n['y'])
-            
-            # Agrupar en filas
-            filas = []
-            fila_actual = []
-            y_ref = numeros_detectados[0]['y']
-            tolerancia_y = 40  # píxeles
-            
-            for num in numeros_detectados:
-                if abs(num['y'] - y_ref) <= tolerancia_y:
-                    fila_actual.append(num)
-                else:
-                    if fila_actual:
-                        # Ordenar fila por X
-                        fila_actual.sort(key=lambda n: n['x'])
-                        filas.append([n['valor'] for n in fila_actual])
-                    fila_actual = [num]
-                    y_ref = num['y']
-            
-            # Última fila
-            if fila_actual:
-                fila_actual.sort(key=lambda n: n['x'])
-                filas.append([n['valor'] for n in fila_actual])
-            
-            # Buscar dos filas con la misma cantidad de elementos
-            for i in range(len(filas)):
-                for j in range(i+1, len(filas)):
-                    if len(filas[i]) == len(filas[j]) and len(filas[i]) >= 2:
-                        # Verificar que sean valores razonables
-                        if validar_valores(filas[i], filas[j]):
-                            return filas[i], filas[j], "EasyOCR - Análisis de posición"
-            
-            # Si no encontramos dos filas iguales, buscar patrón alternativo
-            # A veces los números están en una sola fila alternados
-            for fila in filas:
-                if len(fila) >= 4 and len(fila) % 2 == 0:
-                    mitad = len(fila) // 2
-                    x_vals = fila[:mitad]
-                    y_vals = fila[mitad:]
-                    if validar_valores(x_vals, y_vals):
-                        return x_vals, y_vals, "EasyOCR - Fila única"
+        # Organizar por filas (Y similar) con la validación propia del analizador
+        x_vals, y_vals = organizar(numeros_detectados, validar=validar_valores)
+        if x_vals:
+            return x_vals, y_vals, "EasyOCR - Análisis de posición"
     
     except Exception as e:
-        print(f"EasyOCR interno falló: {e}")
+        log.info("EasyOCR interno falló: %s", e)
     
     # Método 2: Preprocesamiento múltiple + Pytesseract
     try:
-        import pytesseract
-        
-        # Aplicar múltiples preprocesamientos
-        versiones = []
-        
-        # Versión 1: CLAHE + Denoise
-        clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
-        enhanced = clahe.apply(gray)
-        denoised = cv2.fastNlMeansDenoising(enhanced, None, 10, 7, 21)
-        versiones.append(denoised)
-        
-        # Versión 2: Threshold adaptativo
-        thresh_adapt = cv2.adaptiveThreshold(
-            gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY, 11, 2
-        )
-        versiones.append(thresh_adapt)
-        
-        # Versión 3: Otsu
-        _, thresh_otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        versiones.append(thresh_otsu)
-        
-        # Versión 4: Morfología para limpiar
-        kernel = np.ones((2,2), np.uint8)
-        morph = cv2.morphologyEx(thresh_otsu, cv2.MORPH_CLOSE, kernel)
-        versiones.append(morph)
-        
-        mejor_resultado = None
-        max_numeros = 0
-        
-        for version in versiones:
-            # Configuración específica para números
-            config = '--psm 6 --oem 3 -c tessedit_char_whitelist=0123456789.,-'
-            texto = pytesseract.image_to_string(version, config=config)
-            
-            # Extraer números
-            numeros = re.findall(r'-?\d+\.?\d*', texto)
-            
-            if len(numeros) > max_numeros:
-                max_numeros = len(numeros)
-                mejor_resultado = numeros
+        versiones = generar_variantes(gray, 'analizador', 'tesseract')
+        numeros, _ = leer_variantes(versiones, 'analizador', 'tesseract')
         
-        if mejor_resultado and len(mejor_resultado) >= 4:
-            valores = [float(n) for n in mejor_resultado]
+        if len(numeros) >= 4:
+            valores = [n['val'] for n in numeros]
             
             # Intentar dividir en X e Y
             if len(valores) % 2 == 0:
@@ -161,7 +61,7 @@ def analizar_imagen_internamente(imagen):
                     return x_vals, y_vals, "Pytesseract - Multiprocesamiento"
     
     except Exception as e:
-        print(f"Pytesseract interno falló: {e}")
+        log.info("Pytesseract interno falló: %s", e)
     
     # Método 3: Análisis de regiones específicas
     try:
@@ -182,7 +82,7 @@ def analizar_imagen_internamente(imagen):
                 return x_vals, y_vals, "Análisis por regiones"
     
     except Exception as e:
-        print(f"Análisis por regiones falló: {e}")
+        log.info("Análisis por regiones falló: %s", e)
     
     return None, None, "No se pudo extraer"
 
@@ -0,0 +1,253 @@
+"""
+Banco de pruebas del OCR: exactitud, latencia y memoria de cada extractor
+
+Genera un corpus de tablas sintéticas con valores X/Y conocidos (varias
+fuentes, ruido, desenfoque, rotación y baja resolución) y pasa cada
+imagen por los puntos de entrada que usa la aplicación. Cada extractor
+corre en un proceso nuevo, así el pico de memoria (RSS) es solo suyo.
+
+Uso:
+    python -m utils.banco_ocr [carpeta_corpus [imagenes [extractor ...]]]
+
+Si la carpeta no tiene corpus (etiquetas.json), se genera; por defecto es
+corpus_ocr en el directorio temporal del sistema, así se reutiliza entre
+ejecuciones sin ensuciar el directorio de trabajo.
+"""
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:   # Windows
+    resource = None
+
+# nombre -> (módulo, función); todas reciben una imagen y devuelven (x, y, ...)
+EXTRACTORES = {
+    'extraer_tabla': ('utils.ocr_definitivo', 'extraer_tabla'),
+    'extraer_numeros_ultra': ('utils.ocr_ultra', 'extraer_numeros_ultra'),
+    'extraer_numeros_profesional': ('utils.ocr_profesional', 'extraer_numeros_profesional'),
+    'leer_tabla_directamente': ('utils.lector_directo', 'leer_tabla_directamente'),
+    'detectar_tabla_y_extraer_datos': ('utils.table_detector', 'detectar_tabla_y_extraer_datos'),
+}
+
+FUENTES = {
+    'simplex': cv2.FONT_HERSHEY_SIMPLEX,
+    'duplex': cv2.FONT_HERSHEY_DUPLEX,
+    'complex': cv2.FONT_HERSHEY_COMPLEX,
+    'triplex': cv2.FONT_HERSHEY_TRIPLEX,
+    'cursiva': cv2.FONT_HERSHEY_SIMPLEX | cv2.FONT_ITALIC,
+}
+
+DEGRADACIONES = ('limpia', 'ruido', 'desenfoque', 'rotacion', 'baja_resolucion')
+
+ARCHIVO_ETIQUETAS = 'etiquetas.json'
+
+# ==================== CORPUS ====================
+
+def _texto(valor):
+    return f"{valor:g}"
+
+def valores_aleatorios(rng):
+    """X equiespaciados o no, sin repetir, e Y con 0 a 2 decimales"""
+    n = int(rng.integers(4, 9))
+    inicio = int(rng.integers(-2, 6))
+    paso = float(rng.choice([1, 2, 0.5, 5]))
+    x = [round(inicio + paso * i, 2) for i in range(n)]
+    if rng.random() < 0.3:
+        x = sorted(set(round(v + float(rng.choice([0, 0.5])), 2) for v in x))
+    decimales = int(rng.integers(0, 3))
+    y = [round(float(v), decimales) for v in rng.uniform(-50, 150, len(x))]
+    return x, y
+
+def dibujar_tabla(x, y, fuente='simplex', escala=1.2):
+    """
+    Tabla horizontal de dos filas ('x' e 'y' en la primera columna) en RGB
+    """
+    cara = FUENTES[fuente]
+    grosor = max(1, round(escala * 2))
+    textos = [['x'] + [_texto(v) for v in x], ['y'] + [_texto(v) for v in y]]
+    anchos = [max(cv2.getTextSize(t, cara, escala, grosor)[0][0] for t in columna)
+              for columna in zip(*textos)]
+    alto_texto = cv2.getTextSize('0', cara, escala, grosor)[0][1]
+    margen, relleno = 40, int(20 * escala)
+    alto_fila = alto_texto + 2 * relleno
+    bordes_x = np.cumsum([margen] + [a + 2 * relleno for a in anchos])
+    alto, ancho = 2 * margen + 2 * alto_fila, int(bordes_x[-1]) + margen
+
+    img = np.full((alto, ancho, 3), 255, np.uint8)
+    for f in range(3):
+        cv2.line(img, (margen, margen + f * alto_fila), (int(bordes_x[-1]), margen + f * alto_fila), (0, 0, 0), 2)
+    for bx in bordes_x:
+        cv2.line(img, (int(bx), margen), (int(bx), margen + 2 * alto_fila), (0, 0, 0), 2)
+    for f, fila in enumerate(textos):
+        base = margen + f * alto_fila + relleno + alto_texto
+        for c, texto in enumerate(fila):
+            cv2.putText(img, texto, (int(bordes_x[c]) + relleno, base), cara, escala, (0, 0, 0),
+                        grosor, cv2.LINE_AA)
+    return img
+
+def degradar(img, tipo, rng):
+    """Aplica una degradación ('limpia' no cambia nada)"""
+    if tipo == 'ruido':
+        ruido = rng.normal(0, rng.uniform(10, 25), img.shape)
+        return np.clip(img + ruido, 0, 255).astype(np.uint8)
+    if tipo == 'desenfoque':
+        k = int(rng.choice([3, 5, 7]))
+        return cv2.GaussianBlur(img, (k, k), 0)
+    if tipo == 'rotacion':
+        h, w = img.shape[:2]
+        angulo = float(rng.uniform(1, 4) * rng.choice([-1, 1]))
+        matriz = cv2.getRotationMatrix2D((w / 2, h / 2), angulo, 1.0)
+        return cv2.warpAffine(img, matriz, (w, h), flags=cv2.INTER_LINEAR, borderValue=(255, 255, 255))
+    if tipo == 'baja_resolucion':
+        factor = float(rng.uniform(0.35, 0.5))
+        return cv2.resize(img, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+    return img
+
+def generar_corpus(carpeta, imagenes=40, semilla=0):
+    """
+    Escribe `imagenes` tablas PNG en `carpeta` más etiquetas.json con los
+    valores correctos (las degradaciones se reparten por igual)
+
+    Returns:
+        dict archivo -> {'x', 'y', 'fuente', 'escala', 'degradacion'}
+    """
+    rng = np.random.default_rng(semilla)
+    os.makedirs(carpeta, exist_ok=True)
+    etiquetas = {}
+    for i in range(imagenes):
+        x, y = valores_aleatorios(rng)
+        fuente = str(rng.choice(list(FUENTES)))
+        escala = round(float(rng.uniform(0.8, 2.0)), 2)
+        degradacion = DEGRADACIONES[i % len(DEGRADACIONES)]
+        img = degradar(dibujar_tabla(x, y, fuente, escala), degradacion, rng)
+        archivo = f"tabla_{i:03d}_{degradacion}.png"
+        cv2.imwrite(os.path.join(carpeta, archivo), cv2.cvtColor(img, cv2.COLOR_RGB2BGR))
+        etiquetas[archivo] = {'x': x, 'y': y, 'fuente': fuente, 'escala': escala, 'degradacion': degradacion}
+    with open(os.path.join(carpeta, ARCHIVO_ETIQUETAS), 'w', encoding='utf-8') as f:
+        json.dump(etiquetas, f, indent=1)
+    return etiquetas
+
+def cargar_corpus(carpeta):
+    """Etiquetas del corpus (ver generar_corpus)"""
+    with open(os.path.join(carpeta, ARCHIVO_ETIQUETAS), encoding='utf-8') as f:
+        return json.load(f)
+
+# ==================== MEDICIÓN ====================
+
+def es_exacta(x, y, x_ok, y_ok):
+    """Mismos valores, en el mismo orden, que los de la etiqueta"""
+    if not x or not y or len(x) != len(x_ok) or len(y) != len(y_ok):
+        return False
+    return bool(np.allclose(x, x_ok, rtol=0, atol=1e-6) and np.allclose(y, y_ok, rtol=0, atol=1e-6))
+
+def _rss_pico():
+    """Pico de memoria residente del proceso en bytes (None si no se puede medir)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico if sys.platform == 'darwin' else pico * 1024
+
+def medir_extractor(nombre, carpeta, repeticiones=1):
+    """
+    Pasa todo el corpus por un extractor (pensado para correr en un
+    proceso propio; la primera imagen se lee una vez antes, sin medir,
+    para que la carga de modelos no cuente como latencia)
+
+    Returns:
+        dict con 'extractor', 'imagenes', 'exactas', 'exactitud',
+        'p50_ms', 'p95_ms', 'rss_pico_mb', 'errores' y 'por_degradacion'
+    """
+    # Sin caché de disco: cada lectura tiene que ejecutar el OCR
+    os.environ.pop('MN_CACHE_OCR', None)
+    from utils import cache_ocr
+
+    modulo, funcion = EXTRACTORES[nombre]
+    extraer = getattr(importlib.import_module(modulo), funcion)
+    etiquetas = cargar_corpus(carpeta)
+    imagenes = {archivo: cv2.cvtColor(cv2.imread(os.path.join(carpeta, archivo)), cv2.COLOR_BGR2RGB)
+                for archivo in etiquetas}
+
+    if imagenes:
+        try:
+            extraer(next(iter(imagenes.values())))
+        except Exception:
+            pass
+
+    latencias = []
+    exactas = errores = 0
+    por_degradacion = {}
+    for archivo, etiqueta in etiquetas.items():
+        for _ in range(repeticiones):
+            cache_ocr.limpiar_cache()
+            inicio = time.perf_counter()
+            try:
+                x, y = extraer(imagenes[archivo])[:2]
+            except Exception:
+                x = y = None
+                errores += 1
+            latencias.append(time.perf_counter() - inicio)
+            acierto = es_exacta(x, y, etiqueta['x'], etiqueta['y'])
+            exactas += acierto
+            cuenta = por_degradacion.setdefault(etiqueta['degradacion'], [0, 0])
+            cuenta[0] += acierto
+            cuenta[1] += 1
+
+    lecturas = max(1, len(latencias))
+    rss = _rss_pico()
+    return {
+        'extractor': nombre,
+        'imagenes': len(etiquetas),
+        'exactas': exactas,
+        'exactitud': exactas / lecturas,
+        'p50_ms': float(np.percentile(latencias, 50)) * 1000 if latencias else 0.0,
+        'p95_ms': float(np.percentile(latencias, 95)) * 1000 if latencias else 0.0,
+        'rss_pico_mb': rss / 2**20 if rss is not None else None,
+        'errores': errores,
+        'por_degradacion': {tipo: aciertos / total for tipo, (aciertos, total) in por_degradacion.items()},
+    }
+
+def ejecutar_banco(carpeta, extractores=None, repeticiones=1):
+    """
+    Mide cada extractor en un proceso nuevo (spawn) sobre el corpus
+
+    Returns:
+        lista de dicts de medir_extractor, en el orden de `extractores`
+    """
+    extractores = extractores or list(EXTRACTORES)
+    contexto = multiprocessing.get_context('spawn')
+    filas = []
+    for nombre in extractores:
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as proceso:
+            filas.append(proceso.submit(medir_extractor, nombre, carpeta, repeticiones).result())
+    return filas
+
+def resumen_banco(filas):
+    """Texto con una línea por extractor y la exactitud por degradación"""
+    tipos = [t for t in DEGRADACIONES if any(t in f['por_degradacion'] for f in filas)]
+    encabezado = (f"{'extractor':<32} {'exactitud':>9} {'p50 ms':>8} {'p95 ms':>8} {'RSS MB':>8}  "
+                  + ' '.join(f"{t[:10]:>10}" for t in tipos))
+    lineas = [encabezado]
+    for f in filas:
+        rss = f"{f['rss_pico_mb']:8.0f}" if f['rss_pico_mb'] is not None else f"{'-':>8}"
+        lineas.append(f"{f['extractor']:<32} {f['exactitud']:>9.0%} {f['p50_ms']:>8.0f} {f['p95_ms']:>8.0f} {rss}  "
+                      + ' '.join(f"{f['por_degradacion'].get(t, 0):>10.0%}" for t in tipos))
+    return '\n'.join(lineas)
+
+if __name__ == '__main__':
+    carpeta = sys.argv[1] if len(sys.argv) > 1 else os.path.join(tempfile.gettempdir(), 'corpus_ocr')
+    imagenes = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    extractores = sys.argv[3:] or None
+    if not os.path.exists(os.path.join(carpeta, ARCHIVO_ETIQUETAS)):
+        generar_corpus(carpeta, imagenes)
+        print(f"Corpus de {imagenes} imágenes generado en {carpeta}")
+    print(resumen_banco(ejecutar_banco(carpeta, extractores)))
@@ -0,0 +1,182 @@
+"""
+Banco de pruebas de la lectura de puntos en texto de OCR
+
+Compara utils.texto_puntos (una pasada por tokens) con la cascada de
+expresiones regulares que usaba extraer_puntos_interpolacion: mismos
+resultados en textos aleatorios y tiempo en volcados largos de OCR.
+
+Uso:
+    python -m utils.banco_puntos [lineas [repeticiones]]
+"""
+import re
+import sys
+import time
+
+import numpy as np
+
+from utils.texto_puntos import puntos_de_texto
+
+# ==================== REFERENCIA ====================
+
+def cascada_regex(texto):
+    """
+    Implementación anterior de extraer_puntos_interpolacion, tal cual,
+    para comparar resultados y tiempos
+    """
+    if not texto or len(texto.strip()) < 3:
+        return None, None
+
+    texto = texto.replace('|', ' ').replace(':', ' ').replace(';', ' ')
+    texto = texto.replace('=', ' ')
+
+    patron_puntos = r'\(?\s*(-?\d+\.?\d*)\s*,\s*(-?\d+\.?\d*)\s*\)?'
+    puntos = re.findall(patron_puntos, texto)
+
+    if puntos and len(puntos) >= 2:
+        x_vals = [float(p[0]) for p in puntos]
+        y_vals = [float(p[1]) for p in puntos]
+        return x_vals, y_vals
+
+    lineas = texto.split('\n')
+    x_vals = []
+    y_vals = []
+
+    for i, linea in enumerate(lineas):
+        linea_lower = linea.lower()
+        nums = re.findall(r'-?\d+\.?\d*', linea)
+
+        if ('x' in linea_lower or 'X' in linea) and nums and not y_vals:
+            x_vals = [float(n) for n in nums if len(n) > 0]
+
+        elif (('y' in linea_lower or 'f' in linea_lower or 'Y' in linea or 'F' in linea)
+              and nums and x_vals and not y_vals):
+            y_vals = [float(n) for n in nums if len(n) > 0]
+
+    if x_vals and y_vals and len(x_vals) == len(y_vals) and len(x_vals) >= 2:
+        return x_vals, y_vals
+
+    numeros_por_linea = []
+    for linea in lineas:
+        nums = re.findall(r'-?\d+\.?\d*', linea)
+        if len(nums) >= 2:
+            numeros_por_linea.append([float(n) for n in nums])
+
+    if len(numeros_por_linea) >= 2:
+        if len(numeros_por_linea[0]) == len(numeros_por_linea[1]):
+            return numeros_por_linea[0], numeros_por_linea[1]
+
+        for i in range(len(numeros_por_linea)):
+            for j in range(i+1, len(numeros_por_linea)):
+                if len(numeros_por_linea[i]) == len(numeros_por_linea[j]) and len(numeros_por_linea[i]) >= 2:
+                    return numeros_por_linea[i], numeros_por_linea[j]
+
+    todos_nums = re.findall(r'-?\d+\.?\d*', texto)
+    if len(todos_nums) >= 4 and len(todos_nums) % 2 == 0:
+        mitad = len(todos_nums) // 2
+        x_vals = [float(n) for n in todos_nums[:mitad]]
+        y_vals = [float(n) for n in todos_nums[mitad:]]
+        return x_vals, y_vals
+
+    if len(numeros_por_linea) >= 2:
+        if all(len(linea) == 2 for linea in numeros_por_linea):
+            x_vals = [linea[0] for linea in numeros_por_linea]
+            y_vals = [linea[1] for linea in numeros_por_linea]
+            if len(x_vals) >= 2:
+                return x_vals, y_vals
+
+    return None, None
+
+# ==================== TEXTOS ====================
+
+# Piezas con las que se arman textos aleatorios (incluye los casos raros:
+# "1.5.25", "--3", comas dobles, paréntesis y separadores que se limpian)
+_PIEZAS = ['x', 'X', 'y', 'f(x)', 'F', 'xi', 'yi', 'max', 'Valor', 'tabla', 'ñ', '_',
+           '0', '1', '25', '-3', '--3', '1.', '1.5', '.5', '1.5.25', '-0.75', '12.5.5',
+           ',', ', ', ',,', '(', ')', '|', ':', ';', '=', '-', '.', ' ', '  ', '\t', '\n', '\n\n', '\r\n']
+
+def texto_aleatorio(rng, piezas=40):
+    """Mezcla de números, etiquetas y separadores como los que deja el OCR"""
+    return ''.join(rng.choice(_PIEZAS) for _ in range(int(rng.integers(1, piezas))))
+
+def volcado_ocr(rng, lineas=2000):
+    """
+    Volcado largo: encabezados y texto suelto con tablas de varias
+    columnas entre medio, sin pares "a, b", así la cascada recorre todas
+    las heurísticas
+    """
+    palabras = ['Tabla', 'de', 'valores', 'Ejercicio', 'Interpolación', 'Datos', 'medidos', 'página']
+    salida = []
+    for i in range(lineas):
+        tipo = i % 4
+        if tipo == 0:
+            salida.append(' '.join(rng.choice(palabras) for _ in range(int(rng.integers(2, 8)))))
+        elif tipo == 1:
+            n = int(rng.integers(3, 12))
+            salida.append('| ' + ' | '.join(f"{v:.2f}" for v in rng.uniform(-100, 100, n)) + ' |')
+        elif tipo == 2:
+            salida.append(f"Página {i} de {lineas}")
+        else:
+            salida.append('')
+    return '\n'.join(salida)
+
+# ==================== BANCO ====================
+
+def verificar(textos):
+    """
+    Textos en que la lectura nueva y la cascada no coinciden
+
+    Returns:
+        lista de (texto, resultado_cascada, resultado_nuevo)
+    """
+    distintos = []
+    for texto in textos:
+        esperado, obtenido = cascada_regex(texto), puntos_de_texto(texto)
+        if esperado != obtenido:
+            distintos.append((texto, esperado, obtenido))
+    return distintos
+
+def _cronometrar(funcion, texto, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion(texto)
+        tiempos.append(time.perf_counter() - inicio)
+    return float(np.median(tiempos)) * 1000
+
+def ejecutar_banco(lineas=(50, 500, 5000), repeticiones=20, aleatorios=20000, semilla=0):
+    """
+    Returns:
+        (distintos, filas): distintos de verificar() sobre `aleatorios`
+        textos; filas con 'lineas', 'caracteres', 'cascada_ms', 'tokens_ms'
+        y 'aceleracion' por volcado
+    """
+    rng = np.random.default_rng(semilla)
+    distintos = verificar(texto_aleatorio(rng) for _ in range(aleatorios))
+
+    filas = []
+    for n in lineas:
+        texto = volcado_ocr(rng, n)
+        if cascada_regex(texto) != puntos_de_texto(texto):
+            distintos.append((texto, cascada_regex(texto), puntos_de_texto(texto)))
+        cascada = _cronometrar(cascada_regex, texto, repeticiones)
+        tokens = _cronometrar(puntos_de_texto, texto, repeticiones)
+        filas.append({'lineas': n, 'caracteres': len(texto), 'cascada_ms': cascada,
+                      'tokens_ms': tokens, 'aceleracion': cascada / tokens if tokens else 0.0})
+    return distintos, filas
+
+def resumen_banco(distintos, filas):
+    """Texto con los tiempos por volcado y los textos que no coinciden"""
+    lineas = [f"{'líneas':>8} {'caracteres':>11} {'cascada ms':>11} {'tokens ms':>10} {'aceleración':>12}"]
+    for f in filas:
+        lineas.append(f"{f['lineas']:>8} {f['caracteres']:>11} {f['cascada_ms']:>11.2f} "
+                      f"{f['tokens_ms']:>10.2f} {f['aceleracion']:>11.1f}x")
+    lineas.append('')
+    lineas.append(f"Resultados distintos de la cascada: {len(distintos)}")
+    for texto, esperado, obtenido in distintos[:5]:
+        lineas.append(f"  {texto[:60]!r}: {esperado} != {obtenido}")
+    return '\n'.join(lineas)
+
+if __name__ == '__main__':
+    lineas = (int(sys.argv[1]),) if len(sys.argv) > 1 else (50, 500, 5000)
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    print(resumen_banco(*ejecutar_banco(lineas, repeticiones)))
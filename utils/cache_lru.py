@@ -0,0 +1,89 @@
+"""
+Caché LRU en memoria, segura para los hilos de Streamlit
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+def _tamano(valor):
+    """Bytes que ocupa un array o un bytes (0 para otros valores)"""
+    if isinstance(valor, np.ndarray):
+        return valor.nbytes
+    if isinstance(valor, (bytes, bytearray)):
+        return len(valor)
+    return 0
+
+class CacheLRU:
+    """
+    Diccionario acotado que descarta la entrada usada hace más tiempo
+
+    Con max_bytes también se acota la memoria de los arrays y bytes
+    guardados; un valor que solo ya supera el límite no se guarda.
+    """
+
+    def __init__(self, max_entradas=32, max_bytes=None):
+        self.max_entradas = max_entradas
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._datos = OrderedDict()
+        self._candado = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, defecto=None):
+        """Devuelve el valor guardado (y lo marca como reciente) o defecto"""
+        with self._candado:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave]
+            self.fallos += 1
+            return defecto
+
+    def guardar(self, clave, valor):
+        """Guarda un valor descartando el más antiguo si se supera el límite"""
+        tamano = _tamano(valor)
+        with self._candado:
+            if clave in self._datos:
+                self.bytes -= _tamano(self._datos.pop(clave))
+            if self.max_bytes is not None and tamano > self.max_bytes:
+                return
+            self._datos[clave] = valor
+            self.bytes += tamano
+            while len(self._datos) > self.max_entradas or (
+                    self.max_bytes is not None and self.bytes > self.max_bytes):
+                self.bytes -= _tamano(self._datos.popitem(last=False)[1])
+
+    def __contains__(self, clave):
+        with self._candado:
+            return clave in self._datos
+
+    def __len__(self):
+        return len(self._datos)
+
+    def limpiar(self):
+        """Elimina todas las entradas y reinicia las estadísticas"""
+        with self._candado:
+            self._datos.clear()
+            self.bytes = 0
+            self.aciertos = 0
+            self.fallos = 0
+
+def huella(*partes):
+    """
+    Calcula una clave estable (sha1) a partir de arrays, números o textos
+    """
+    h = hashlib.sha1()
+    for parte in partes:
+        if isinstance(parte, (bytes, bytearray, memoryview)):
+            h.update(parte)
+        elif isinstance(parte, str):
+            h.update(parte.encode('utf-8'))
+        else:
+            arr = np.ascontiguousarray(np.asarray(parte, dtype=float))
+            h.update(str(arr.shape).encode())
+            h.update(arr.tobytes())
+        h.update(b'|')
+    return h.hexdigest()
@@ -0,0 +1,156 @@
+"""
+Caché de resultados de OCR por contenido de la imagen
+
+La clave combina una huella de la imagen y de la configuración del
+pipeline. Los resultados se guardan en un LRU en memoria y, si se define
+MN_CACHE_OCR con la ruta de un archivo, también en SQLite para que
+sobrevivan a reinicios y se compartan entre procesos trabajadores.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils.cache_lru import CacheLRU, huella
+from utils.registro import obtener_registro
+
+log = obtener_registro(__name__)
+
+# Cambiar al modificar el pipeline de forma que los resultados viejos ya no valgan
+VERSION_CACHE = 1
+
+# Ruta del archivo SQLite (opcional) y uso de huella perceptual
+ARCHIVO_CACHE = os.environ.get('MN_CACHE_OCR')
+HUELLA_PERCEPTUAL = os.environ.get('MN_CACHE_OCR_PERCEPTUAL') == '1'
+
+_memoria = CacheLRU(max_entradas=256)
+_candado = threading.Lock()     # accesos al archivo SQLite
+_candado_estadisticas = threading.Lock()
+_estadisticas = {'memoria': 0, 'disco': 0, 'fallos': 0}
+
+# Campos del resultado del pipeline que se guardan (todos serializables a JSON)
+CAMPOS = ('x', 'y', 'motor', 'variante', 'confianza', 'numeros')
+
+def huella_perceptual(imagen):
+    """
+    dHash de 16x16: no cambia al recomprimir o reescalar la misma foto
+
+    Ojo: dos hojas con la misma plantilla y números distintos pueden dar
+    la misma huella, por eso solo se usa si MN_CACHE_OCR_PERCEPTUAL=1.
+    """
+    if isinstance(imagen, (bytes, bytearray)):
+        gris = cv2.imdecode(np.frombuffer(imagen, np.uint8), cv2.IMREAD_GRAYSCALE)
+    else:
+        gris = np.asarray(imagen.convert('L') if isinstance(imagen, Image.Image) else imagen)
+        if gris.ndim == 3:
+            gris = cv2.cvtColor(gris, cv2.COLOR_RGB2GRAY)
+    reducida = cv2.resize(gris, (17, 16), interpolation=cv2.INTER_AREA).astype(np.int16)
+    bits = (reducida[:, 1:] > reducida[:, :-1]).flatten()
+    return 'p' + np.packbits(bits).tobytes().hex()
+
+def huella_imagen(imagen):
+    """
+    Huella de la imagen: sha1 de los bytes del archivo (o de los píxeles)
+    """
+    if HUELLA_PERCEPTUAL:
+        return huella_perceptual(imagen)
+    if isinstance(imagen, (bytes, bytearray)):
+        return hashlib.sha1(imagen).hexdigest()
+    if isinstance(imagen, str):
+        with open(imagen, 'rb') as f:
+            return hashlib.sha1(f.read()).hexdigest()
+    if isinstance(imagen, Image.Image):
+        return huella(imagen.mode, str(imagen.size), imagen.tobytes())
+    arr = np.ascontiguousarray(imagen)
+    return huella(str(arr.dtype), str(arr.shape), arr.tobytes())
+
+def clave_ocr(imagen, config):
+    """
+    Clave de caché para una imagen y una configuración (dict) del pipeline
+    """
+    texto_config = repr(sorted(config.items()))
+    return huella(str(VERSION_CACHE), huella_imagen(imagen), texto_config)
+
+def _contar(campo):
+    """Suma una búsqueda a la estadística `campo`"""
+    with _candado_estadisticas:
+        _estadisticas[campo] += 1
+
+@contextmanager
+def _conexion():
+    """Conexión a la caché en disco (confirma al salir y se cierra siempre)"""
+    conexion = sqlite3.connect(ARCHIVO_CACHE, timeout=5)
+    try:
+        with conexion:
+            conexion.execute(
+                "CREATE TABLE IF NOT EXISTS ocr (clave TEXT PRIMARY KEY, resultado TEXT, creado REAL)"
+            )
+            yield conexion
+    finally:
+        conexion.close()
+
+def buscar(clave):
+    """
+    Devuelve el resultado guardado para la clave, o None
+    """
+    resultado = _memoria.obtener(clave)
+    if resultado is not None:
+        _contar('memoria')
+        return dict(resultado)
+
+    if ARCHIVO_CACHE:
+        try:
+            with _candado, _conexion() as conexion:
+                fila = conexion.execute("SELECT resultado FROM ocr WHERE clave = ?", (clave,)).fetchone()
+        except sqlite3.Error as e:
+            log.warning("Caché OCR en disco no disponible: %s", e)
+            fila = None
+        if fila is not None:
+            resultado = json.loads(fila[0])
+            _memoria.guardar(clave, resultado)
+            _contar('disco')
+            return dict(resultado)
+
+    _contar('fallos')
+    return None
+
+def guardar(clave, resultado):
+    """
+    Guarda los campos serializables de un resultado del pipeline
+    """
+    resultado = {campo: resultado.get(campo) for campo in CAMPOS}
+    _memoria.guardar(clave, resultado)
+
+    if ARCHIVO_CACHE:
+        try:
+            with _candado, _conexion() as conexion:
+                conexion.execute("INSERT OR REPLACE INTO ocr VALUES (?, ?, ?)",
+                                 (clave, json.dumps(resultado), time.time()))
+        except sqlite3.Error as e:
+            log.warning("No se pudo guardar en la caché OCR en disco: %s", e)
+
+def limpiar_cache(disco=False):
+    """
+    Vacía la caché en memoria (y la de disco si disco=True)
+    """
+    _memoria.limpiar()
+    with _candado_estadisticas:
+        for campo in _estadisticas:
+            _estadisticas[campo] = 0
+    if disco and ARCHIVO_CACHE:
+        with _candado, _conexion() as conexion:
+            conexion.execute("DELETE FROM ocr")
+
+def estadisticas_cache():
+    """
+    Aciertos en memoria y en disco, fallos y entradas en memoria
+    """
+    with _candado_estadisticas:
+        return dict(_estadisticas, entradas=len(_memoria))
@@ -0,0 +1,143 @@
+"""
+Importación diferida de dependencias pesadas y perfil de arranque
+
+Streamlit vuelve a ejecutar app.py en cada interacción y cada proceso
+trabajador arranca desde cero, así que lo que se importa al inicio se
+paga una y otra vez. Con modulo_diferido() el import real ocurre recién
+cuando se usa el primer atributo:
+
+    plt = modulo_diferido('matplotlib.pyplot')
+    ...
+    fig, ax = plt.subplots()   # aquí se importa matplotlib
+
+Uso del perfil (tiempo de importación por módulo, en un proceso limpio):
+    python -m utils.carga_diferida [modulo ...]
+"""
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+# Módulos que app.py y sus páginas cargan al arrancar (para el perfil por defecto)
+MODULOS_ARRANQUE = [
+    'streamlit', 'numpy', 'utils.trabajos', 'utils.lu_descomposicion',
+    'matplotlib.pyplot', 'utils.interpolacion_mejorada', 'utils.ocr_pipeline',
+]
+
+_candado = threading.Lock()
+_tiempos_carga = {}
+
+class ModuloDiferido:
+    """
+    Representa a un módulo que todavía no se importó
+
+    El primer acceso a un atributo lo importa (una sola vez) y anota
+    cuánto tardó; los siguientes van directo al módulo real.
+    """
+    __slots__ = ('_nombre', '_modulo')
+
+    def __init__(self, nombre):
+        object.__setattr__(self, '_nombre', nombre)
+        object.__setattr__(self, '_modulo', None)
+
+    def _cargar(self):
+        if self._modulo is None:
+            with _candado:
+                if self._modulo is None:
+                    ya_cargado = self._nombre in sys.modules
+                    inicio = time.perf_counter()
+                    modulo = importlib.import_module(self._nombre)
+                    if not ya_cargado:
+                        _tiempos_carga[self._nombre] = (time.perf_counter() - inicio) * 1000
+                    object.__setattr__(self, '_modulo', modulo)
+        return self._modulo
+
+    def __getattr__(self, atributo):
+        return getattr(self._cargar(), atributo)
+
+    def __repr__(self):
+        estado = 'cargado' if self._modulo is not None else 'sin cargar'
+        return f"<módulo diferido {self._nombre!r} ({estado})>"
+
+def modulo_diferido(nombre):
+    """
+    Devuelve el módulo si ya está importado o un ModuloDiferido si no
+    """
+    if nombre in sys.modules:
+        return sys.modules[nombre]
+    return ModuloDiferido(nombre)
+
+def tiempos_carga():
+    """
+    Milisegundos que tardó cada módulo diferido en importarse en este
+    proceso (solo los que ya se usaron)
+    """
+    with _candado:
+        return dict(_tiempos_carga)
+
+def perfil_importaciones(modulos=None, raiz=None):
+    """
+    Mide el tiempo de importación de cada módulo con `python -X importtime`
+    en un proceso nuevo (sin nada cargado de antemano)
+
+    Args:
+        modulos: módulos a importar (por defecto MODULOS_ARRANQUE)
+        raiz: carpeta desde la que se importa (por defecto, la del proyecto)
+
+    Returns:
+        lista de dicts {'modulo', 'propio_ms', 'acumulado_ms', 'nivel'}
+        en el orden en que terminaron de cargarse; nivel 0 son los
+        módulos pedidos. Un módulo que ya cargó otro anterior de la lista
+        no vuelve a aparecer (el costo queda en el primero que lo importó).
+    """
+    modulos = modulos or MODULOS_ARRANQUE
+    raiz = raiz or os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    codigo = '; '.join(f"import {m}" for m in modulos)
+    proceso = subprocess.run([sys.executable, '-X', 'importtime', '-c', codigo],
+                             cwd=raiz, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        ultima = proceso.stderr.strip().splitlines()[-1:] or ['']
+        raise ImportError(f"No se pudo importar {modulos}: {ultima[0]}")
+
+    filas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith('import time:') or 'self [us]' in linea:
+            continue
+        propio, acumulado, nombre = linea[len('import time:'):].split('|')
+        sangria = len(nombre) - len(nombre.lstrip())
+        filas.append({
+            'modulo': nombre.strip(),
+            'propio_ms': int(propio) / 1000,
+            'acumulado_ms': int(acumulado) / 1000,
+            'nivel': (sangria - 1) // 2,
+        })
+    minimo = min((f['nivel'] for f in filas), default=0)
+    for f in filas:
+        f['nivel'] -= minimo
+    return filas
+
+def resumen_perfil(filas, modulos=None, mas_costosos=15):
+    """
+    Texto con los módulos pedidos (tiempo acumulado) y los
+    `mas_costosos` por tiempo propio
+    """
+    modulos = modulos or MODULOS_ARRANQUE
+    encabezado = f"{'módulo':<45} {'propio ms':>10} {'acumulado ms':>13}"
+
+    def linea(f):
+        return f"{f['modulo']:<45} {f['propio_ms']:>10.1f} {f['acumulado_ms']:>13.1f}"
+
+    pedidos = [f for f in filas if f['nivel'] == 0 and f['modulo'] in modulos]
+    costosos = sorted(filas, key=lambda f: f['propio_ms'], reverse=True)[:mas_costosos]
+    total = sum(f['acumulado_ms'] for f in pedidos)
+
+    lineas = [encabezado] + [linea(f) for f in pedidos]
+    lineas.append(f"{'TOTAL':<45} {'':>10} {total:>13.1f}")
+    lineas += ['', "Más costosos por tiempo propio:", encabezado] + [linea(f) for f in costosos]
+    return '\n'.join(lineas)
+
+if __name__ == '__main__':
+    modulos = sys.argv[1:] or MODULOS_ARRANQUE
+    print(resumen_perfil(perfil_importaciones(modulos), modulos))
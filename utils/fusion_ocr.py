@@ -0,0 +1,96 @@
+"""
+Fusión de lecturas de OCR por votación ponderada por confianza
+
+Cada variante preprocesada (y cada motor con posiciones) da una lectura
+de la misma imagen. Las detecciones de todas las lecturas se alinean por
+posición en celdas y en cada celda gana el valor con más confianza
+sumada; así un dígito mal leído en una variante lo corrigen las demás.
+Las lecturas sin posiciones (Tesseract con image_to_string) no se pueden
+alinear y se ignoran.
+"""
+import numpy as np
+
+# Acuerdo a partir del cual el pipeline deja de leer variantes
+ACUERDO_SALIDA = 0.8
+
+# Fracción de lecturas en que tiene que aparecer una celda para conservarla
+SOPORTE_MINIMO = 0.34
+
+def _con_posicion(numeros):
+    return any(n['x'] or n['y'] for n in numeros)
+
+def alinear_celdas(lecturas, radio=None):
+    """
+    Agrupa las detecciones de varias lecturas en celdas por posición
+
+    Se recorre de mayor a menor confianza; cada detección va a la celda
+    más cercana que todavía no tiene una detección de su misma lectura,
+    si está a menos de `radio` en y y de medio ancho en x.
+
+    Args:
+        lecturas: listas de dicts {'val', 'x', 'y', 'conf'} (y 'h', 'w')
+        radio: tolerancia en y en píxeles (por defecto 0.6 del alto
+            mediano de los caracteres, o 20)
+
+    Returns:
+        lista de celdas {'x', 'y', 'w', 'lecturas': set, 'votos': {val: [peso, detecciones]}}
+    """
+    todas = [(k, n) for k, numeros in enumerate(lecturas) for n in numeros]
+    if radio is None:
+        altos = [n.get('h', 0) for _, n in todas if n.get('h', 0) > 0]
+        radio = 0.6 * float(np.median(altos)) if altos else 20
+
+    celdas = []
+    for k, n in sorted(todas, key=lambda kn: -kn[1]['conf']):
+        elegida, distancia = None, None
+        for celda in celdas:
+            if k in celda['lecturas']:
+                continue
+            dx, dy = abs(celda['x'] - n['x']), abs(celda['y'] - n['y'])
+            if dy > radio or dx > max(radio, celda['w'] / 2, n.get('w', 0) / 2):
+                continue
+            if distancia is None or dx + dy < distancia:
+                elegida, distancia = celda, dx + dy
+        if elegida is None:
+            elegida = {'x': n['x'], 'y': n['y'], 'w': n.get('w', 0), 'lecturas': set(), 'votos': {}}
+            celdas.append(elegida)
+        elegida['lecturas'].add(k)
+        voto = elegida['votos'].setdefault(n['val'], [0.0, []])
+        voto[0] += max(n['conf'], 0.01)
+        voto[1].append(n)
+    return celdas
+
+def fusionar(lecturas, radio=None, soporte_minimo=SOPORTE_MINIMO):
+    """
+    Une varias lecturas de la misma imagen votando cada celda
+
+    Returns:
+        (numeros, acuerdo): numeros con el valor ganador de cada celda
+        (posición media de sus detecciones, conf = peso ganador / número
+        de lecturas); acuerdo, entre 0 y 1, es la media por celda de la
+        fracción del peso que se llevó el ganador por la fracción de
+        lecturas que vieron la celda
+    """
+    lecturas = [numeros for numeros in lecturas if numeros and _con_posicion(numeros)]
+    if not lecturas:
+        return [], 0.0
+
+    total = len(lecturas)
+    numeros, acuerdos = [], []
+    for celda in alinear_celdas(lecturas, radio):
+        vistas = len(celda['lecturas'])
+        if vistas / total < soporte_minimo:
+            continue
+        valor, (peso, detecciones) = max(celda['votos'].items(), key=lambda par: par[1][0])
+        peso_celda = sum(p for p, _ in celda['votos'].values())
+        confs = np.array([max(d['conf'], 0.01) for d in detecciones])
+        numeros.append({
+            'val': valor,
+            'x': float(np.average([d['x'] for d in detecciones], weights=confs)),
+            'y': float(np.average([d['y'] for d in detecciones], weights=confs)),
+            'conf': min(1.0, peso / total),
+            'h': float(np.median([d.get('h', 0) for d in detecciones])),
+            'w': float(np.median([d.get('w', 0) for d in detecciones])),
+        })
+        acuerdos.append(peso / peso_celda * vistas / total)
+    return numeros, float(np.mean(acuerdos)) if acuerdos else 0.0
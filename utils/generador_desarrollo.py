@@ -3,397 +3,650 @@ Módulo para generar desarrollo completo de ejercicios de interpolación
 Similar al formato de libros de texto
 """
 import numpy as np
-import pandas as pd
-import sympy as sp
 import matplotlib.pyplot as plt
+import io
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from PIL import Image
+from string import Template
+from utils.interpolacion_newton import terminos_expandidos, coeficientes_expandidos, evaluar_newton
+from utils.cache_lru import CacheLRU, huella
+from utils.instrumentacion import medir
 
-def generar_desarrollo_completo(x_datos, y_datos, tabla_dd, polinomio, detalles):
+# --- Plantillas del desarrollo (se compilan una sola vez al importar) ---
+
+_SEP = "=" * 80
+_SUB = "-" * 80
+
+PLANTILLAS = {
+    'txt': {
+        'titulo': Template(_SEP + "\n$titulo\n$subtitulo\n" + _SEP + "\n\n"),
+        'seccion': Template(_SEP + "\n$icono $titulo\n" + _SEP + "\n\n"),
+        'subseccion': Template("$icono $titulo\n" + _SUB + "\n\n"),
+        'texto': Template("$texto\n"),
+        'item': Template("  $texto\n"),
+        'formula': Template("$txt\n"),
+        'vacio': Template("\n"),
+        'tabla_inicio': Template("$encabezado\n$regla\n"),
+        'tabla_fila': Template("$fila\n"),
+        'tabla_fin': Template("\n"),
+        'fin': Template(_SEP + "\n"),
+    },
+    'md': {
+        'titulo': Template("# $titulo\n\n*$subtitulo*\n\n"),
+        'seccion': Template("## $icono $titulo\n\n"),
+        'subseccion': Template("### $icono $titulo\n\n"),
+        'texto': Template("$texto\n\n"),
+        'item': Template("- $texto\n"),
+        'formula': Template("$$$$ $latex $$$$\n"),
+        'vacio': Template("\n"),
+        'tabla_inicio': Template("| $encabezado |\n|$regla\n"),
+        'tabla_fila': Template("| $fila |\n"),
+        'tabla_fin': Template("\n"),
+        'fin': Template("---\n"),
+    },
+    'latex': {
+        'titulo': Template("\\documentclass{article}\n\\usepackage[utf8]{inputenc}\n"
+                           "\\usepackage{amsmath}\n\\usepackage{longtable}\n"
+                           "\\begin{document}\n\\section*{$titulo}\n\\textit{$subtitulo}\n\n"),
+        'seccion': Template("\\subsection*{$titulo}\n\n"),
+        'subseccion': Template("\\subsubsection*{$titulo}\n\n"),
+        'texto': Template("$texto\\\\\n"),
+        'item': Template("\\hspace*{1em}$texto\\\\\n"),
+        'formula': Template("\\[ $latex \\]\n"),
+        'vacio': Template("\n"),
+        'tabla_inicio': Template("\\begin{longtable}{$regla}\n$encabezado \\\\\n\\hline\n"),
+        'tabla_fila': Template("$fila \\\\\n"),
+        'tabla_fin': Template("\\end{longtable}\n\n"),
+        'fin': Template("\\end{document}\n"),
+    },
+}
+
+_ESCAPES_LATEX = str.maketrans({
+    '\\': r'\textbackslash{}', '&': r'\&', '%': r'\%', '$': r'\$',
+    '#': r'\#', '_': r'\_', '{': r'\{', '}': r'\}', '~': r'\~{}', '^': r'\^{}',
+    '×': r'$\times$', '•': r'\textbullet{}'
+})
+
+def formatear_polinomio(coeficientes, formato='txt', tolerancia=1e-12):
     """
-    Genera un desarrollo completo del ejercicio en formato texto
+    Escribe un polinomio (coeficientes en potencias crecientes) como texto
+
+    Args:
+        coeficientes: array con coeficientes[k] acompañando a x**k
+        formato: 'txt' (estilo Python) o 'latex'
+    """
+    escala = max(np.max(np.abs(coeficientes)), 1.0) if len(coeficientes) else 1.0
+    partes = []
+    for k in range(len(coeficientes) - 1, -1, -1):
+        c = coeficientes[k]
+        if abs(c) <= tolerancia * escala:
+            continue
+        signo = '-' if c < 0 else '+'
+        valor = f"{abs(c):.10g}"
+        if k == 0:
+            termino = valor
+        elif formato == 'latex':
+            potencia = "x" if k == 1 else f"x^{{{k}}}"
+            termino = potencia if valor == '1' else f"{valor} {potencia}"
+        else:
+            potencia = "x" if k == 1 else f"x**{k}"
+            termino = potencia if valor == '1' else f"{valor}*{potencia}"
+        partes.append((signo, termino))
+
+    if not partes:
+        return "0"
+
+    signo, termino = partes[0]
+    texto = ("-" if signo == '-' else "") + termino
+    for signo, termino in partes[1:]:
+        texto += f" {signo} {termino}"
+    return texto
+
+def _producto_nodos(x_datos, i):
+    """Escribe (x - x0)(x - x1)...(x - x_{i-1}) con los valores numéricos"""
+    return "".join(f"(x - {x_datos[j]:.6f})" for j in range(i))
+
+def _eventos_desarrollo(x_datos, y_datos, tabla_dd):
+    """
+    Describe el desarrollo como una secuencia de eventos independientes
+    del formato de salida. Todo se calcula numéricamente (sin SymPy).
     """
-    desarrollo = []
-    
-    # Encabezado
-    desarrollo.append("=" * 80)
-    desarrollo.append("POLINOMIO INTERPOLANTE DE NEWTON")
-    desarrollo.append("Desarrollo Completo del Ejercicio")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    
-    # Datos del problema
-    desarrollo.append("📊 DATOS DEL PROBLEMA")
-    desarrollo.append("-" * 80)
-    desarrollo.append("")
-    desarrollo.append(f"Número de puntos: {len(x_datos)}")
-    desarrollo.append(f"Grado del polinomio: {len(x_datos) - 1}")
-    desarrollo.append("")
-    
-    # Tabla de datos
-    desarrollo.append("Tabla de datos:")
-    desarrollo.append("")
-    for i, (x, y) in enumerate(zip(x_datos, y_datos)):
-        desarrollo.append(f"  x{i} = {x:>10.6f}    f(x{i}) = {y:>10.6f}")
-    desarrollo.append("")
-    
-    # Objetivo
-    desarrollo.append("Objetivo: Obtener una aproximación de f(2.1) usando los datos dados.")
-    desarrollo.append("Usar polinomios interpolantes de Newton de grado uno, dos y tres más.")
-    desarrollo.append("")
-    
-    # Tabla de diferencias divididas
-    desarrollo.append("=" * 80)
-    desarrollo.append("📋 TABLA DE DIFERENCIAS DIVIDIDAS")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    
     n = len(x_datos)
-    
-    # Encabezados
-    header = "i    xi         f(xi)      "
-    for j in range(1, n):
-        header += f"f[x{j-1}...x{j}]".ljust(15)
-    desarrollo.append(header)
-    desarrollo.append("-" * len(header))
-    
-    # Filas de la tabla
+    coeficientes = np.array(tabla_dd[0, :], dtype=float)
+    x_datos = np.asarray(x_datos, dtype=float)
+    y_datos = np.asarray(y_datos, dtype=float)
+
+    yield ('titulo', "POLINOMIO INTERPOLANTE DE NEWTON", "Desarrollo Completo del Ejercicio")
+
+    # Datos del problema
+    yield ('subseccion', "📊", "DATOS DEL PROBLEMA")
+    yield ('texto', f"Número de puntos: {n}")
+    yield ('texto', f"Grado del polinomio: {n - 1}")
+    yield ('vacio',)
+    yield ('texto', "Tabla de datos:")
+    yield ('vacio',)
     for i in range(n):
-        fila = f"{i}    {x_datos[i]:<10.6f} {tabla_dd[i, 0]:<10.6f} "
-        for j in range(1, n):
-            if i + j < n:
-                valor = tabla_dd[i, j]
-                fila += f"{valor:<15.6f}"
-            else:
-                fila += " " * 15
-        desarrollo.append(fila)
-    desarrollo.append("")
-    
-    # Coeficientes
-    desarrollo.append("Coeficientes del polinomio de Newton:")
-    coeficientes = tabla_dd[0, :]
+        yield ('item', f"x{i} = {x_datos[i]:>10.6f}    f(x{i}) = {y_datos[i]:>10.6f}")
+    yield ('vacio',)
+    yield ('texto', "Objetivo: Obtener una aproximación de f(2.1) usando los datos dados.")
+    yield ('texto', "Usar polinomios interpolantes de Newton de grado uno, dos y tres más.")
+    yield ('vacio',)
+
+    # Tabla de diferencias divididas (las filas se generan bajo demanda)
+    yield ('seccion', "📋", "TABLA DE DIFERENCIAS DIVIDIDAS")
+    encabezados = ["i", "xi", "f(xi)"] + [f"f[x{j-1}...x{j}]" for j in range(1, n)]
+
+    def filas():
+        for i in range(n):
+            fila = [str(i), f"{x_datos[i]:.6f}"]
+            fila += [f"{valor:.6f}" for valor in tabla_dd[i, :n-i]] + [""] * i
+            yield fila
+
+    yield ('tabla', encabezados, filas())
+
+    yield ('texto', "Coeficientes del polinomio de Newton:")
     for i, coef in enumerate(coeficientes):
-        desarrollo.append(f"  a{i} = {coef:.10f}")
-    desarrollo.append("")
-    
+        yield ('item', f"a{i} = {coef:.10f}")
+    yield ('vacio',)
+
     # Fórmula general
-    desarrollo.append("=" * 80)
-    desarrollo.append("📐 FÓRMULA GENERAL DEL POLINOMIO DE NEWTON")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    desarrollo.append("Pn(x) = f[x0] + f[x0,x1](x-x0) + f[x0,x1,x2](x-x0)(x-x1) + ...")
-    desarrollo.append("        + f[x0,x1,...,xn](x-x0)(x-x1)...(x-xn-1)")
-    desarrollo.append("")
-    
-    # Construcción paso a paso
-    desarrollo.append("=" * 80)
-    desarrollo.append("🔨 CONSTRUCCIÓN PASO A PASO")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    
-    # P0(x)
-    desarrollo.append(f"Paso 0: Polinomio de grado 0")
-    desarrollo.append(f"  P0(x) = {coeficientes[0]:.10f}")
-    desarrollo.append("")
-    
-    # Construcción incremental
-    polinomio_actual = f"{coeficientes[0]:.6f}"
-    
-    for i in range(1, min(len(coeficientes), len(x_datos))):
-        desarrollo.append(f"Paso {i}: Polinomio de grado {i}")
-        
-        # Construir el término
-        termino_producto = ""
-        for j in range(i):
-            if j == 0:
-                termino_producto = f"(x - {x_datos[j]:.6f})"
-            else:
-                termino_producto += f"(x - {x_datos[j]:.6f})"
-        
-        desarrollo.append(f"  Término a agregar: {coeficientes[i]:.10f} × {termino_producto}")
-        
-        # Expandir el término
-        x = sp.Symbol('x')
-        termino_sym = coeficientes[i]
-        for j in range(i):
-            termino_sym *= (x - x_datos[j])
-        termino_expandido = sp.expand(termino_sym)
-        
-        desarrollo.append(f"  Expandido: {termino_expandido}")
-        desarrollo.append(f"  P{i}(x) = P{i-1}(x) + {termino_expandido}")
-        desarrollo.append("")
-    
+    yield ('seccion', "📐", "FÓRMULA GENERAL DEL POLINOMIO DE NEWTON")
+    yield ('formula',
+           "Pn(x) = f[x0] + f[x0,x1](x-x0) + f[x0,x1,x2](x-x0)(x-x1) + ...\n"
+           "        + f[x0,x1,...,xn](x-x0)(x-x1)...(x-xn-1)",
+           r"P_n(x) = f[x_0] + f[x_0,x_1](x-x_0) + \cdots + f[x_0,\ldots,x_n]\prod_{j=0}^{n-1}(x-x_j)")
+    yield ('vacio',)
+
+    # Construcción paso a paso con los términos expandidos numéricamente
+    yield ('seccion', "🔨", "CONSTRUCCIÓN PASO A PASO")
+    yield ('texto', "Paso 0: Polinomio de grado 0")
+    yield ('formula', f"  P0(x) = {coeficientes[0]:.10f}", f"P_0(x) = {coeficientes[0]:.10g}")
+    yield ('vacio',)
+
+    for i, termino in terminos_expandidos(x_datos, coeficientes):
+        if i == 0:
+            continue
+        expandido = formatear_polinomio(termino)
+        yield ('texto', f"Paso {i}: Polinomio de grado {i}")
+        yield ('item', f"Término a agregar: {coeficientes[i]:.10f} × {_producto_nodos(x_datos, i)}")
+        yield ('item', f"Expandido: {expandido}")
+        yield ('formula', f"  P{i}(x) = P{i-1}(x) + {expandido}",
+               f"P_{{{i}}}(x) = P_{{{i-1}}}(x) + {formatear_polinomio(termino, 'latex')}")
+        yield ('vacio',)
+
     # Polinomio final
-    desarrollo.append("=" * 80)
-    desarrollo.append("🎯 POLINOMIO FINAL")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    
-    polinomio_expandido = sp.expand(polinomio)
-    desarrollo.append("Forma expandida:")
-    desarrollo.append(f"  P(x) = {polinomio_expandido}")
-    desarrollo.append("")
-    
-    polinomio_simplificado = sp.simplify(polinomio_expandido)
-    desarrollo.append("Forma simplificada:")
-    desarrollo.append(f"  P(x) = {polinomio_simplificado}")
-    desarrollo.append("")
-    
-    # Evaluaciones
-    desarrollo.append("=" * 80)
-    desarrollo.append("🔍 EVALUACIONES Y RESULTADOS")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    
-    # Evaluar en diferentes grados
-    from utils.interpolacion_newton import evaluar_polinomio
-    
-    desarrollo.append("Evaluación en x = 2.1 con diferentes grados:")
-    desarrollo.append("")
-    
-    for grado in range(1, min(4, len(x_datos))):
-        # Construir polinomio de ese grado
-        x_temp = x_datos[:grado+1]
-        y_temp = y_datos[:grado+1]
-        
-        from utils.interpolacion_newton import interpolacion_newton
-        poli_temp, _, _ = interpolacion_newton(x_temp, y_temp)
-        
-        resultado = evaluar_polinomio(poli_temp, 2.1)
-        desarrollo.append(f"  P{grado}(2.1) = {resultado:.10f}")
-    
-    desarrollo.append("")
-    
-    # Evaluación final
-    resultado_final = evaluar_polinomio(polinomio, 2.1)
-    desarrollo.append(f"Resultado final con polinomio completo:")
-    desarrollo.append(f"  P{len(x_datos)-1}(2.1) = {resultado_final:.10f}")
-    desarrollo.append("")
-    
-    # Verificación en puntos originales
-    desarrollo.append("=" * 80)
-    desarrollo.append("✅ VERIFICACIÓN EN PUNTOS ORIGINALES")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    
-    desarrollo.append("El polinomio debe pasar exactamente por todos los puntos dados:")
-    desarrollo.append("")
-    
-    for i, (x, y) in enumerate(zip(x_datos, y_datos)):
-        y_calc = evaluar_polinomio(polinomio, x)
-        error = abs(y - y_calc)
-        desarrollo.append(f"  P({x:.6f}) = {y_calc:.10f}  (esperado: {y:.6f}, error: {error:.2e})")
-    
-    desarrollo.append("")
-    
+    expandidos = coeficientes_expandidos(x_datos, coeficientes)
+    yield ('seccion', "🎯", "POLINOMIO FINAL")
+    yield ('texto', "Forma expandida:")
+    yield ('formula', f"  P(x) = {formatear_polinomio(expandidos)}",
+           f"P(x) = {formatear_polinomio(expandidos, 'latex')}")
+    yield ('vacio',)
+
+    # Evaluaciones (el polinomio de grado g usa los primeros g+1 coeficientes)
+    yield ('seccion', "🔍", "EVALUACIONES Y RESULTADOS")
+    yield ('texto', "Evaluación en x = 2.1 con diferentes grados:")
+    yield ('vacio',)
+    for grado in range(1, min(4, n)):
+        resultado = evaluar_newton(x_datos, coeficientes[:grado+1], 2.1)
+        yield ('item', f"P{grado}(2.1) = {resultado:.10f}")
+    yield ('vacio',)
+
+    resultado_final = evaluar_newton(x_datos, coeficientes, 2.1)
+    yield ('texto', "Resultado final con polinomio completo:")
+    yield ('item', f"P{n-1}(2.1) = {resultado_final:.10f}")
+    yield ('vacio',)
+
+    # Verificación en puntos originales (evaluación vectorizada)
+    yield ('seccion', "✅", "VERIFICACIÓN EN PUNTOS ORIGINALES")
+    yield ('texto', "El polinomio debe pasar exactamente por todos los puntos dados:")
+    yield ('vacio',)
+    y_calc = evaluar_newton(x_datos, coeficientes, x_datos)
+    errores = np.abs(y_datos - y_calc)
+    for x, y, yc, error in zip(x_datos, y_datos, y_calc, errores):
+        yield ('item', f"P({x:.6f}) = {yc:.10f}  (esperado: {y:.6f}, error: {error:.2e})")
+    yield ('vacio',)
+
     # Conclusión
-    desarrollo.append("=" * 80)
-    desarrollo.append("📝 CONCLUSIÓN")
-    desarrollo.append("=" * 80)
-    desarrollo.append("")
-    desarrollo.append(f"Se ha construido exitosamente el polinomio interpolante de Newton")
-    desarrollo.append(f"de grado {len(x_datos)-1} que pasa por los {len(x_datos)} puntos dados.")
-    desarrollo.append("")
-    desarrollo.append(f"El polinomio puede usarse para:")
-    desarrollo.append(f"  • Interpolar valores dentro del rango [{min(x_datos):.2f}, {max(x_datos):.2f}]")
-    desarrollo.append(f"  • Aproximar la función original en puntos intermedios")
-    desarrollo.append(f"  • Estimar derivadas e integrales numéricamente")
-    desarrollo.append("")
-    desarrollo.append("=" * 80)
-    
-    return "\n".join(desarrollo)
-
-def generar_tabla_html(x_datos, y_datos, tabla_dd):
+    yield ('seccion', "📝", "CONCLUSIÓN")
+    yield ('texto', "Se ha construido exitosamente el polinomio interpolante de Newton")
+    yield ('texto', f"de grado {n-1} que pasa por los {n} puntos dados.")
+    yield ('vacio',)
+    yield ('texto', "El polinomio puede usarse para:")
+    yield ('item', f"• Interpolar valores dentro del rango [{min(x_datos):.2f}, {max(x_datos):.2f}]")
+    yield ('item', "• Aproximar la función original en puntos intermedios")
+    yield ('item', "• Estimar derivadas e integrales numéricamente")
+    yield ('vacio',)
+    yield ('fin',)
+
+def _renderizar_tabla(plantillas, formato, encabezados, filas):
+    """Convierte una tabla en texto fila por fila"""
+    if formato == 'txt':
+        anchos = [5, 11, 11] + [15] * (len(encabezados) - 3)
+        encabezado = "".join(e.ljust(a) for e, a in zip(encabezados, anchos))
+        yield plantillas['tabla_inicio'].substitute(encabezado=encabezado, regla="-" * len(encabezado))
+        for fila in filas:
+            texto = "".join(c.ljust(a) for c, a in zip(fila, anchos))
+            yield plantillas['tabla_fila'].substitute(fila=texto)
+    elif formato == 'md':
+        yield plantillas['tabla_inicio'].substitute(
+            encabezado=" | ".join(encabezados), regla="---|" * len(encabezados))
+        for fila in filas:
+            yield plantillas['tabla_fila'].substitute(fila=" | ".join(fila))
+    else:
+        encabezado = " & ".join(e.translate(_ESCAPES_LATEX) for e in encabezados)
+        yield plantillas['tabla_inicio'].substitute(encabezado=encabezado, regla="r" * len(encabezados))
+        for fila in filas:
+            yield plantillas['tabla_fila'].substitute(fila=" & ".join(fila))
+    yield plantillas['tabla_fin'].substitute()
+
+def iterar_desarrollo(x_datos, y_datos, tabla_dd, formato='txt'):
     """
-    Genera una tabla HTML con el formato del libro
+    Genera el desarrollo completo por fragmentos de texto
+
+    Args:
+        formato: 'txt', 'md' (Markdown) o 'latex'
+
+    Yields:
+        str: fragmentos del documento en orden
+    """
+    if formato not in PLANTILLAS:
+        raise ValueError(f"Formato no soportado: {formato}")
+
+    plantillas = PLANTILLAS[formato]
+    escapar = (lambda t: t.translate(_ESCAPES_LATEX)) if formato == 'latex' else (lambda t: t)
+
+    for evento in _eventos_desarrollo(x_datos, y_datos, tabla_dd):
+        tipo = evento[0]
+        if tipo == 'titulo':
+            yield plantillas['titulo'].substitute(titulo=escapar(evento[1]), subtitulo=escapar(evento[2]))
+        elif tipo in ('seccion', 'subseccion'):
+            yield plantillas[tipo].substitute(icono=evento[1], titulo=escapar(evento[2]))
+        elif tipo in ('texto', 'item'):
+            yield plantillas[tipo].substitute(texto=escapar(evento[1]))
+        elif tipo == 'formula':
+            yield plantillas['formula'].substitute(txt=evento[1], latex=evento[2])
+        elif tipo == 'tabla':
+            yield from _renderizar_tabla(plantillas, formato, evento[1], evento[2])
+        else:
+            yield plantillas[tipo].substitute()
+
+def escribir_desarrollo(destino, x_datos, y_datos, tabla_dd, formato='txt'):
+    """
+    Escribe el desarrollo directamente en un archivo o flujo de texto,
+    sin construir el documento completo en memoria (útil para tablas grandes)
+
+    Args:
+        destino: ruta o objeto con método write()
+
+    Returns:
+        int: número de caracteres escritos
+    """
+    if isinstance(destino, str):
+        with open(destino, 'w', encoding='utf-8') as archivo:
+            return escribir_desarrollo(archivo, x_datos, y_datos, tabla_dd, formato)
+
+    total = 0
+    for fragmento in iterar_desarrollo(x_datos, y_datos, tabla_dd, formato):
+        total += destino.write(fragmento)
+    return total
+
+def generar_desarrollo_completo(x_datos, y_datos, tabla_dd, polinomio=None, detalles=None, formato='txt'):
+    """
+    Genera un desarrollo completo del ejercicio en formato texto
+
+    Los argumentos polinomio y detalles se aceptan por compatibilidad; los
+    coeficientes expandidos se calculan numéricamente a partir de tabla_dd.
+    """
+    return "".join(iterar_desarrollo(x_datos, y_datos, tabla_dd, formato))
+
+_ESTILO_CELDA = 'border: 1px solid black; padding: 8px;'
+
+def _rango_ventana(n, inicio, cantidad, minimo=0):
+    """
+    Acota una ventana [inicio, inicio+cantidad) al rango [minimo, n); si
+    no cabe ninguna posición la ventana queda vacía
+    """
+    inicio = max(minimo, min(int(inicio), n - 1))
+    fin = n if cantidad is None else min(n, inicio + int(cantidad))
+    return inicio, max(inicio, fin)
+
+def iterar_tabla_html(x_datos, y_datos, tabla_dd, fila_inicio=0, num_filas=None,
+                      col_inicio=1, num_cols=None):
+    """
+    Genera la tabla HTML por fragmentos, una fila a la vez
+
+    Solo se recorren las celdas del triángulo válido (i + j < n); con
+    fila_inicio/num_filas y col_inicio/num_cols se obtiene una ventana
+    de la tabla en lugar de la tabla completa.
     """
     n = len(x_datos)
-    
-    html = '<div style="font-family: monospace; background: white; padding: 20px; color: black;">'
-    html += '<h3 style="text-align: center;">TABLA DE DIFERENCIAS DIVIDIDAS</h3>'
-    html += '<table style="border-collapse: collapse; margin: 20px auto; border: 2px solid black;">'
-    
+    f0, f1 = _rango_ventana(n, fila_inicio, num_filas)
+    c0, c1 = _rango_ventana(n, col_inicio, num_cols, minimo=1)
+
+    yield '<div style="font-family: monospace; background: white; padding: 20px; color: black;">'
+    yield '<h3 style="text-align: center;">TABLA DE DIFERENCIAS DIVIDIDAS</h3>'
+    yield '<table style="border-collapse: collapse; margin: 20px auto; border: 2px solid black;">'
+
     # Encabezado
-    html += '<tr style="background: #4CAF50; color: white;">'
-    html += '<th style="border: 1px solid black; padding: 8px;">i</th>'
-    html += '<th style="border: 1px solid black; padding: 8px;">xi</th>'
-    html += '<th style="border: 1px solid black; padding: 8px;">f(xi)</th>'
-    
-    for j in range(1, n):
-        html += f'<th style="border: 1px solid black; padding: 8px;">f[x<sub>i</sub>,...,x<sub>i+{j}</sub>]</th>'
-    
-    html += '</tr>'
-    
+    encabezado = '<tr style="background: #4CAF50; color: white;">'
+    for titulo in ('i', 'xi', 'f(xi)'):
+        encabezado += f'<th style="{_ESTILO_CELDA}">{titulo}</th>'
+    for j in range(c0, c1):
+        encabezado += f'<th style="{_ESTILO_CELDA}">f[x<sub>i</sub>,...,x<sub>i+{j}</sub>]</th>'
+    yield encabezado + '</tr>'
+
     # Filas
-    for i in range(n):
-        html += '<tr>'
-        html += f'<td style="border: 1px solid black; padding: 8px; text-align: center;">{i}</td>'
-        html += f'<td style="border: 1px solid black; padding: 8px; text-align: right;">{x_datos[i]:.6f}</td>'
-        html += f'<td style="border: 1px solid black; padding: 8px; text-align: right;">{tabla_dd[i, 0]:.6f}</td>'
-        
-        for j in range(1, n):
-            if i + j < n:
-                valor = tabla_dd[i, j]
-                html += f'<td style="border: 1px solid black; padding: 8px; text-align: right;">{valor:.6f}</td>'
-            else:
-                html += '<td style="border: 1px solid black; padding: 8px;"></td>'
-        
-        html += '</tr>'
-    
-    html += '</table>'
-    html += '</div>'
-    
-    return html
-
-def generar_desarrollo_visual(x_datos, y_datos, tabla_dd, polinomio):
+    vacia = f'<td style="{_ESTILO_CELDA}"></td>'
+    for i in range(f0, f1):
+        fila = '<tr>'
+        fila += f'<td style="{_ESTILO_CELDA} text-align: center;">{i}</td>'
+        fila += f'<td style="{_ESTILO_CELDA} text-align: right;">{x_datos[i]:.6f}</td>'
+        fila += f'<td style="{_ESTILO_CELDA} text-align: right;">{tabla_dd[i, 0]:.6f}</td>'
+
+        ultima = min(c1, n - i)
+        if ultima > c0:
+            for valor in tabla_dd[i, c0:ultima]:
+                fila += f'<td style="{_ESTILO_CELDA} text-align: right;">{valor:.6f}</td>'
+        fila += vacia * (c1 - max(ultima, c0))
+        yield fila + '</tr>'
+
+    yield '</table>'
+    yield '</div>'
+
+def generar_tabla_html(x_datos, y_datos, tabla_dd, fila_inicio=0, num_filas=None,
+                       col_inicio=1, num_cols=None):
     """
-    Genera visualización del desarrollo completo
+    Genera una tabla HTML con el formato del libro
+    """
+    return "".join(iterar_tabla_html(x_datos, y_datos, tabla_dd, fila_inicio, num_filas,
+                                     col_inicio, num_cols))
+
+def iterar_tabla_csv(x_datos, tabla_dd, separador=','):
+    """
+    Genera la tabla de diferencias divididas como CSV, línea por línea
+    (las celdas fuera del triángulo válido quedan vacías)
     """
-    from utils.interpolacion_newton import evaluar_polinomio
-    
-    fig = plt.figure(figsize=(16, 20))
-    
-    # 1. Tabla de datos
-    ax1 = plt.subplot(5, 2, 1)
-    ax1.axis('tight')
-    ax1.axis('off')
-    
-    datos_tabla = []
-    datos_tabla.append(['i', 'xi', 'f(xi)'])
-    for i, (x, y) in enumerate(zip(x_datos, y_datos)):
-        datos_tabla.append([str(i), f'{x:.6f}', f'{y:.6f}'])
-    
-    tabla1 = ax1.table(cellText=datos_tabla, cellLoc='center', loc='center',
-                       colWidths=[0.2, 0.4, 0.4])
-    tabla1.auto_set_font_size(False)
-    tabla1.set_fontsize(10)
-    tabla1.scale(1, 2)
-    
-    # Colorear encabezado
-    for i in range(3):
-        tabla1[(0, i)].set_facecolor('#4CAF50')
-        tabla1[(0, i)].set_text_props(weight='bold', color='white')
-    
-    ax1.set_title('Datos del Problema', fontsize=14, fontweight='bold', pad=20)
-    
-    # 2. Gráfica de puntos
-    ax2 = plt.subplot(5, 2, 2)
-    ax2.plot(x_datos, y_datos, 'ro', markersize=10, label='Puntos dados')
-    ax2.grid(True, alpha=0.3)
-    ax2.set_xlabel('X', fontweight='bold')
-    ax2.set_ylabel('Y', fontweight='bold')
-    ax2.set_title('Puntos de Interpolación', fontsize=14, fontweight='bold')
-    ax2.legend()
-    
-    # 3. Tabla de diferencias divididas (simplificada)
-    ax3 = plt.subplot(5, 2, (3, 4))
-    ax3.axis('tight')
-    ax3.axis('off')
-    
     n = len(x_datos)
-    dd_tabla = []
-    header = ['i', 'xi', 'f[xi]']
-    for j in range(1, min(4, n)):
-        header.append(f'DD{j}')
-    dd_tabla.append(header)
-    
+    yield separador.join(['i', 'x', 'f(x)'] + [f'DD{j}' for j in range(1, n)]) + '\n'
     for i in range(n):
-        fila = [str(i), f'{x_datos[i]:.4f}', f'{tabla_dd[i, 0]:.6f}']
-        for j in range(1, min(4, n)):
-            if i + j < n:
-                fila.append(f'{tabla_dd[i, j]:.6f}')
-            else:
-                fila.append('')
-        dd_tabla.append(fila)
-    
-    tabla3 = ax3.table(cellText=dd_tabla, cellLoc='center', loc='center')
-    tabla3.auto_set_font_size(False)
-    tabla3.set_fontsize(9)
-    tabla3.scale(1, 2)
-    
-    # Colorear
-    for i in range(len(header)):
-        tabla3[(0, i)].set_facecolor('#2196F3')
-        tabla3[(0, i)].set_text_props(weight='bold', color='white')
-    
-    ax3.set_title('Tabla de Diferencias Divididas', fontsize=14, fontweight='bold', pad=20)
-    
-    # 4. Polinomio interpolador
-    ax4 = plt.subplot(5, 2, (5, 6))
+        valores = [repr(float(v)) for v in tabla_dd[i, :n-i]]
+        yield separador.join([str(i), repr(float(x_datos[i]))] + valores + [''] * i) + '\n'
+
+def generar_tabla_csv(x_datos, tabla_dd, separador=','):
+    """
+    Genera la tabla de diferencias divididas completa como texto CSV
+    """
+    return "".join(iterar_tabla_csv(x_datos, tabla_dd, separador))
+
+# --- Visualización del desarrollo por paneles ---
+
+# Cachés de paneles ya rasterizados y de figuras completas (PNG). Los
+# paneles son RGBA sin comprimir (una tabla grande ronda los 18 MB), así que
+# se acotan también por memoria
+MAX_BYTES_PANELES = 128 * 1024 * 1024
+_CACHE_PANELES = CacheLRU(max_entradas=64, max_bytes=MAX_BYTES_PANELES)
+_CACHE_FIGURAS = CacheLRU(max_entradas=16)
+
+# Filas máximas que se dibujan en las tablas (para n grande se resume)
+MAX_FILAS_TABLA = 30
+_PANELES_TABLA = ('datos', 'tabla_dd', 'verificacion')
+
+def _celdas_tabla(columnas, formatos, max_filas=MAX_FILAS_TABLA):
+    """
+    Construye el texto de las celdas de forma vectorizada
+
+    Args:
+        columnas: lista de arrays (NaN = celda vacía)
+        formatos: formato printf de cada columna ('%d', '%.6f', ...)
+
+    Returns:
+        list: filas de texto; si hay más de max_filas se muestran las
+        primeras y las últimas separadas por '...'
+    """
+    n = len(columnas[0])
+    if n > max_filas:
+        cabeza = max_filas // 2
+        indices = np.r_[0:cabeza, n - (max_filas - cabeza - 1):n]
+    else:
+        indices = np.arange(n)
+
+    textos = []
+    for columna, formato in zip(columnas, formatos):
+        valores = np.asarray(columna, dtype=float)[indices]
+        if formato == '%d':
+            texto = np.char.mod('%d', valores.astype(np.int64))
+        else:
+            texto = np.char.mod(formato, np.nan_to_num(valores))
+        texto = np.where(np.isnan(valores), '', texto)
+        textos.append(texto)
+
+    celdas = np.column_stack(textos).tolist()
+    if n > max_filas:
+        celdas.insert(cabeza, ['...'] * len(columnas))
+    return celdas
+
+def _estilizar_tabla(tabla, columnas, color, fontsize):
+    """Aplica el formato común de las tablas del desarrollo"""
+    tabla.auto_set_font_size(False)
+    tabla.set_fontsize(fontsize)
+    tabla.scale(1, 2)
+    for i in range(columnas):
+        tabla[(0, i)].set_facecolor(color)
+        tabla[(0, i)].set_text_props(weight='bold', color='white')
+
+def _panel_datos(ax, x_datos, y_datos):
+    """1. Tabla de datos"""
+    ax.axis('tight')
+    ax.axis('off')
+
+    celdas = _celdas_tabla([np.arange(len(x_datos)), x_datos, y_datos], ['%d', '%.6f', '%.6f'])
+    tabla1 = ax.table(cellText=[['i', 'xi', 'f(xi)']] + celdas, cellLoc='center', loc='center',
+                      colWidths=[0.2, 0.4, 0.4])
+    _estilizar_tabla(tabla1, 3, '#4CAF50', 10)
+
+    ax.set_title('Datos del Problema', fontsize=14, fontweight='bold', pad=20)
+
+def _panel_puntos(ax, x_datos, y_datos):
+    """2. Gráfica de puntos"""
+    ax.plot(x_datos, y_datos, 'ro', markersize=10, label='Puntos dados')
+    ax.grid(True, alpha=0.3)
+    ax.set_xlabel('X', fontweight='bold')
+    ax.set_ylabel('Y', fontweight='bold')
+    ax.set_title('Puntos de Interpolación', fontsize=14, fontweight='bold')
+    ax.legend()
+
+def _panel_tabla_dd(ax, x_datos, columnas_dd):
+    """3. Tabla de diferencias divididas (primeras columnas)"""
+    ax.axis('tight')
+    ax.axis('off')
+
+    header = ['i', 'xi', 'f[xi]'] + [f'DD{j}' for j in range(1, len(columnas_dd))]
+    celdas = _celdas_tabla([np.arange(len(x_datos)), x_datos] + list(columnas_dd),
+                           ['%d', '%.4f'] + ['%.6f'] * len(columnas_dd))
+    tabla3 = ax.table(cellText=[header] + celdas, cellLoc='center', loc='center')
+    _estilizar_tabla(tabla3, len(header), '#2196F3', 9)
+
+    ax.set_title('Tabla de Diferencias Divididas', fontsize=14, fontweight='bold', pad=20)
+
+def _panel_polinomio(ax, x_datos, y_datos, coeficientes):
+    """4. Polinomio interpolador"""
     x_plot = np.linspace(min(x_datos) - 0.5, max(x_datos) + 0.5, 200)
-    y_plot = evaluar_polinomio(polinomio, x_plot)
-    
-    ax4.plot(x_plot, y_plot, 'b-', linewidth=2, label='Polinomio de Newton')
-    ax4.plot(x_datos, y_datos, 'ro', markersize=10, label='Puntos dados', zorder=5)
-    
+    y_plot = evaluar_newton(x_datos, coeficientes, x_plot)
+
+    ax.plot(x_plot, y_plot, 'b-', linewidth=2, label='Polinomio de Newton')
+    ax.plot(x_datos, y_datos, 'ro', markersize=10, label='Puntos dados', zorder=5)
+
     # Evaluar en 2.1
-    y_21 = evaluar_polinomio(polinomio, 2.1)
-    ax4.plot(2.1, y_21, 'g*', markersize=15, label=f'P(2.1) = {y_21:.6f}', zorder=6)
-    
-    ax4.grid(True, alpha=0.3)
-    ax4.set_xlabel('X', fontweight='bold')
-    ax4.set_ylabel('Y', fontweight='bold')
-    ax4.set_title('Polinomio Interpolante Completo', fontsize=14, fontweight='bold')
-    ax4.legend()
-    
-    # 5. Evaluaciones por grado
-    ax5 = plt.subplot(5, 2, 7)
-    ax5.axis('tight')
-    ax5.axis('off')
-    
+    y_21 = evaluar_newton(x_datos, coeficientes, 2.1)
+    ax.plot(2.1, y_21, 'g*', markersize=15, label=f'P(2.1) = {y_21:.6f}', zorder=6)
+
+    ax.grid(True, alpha=0.3)
+    ax.set_xlabel('X', fontweight='bold')
+    ax.set_ylabel('Y', fontweight='bold')
+    ax.set_title('Polinomio Interpolante Completo', fontsize=14, fontweight='bold')
+    ax.legend()
+
+def _panel_evaluaciones(ax, x_datos, coeficientes):
+    """5. Evaluaciones por grado (P_g usa los primeros g+1 coeficientes)"""
+    ax.axis('tight')
+    ax.axis('off')
+
     eval_tabla = [['Grado', 'P(2.1)']]
-    
-    from utils.interpolacion_newton import interpolacion_newton
-    for grado in range(1, min(4, len(x_datos))):
-        x_temp = x_datos[:grado+1]
-        y_temp = y_datos[:grado+1]
-        poli_temp, _, _ = interpolacion_newton(x_temp, y_temp)
-        resultado = evaluar_polinomio(poli_temp, 2.1)
+    for grado in range(1, min(4, len(coeficientes))):
+        resultado = evaluar_newton(x_datos, coeficientes[:grado+1], 2.1)
         eval_tabla.append([f'P{grado}', f'{resultado:.8f}'])
-    
-    tabla5 = ax5.table(cellText=eval_tabla, cellLoc='center', loc='center',
-                       colWidths=[0.3, 0.7])
-    tabla5.auto_set_font_size(False)
-    tabla5.set_fontsize(10)
-    tabla5.scale(1, 2)
-    
-    tabla5[(0, 0)].set_facecolor('#FF9800')
-    tabla5[(0, 1)].set_facecolor('#FF9800')
-    tabla5[(0, 0)].set_text_props(weight='bold', color='white')
-    tabla5[(0, 1)].set_text_props(weight='bold', color='white')
-    
-    ax5.set_title('Evaluaciones por Grado', fontsize=14, fontweight='bold', pad=20)
-    
-    # 6. Coeficientes
-    ax6 = plt.subplot(5, 2, 8)
-    coeficientes = tabla_dd[0, :]
-    ax6.bar(range(len(coeficientes)), np.abs(coeficientes), color='skyblue', edgecolor='navy')
-    ax6.set_xlabel('Coeficiente', fontweight='bold')
-    ax6.set_ylabel('Valor Absoluto', fontweight='bold')
-    ax6.set_title('Coeficientes del Polinomio', fontsize=14, fontweight='bold')
-    ax6.set_xticks(range(len(coeficientes)))
-    ax6.set_xticklabels([f'a{i}' for i in range(len(coeficientes))])
-    ax6.grid(True, alpha=0.3, axis='y')
-    
-    # 7. Verificación
-    ax7 = plt.subplot(5, 2, (9, 10))
-    ax7.axis('tight')
-    ax7.axis('off')
-    
-    verif_tabla = [['xi', 'f(xi) real', 'P(xi) calculado', 'Error']]
-    for x, y in zip(x_datos, y_datos):
-        y_calc = evaluar_polinomio(polinomio, x)
-        error = abs(y - y_calc)
-        verif_tabla.append([f'{x:.4f}', f'{y:.6f}', f'{y_calc:.6f}', f'{error:.2e}'])
-    
-    tabla7 = ax7.table(cellText=verif_tabla, cellLoc='center', loc='center')
-    tabla7.auto_set_font_size(False)
-    tabla7.set_fontsize(9)
-    tabla7.scale(1, 2)
-    
-    for i in range(4):
-        tabla7[(0, i)].set_facecolor('#9C27B0')
-        tabla7[(0, i)].set_text_props(weight='bold', color='white')
-    
-    ax7.set_title('Verificación en Puntos Originales', fontsize=14, fontweight='bold', pad=20)
-    
+
+    tabla5 = ax.table(cellText=eval_tabla, cellLoc='center', loc='center',
+                      colWidths=[0.3, 0.7])
+    _estilizar_tabla(tabla5, 2, '#FF9800', 10)
+
+    ax.set_title('Evaluaciones por Grado', fontsize=14, fontweight='bold', pad=20)
+
+def _panel_coeficientes(ax, coeficientes):
+    """6. Coeficientes"""
+    ax.bar(range(len(coeficientes)), np.abs(coeficientes), color='skyblue', edgecolor='navy')
+    ax.set_xlabel('Coeficiente', fontweight='bold')
+    ax.set_ylabel('Valor Absoluto', fontweight='bold')
+    ax.set_title('Coeficientes del Polinomio', fontsize=14, fontweight='bold')
+    if len(coeficientes) <= MAX_FILAS_TABLA:
+        ax.set_xticks(range(len(coeficientes)))
+        ax.set_xticklabels([f'a{i}' for i in range(len(coeficientes))])
+    ax.grid(True, alpha=0.3, axis='y')
+
+def _panel_verificacion(ax, x_datos, y_datos, coeficientes):
+    """7. Verificación (evaluación vectorizada en todos los nodos)"""
+    ax.axis('tight')
+    ax.axis('off')
+
+    y_calc = evaluar_newton(x_datos, coeficientes, x_datos)
+    error = np.abs(y_datos - y_calc)
+    celdas = _celdas_tabla([x_datos, y_datos, y_calc, error], ['%.4f', '%.6f', '%.6f', '%.2e'])
+    tabla7 = ax.table(cellText=[['xi', 'f(xi) real', 'P(xi) calculado', 'Error']] + celdas,
+                      cellLoc='center', loc='center')
+    _estilizar_tabla(tabla7, 4, '#9C27B0', 9)
+
+    ax.set_title('Verificación en Puntos Originales', fontsize=14, fontweight='bold', pad=20)
+
+def _paneles(x_datos, y_datos, tabla_dd):
+    """
+    Describe los paneles del desarrollo: (nombre, posición en la rejilla 5x2,
+    función de dibujo, argumentos). Los argumentos son exactamente las
+    entradas de cada panel, así que también sirven como clave de caché.
+    """
+    x_datos = np.asarray(x_datos, dtype=float)
+    y_datos = np.asarray(y_datos, dtype=float)
+    n = len(x_datos)
+    coeficientes = np.array(tabla_dd[0, :], dtype=float)
+
+    # Columnas DD0..DD3 con NaN fuera del triángulo válido (i + j >= n)
+    filas = np.arange(n)
+    columnas_dd = [np.where(filas + j < n, np.asarray(tabla_dd[:, j], dtype=float), np.nan)
+                   for j in range(min(4, n))]
+
+    return [
+        ('datos', 1, _panel_datos, (x_datos, y_datos)),
+        ('puntos', 2, _panel_puntos, (x_datos, y_datos)),
+        ('tabla_dd', (3, 4), _panel_tabla_dd, (x_datos, columnas_dd)),
+        ('polinomio', (5, 6), _panel_polinomio, (x_datos, y_datos, coeficientes)),
+        ('evaluaciones', 7, _panel_evaluaciones, (x_datos[:4], coeficientes[:4])),
+        ('coeficientes', 8, _panel_coeficientes, (coeficientes,)),
+        ('verificacion', (9, 10), _panel_verificacion, (x_datos, y_datos, coeficientes)),
+    ]
+
+def _aplanar(argumentos):
+    """Convierte los argumentos de un panel en partes para la huella"""
+    partes = []
+    for arg in argumentos:
+        if isinstance(arg, list):
+            partes.extend(arg)
+        else:
+            partes.append(arg)
+    return partes
+
+def _rasterizar_panel(nombre, posicion, dibujar, argumentos, dpi):
+    """
+    Dibuja un panel en su propia figura y devuelve sus píxeles RGBA.
+    El resultado se guarda en caché según las entradas del panel.
+    """
+    clave = huella(nombre, str(dpi), *_aplanar(argumentos))
+    imagen = _CACHE_PANELES.obtener(clave)
+    if imagen is not None:
+        return imagen
+
+    # Paneles de media fila 8x4 pulgadas, paneles de fila completa 16x4;
+    # las tablas crecen con el número de filas que muestran
+    ancho = 16 if isinstance(posicion, tuple) else 8
+    alto = 4
+    if nombre in _PANELES_TABLA:
+        alto = max(4, 0.35 * (min(len(argumentos[0]), MAX_FILAS_TABLA + 1) + 1) + 1.5)
+    with medir('matplotlib.dibujar', panel=nombre):
+        fig = Figure(figsize=(ancho, alto), dpi=dpi)
+        canvas = FigureCanvasAgg(fig)
+        dibujar(fig.add_subplot(1, 1, 1), *argumentos)
+        fig.tight_layout()
+        canvas.draw()
+        imagen = np.asarray(canvas.buffer_rgba()).copy()
+
+    _CACHE_PANELES.guardar(clave, imagen)
+    return imagen
+
+def _componer(filas_imagenes):
+    """Une los paneles rasterizados en una sola imagen RGBA"""
+    def rellenar(img, alto, ancho):
+        lienzo = np.full((alto, ancho, 4), 255, dtype=np.uint8)
+        lienzo[:img.shape[0], :img.shape[1]] = img
+        return lienzo
+
+    filas = []
+    for imagenes in filas_imagenes:
+        alto = max(img.shape[0] for img in imagenes)
+        filas.append(np.hstack([rellenar(img, alto, img.shape[1]) for img in imagenes]))
+
+    ancho = max(fila.shape[1] for fila in filas)
+    return np.vstack([rellenar(fila, fila.shape[0], ancho) for fila in filas])
+
+def generar_desarrollo_visual_png(x_datos, y_datos, tabla_dd, dpi=150):
+    """
+    Genera la visualización del desarrollo como PNG (bytes)
+
+    La figura completa se guarda en caché por conjunto de datos, y cada
+    panel por sus propias entradas: al cambiar los datos solo se vuelven
+    a dibujar los paneles cuyas entradas cambiaron.
+    """
+    paneles = _paneles(x_datos, y_datos, tabla_dd)
+    clave = huella(str(dpi), *[parte for panel in paneles for parte in _aplanar(panel[3])])
+
+    png = _CACHE_FIGURAS.obtener(clave)
+    if png is not None:
+        return png
+
+    imagenes = {nombre: _rasterizar_panel(nombre, posicion, dibujar, argumentos, dpi)
+                for nombre, posicion, dibujar, argumentos in paneles}
+    compuesta = _componer([
+        [imagenes['datos'], imagenes['puntos']],
+        [imagenes['tabla_dd']],
+        [imagenes['polinomio']],
+        [imagenes['evaluaciones'], imagenes['coeficientes']],
+        [imagenes['verificacion']],
+    ])
+
+    with medir('desarrollo.png'):
+        buf = io.BytesIO()
+        Image.fromarray(compuesta, mode='RGBA').save(buf, format='PNG')
+        png = buf.getvalue()
+
+    _CACHE_FIGURAS.guardar(clave, png)
+    return png
+
+def generar_desarrollo_visual(x_datos, y_datos, tabla_dd, polinomio=None):
+    """
+    Genera visualización del desarrollo completo como figura de matplotlib
+    """
+    fig = plt.figure(figsize=(16, 20))
+
+    for nombre, posicion, dibujar, argumentos in _paneles(x_datos, y_datos, tabla_dd):
+        dibujar(plt.subplot(5, 2, posicion), *argumentos)
+
     plt.tight_layout()
     return fig
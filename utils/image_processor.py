@@ -6,6 +6,8 @@ import numpy as np
 from PIL import Image
 import re
 import streamlit as st
+from utils.pool_easyocr import lector_ocr
+from utils.texto_puntos import puntos_de_texto
 
 def procesar_imagen(imagen):
     """
@@ -95,15 +97,14 @@ def procesar_imagen(imagen):
             # Si no se detectó nada, intentar con EasyOCR como fallback
             if max_numeros < 4:
                 try:
-                    import easyocr
-                    reader = easyocr.Reader(['es', 'en'])
-                    for img_proc in procesadas[:3]:  # Solo las 3 mejores
-                        results = reader.readtext(img_proc)
-                        texto_easy = ' '.join([text for (bbox, text, prob) in results])
-                        numeros = re.findall(r'-?\d+\.?\d*', texto_easy)
-                        if len(numeros) > max_numeros:
-                            max_numeros = len(numeros)
-                            mejor_texto = texto_easy
+                    with lector_ocr() as reader:
+                        for img_proc in procesadas[:3]:  # Solo las 3 mejores
+                            results = reader.readtext(img_proc)
+                            texto_easy = ' '.join([text for (bbox, text, prob) in results])
+                            numeros = re.findall(r'-?\d+\.?\d*', texto_easy)
+                            if len(numeros) > max_numeros:
+                                max_numeros = len(numeros)
+                                mejor_texto = texto_easy
                 except:
                     pass
         except:
@@ -149,82 +150,9 @@ def extraer_puntos_interpolacion(texto):
     """
     Extrae puntos (x,y) para interpolación del texto
     Soporta múltiples formatos y es más inteligente
+    (ver utils.texto_puntos: una sola pasada por el texto)
     """
-    if not texto or len(texto.strip()) < 3:
-        return None, None
-    
-    # Limpiar texto
-    texto = texto.replace('|', ' ').replace(':', ' ').replace(';', ' ')
-    texto = texto.replace('=', ' ')
-    
-    # Patrón 1: Buscar patrones como (x,y) o x,y
-    patron_puntos = r'\(?\s*(-?\d+\.?\d*)\s*,\s*(-?\d+\.?\d*)\s*\)?'
-    puntos = re.findall(patron_puntos, texto)
-    
-    if puntos and len(puntos) >= 2:
-        x_vals = [float(p[0]) for p in puntos]
-        y_vals = [float(p[1]) for p in puntos]
-        return x_vals, y_vals
-    
-    # Patrón 2: Buscar tablas con x e y (más flexible)
-    lineas = texto.split('\n')
-    x_vals = []
-    y_vals = []
-    
-    for i, linea in enumerate(lineas):
-        linea_lower = linea.lower()
-        nums = re.findall(r'-?\d+\.?\d*', linea)
-        
-        # Buscar líneas que contengan 'x' seguida de números
-        if ('x' in linea_lower or 'X' in linea) and nums and not y_vals:
-            # Filtrar números que no sean parte de 'x1', 'x2', etc.
-            x_vals = [float(n) for n in nums if len(n) > 0]
-        
-        # Buscar líneas que contengan 'y' o 'f' seguida de números
-        elif (('y' in linea_lower or 'f' in linea_lower or 'Y' in linea or 'F' in linea) 
-              and nums and x_vals and not y_vals):
-            y_vals = [float(n) for n in nums if len(n) > 0]
-    
-    if x_vals and y_vals and len(x_vals) == len(y_vals) and len(x_vals) >= 2:
-        return x_vals, y_vals
-    
-    # Patrón 3: Buscar dos listas de números en líneas consecutivas
-    numeros_por_linea = []
-    for linea in lineas:
-        nums = re.findall(r'-?\d+\.?\d*', linea)
-        if len(nums) >= 2:  # Al menos 2 números
-            numeros_por_linea.append([float(n) for n in nums])
-    
-    if len(numeros_por_linea) >= 2:
-        # Verificar que tengan la misma longitud
-        if len(numeros_por_linea[0]) == len(numeros_por_linea[1]):
-            return numeros_por_linea[0], numeros_por_linea[1]
-        
-        # Si no, buscar las dos líneas con más números iguales
-        for i in range(len(numeros_por_linea)):
-            for j in range(i+1, len(numeros_por_linea)):
-                if len(numeros_por_linea[i]) == len(numeros_por_linea[j]) and len(numeros_por_linea[i]) >= 2:
-                    return numeros_por_linea[i], numeros_por_linea[j]
-    
-    # Patrón 4: Todos los números en una sola línea, dividir por la mitad
-    todos_nums = re.findall(r'-?\d+\.?\d*', texto)
-    if len(todos_nums) >= 4 and len(todos_nums) % 2 == 0:
-        mitad = len(todos_nums) // 2
-        x_vals = [float(n) for n in todos_nums[:mitad]]
-        y_vals = [float(n) for n in todos_nums[mitad:]]
-        return x_vals, y_vals
-    
-    # Patrón 5: Buscar formato de tabla (números en columnas)
-    # Ejemplo: "0  1" en una línea, "1  2" en otra
-    if len(numeros_por_linea) >= 2:
-        # Intentar transponer (asumir que cada línea es un par x,y)
-        if all(len(linea) == 2 for linea in numeros_por_linea):
-            x_vals = [linea[0] for linea in numeros_por_linea]
-            y_vals = [linea[1] for linea in numeros_por_linea]
-            if len(x_vals) >= 2:
-                return x_vals, y_vals
-    
-    return None, None
+    return puntos_de_texto(texto)
 
 def mostrar_imagen_procesada(imagen_original, imagen_procesada):
     """
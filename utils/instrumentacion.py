@@ -0,0 +1,294 @@
+"""
+Instrumentación por etapas: tiempo real, tiempo de CPU y memoria asignada
+
+Cada etapa se mide con el administrador de contexto medir() o con el
+decorador medido():
+
+    with medir('sympy.simplify'):
+        simplificado = sp.simplify(expandido)
+
+    @medido('newton.polinomio')
+    def interpolacion_newton(x_datos, y_datos):
+        ...
+
+Apagada (lo normal) cada medición es solo comprobar un booleano.
+Encendida, se guardan las últimas MAX_MEDICIONES de la sesión; con memoria
+además se usa tracemalloc, que vuelve más lento todo lo que asigna
+memoria, así que conviene solo para perfilar. El tiempo de CPU es el del
+proceso entero (incluye los hilos que lance la etapa) y la memoria es
+aproximada si hay varios hilos midiendo a la vez.
+
+Las mediciones de los procesos trabajadores (utils.trabajos) se traen al
+proceso de la interfaz cuando el trabajo termina.
+
+Variables de entorno:
+    MN_INSTRUMENTACION: '1' para medir desde el arranque, 'memoria' para
+        medir también las asignaciones
+"""
+import contextvars
+import functools
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+import weakref
+from collections import deque
+from contextlib import contextmanager
+
+MAX_MEDICIONES = 5000
+
+_modo = os.environ.get('MN_INSTRUMENTACION', '').lower()
+
+class Sesion:
+    """
+    Estado de instrumentación de una sesión de la interfaz: si mide, si
+    mide memoria y sus mediciones. Cada sesión de Streamlit guarda la suya
+    en st.session_state y la activa con usar_sesion() al empezar cada
+    ejecución del script; el código que corre fuera de una sesión (procesos
+    trabajadores, scripts) usa la del proceso.
+    """
+
+    def __init__(self, activa=None, memoria=None):
+        self.activa = _modo in ('1', 'memoria') if activa is None else bool(activa)
+        self.memoria = self.activa and (_modo == 'memoria' if memoria is None else bool(memoria))
+        self.mediciones = deque(maxlen=MAX_MEDICIONES)
+        self.candado = threading.Lock()
+        if self.memoria:
+            _pedir_tracemalloc(self, True)
+
+_sesion = contextvars.ContextVar('sesion_instrumentacion', default=None)
+_local = threading.local()      # pila de etapas abiertas en cada hilo
+
+# tracemalloc es de todo el proceso: corre mientras alguna sesión mida
+# memoria y se detiene (si lo arrancó este módulo) cuando ya ninguna
+_con_memoria = weakref.WeakSet()
+_tracemalloc = {'propio': False}
+_candado_memoria = threading.Lock()
+
+def _pedir_tracemalloc(sesion, memoria):
+    with _candado_memoria:
+        if memoria:
+            _con_memoria.add(sesion)
+        else:
+            _con_memoria.discard(sesion)
+        if _con_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracemalloc['propio'] = True
+        elif not _con_memoria and _tracemalloc['propio']:
+            tracemalloc.stop()
+            _tracemalloc['propio'] = False
+
+_del_proceso = Sesion()
+
+def usar_sesion(sesion):
+    """
+    Hace de `sesion` la sesión actual en este contexto (los hilos lanzados
+    con registro.en_contexto la heredan)
+    """
+    _sesion.set(sesion)
+
+def sesion_actual():
+    """La sesión del contexto actual o, si no hay, la del proceso"""
+    return _sesion.get() or _del_proceso
+
+def activar(activa=True, memoria=False):
+    """Enciende o apaga la instrumentación de la sesión actual"""
+    sesion = sesion_actual()
+    sesion.activa = bool(activa)
+    sesion.memoria = bool(activa and memoria)
+    _pedir_tracemalloc(sesion, sesion.memoria)
+
+def configuracion():
+    """(activa, memoria) de la sesión actual, para reproducirla en otro proceso"""
+    sesion = sesion_actual()
+    return sesion.activa, sesion.memoria
+
+def activa():
+    """Si la sesión actual está guardando mediciones"""
+    return sesion_actual().activa
+
+def _pila():
+    pila = getattr(_local, 'pila', None)
+    if pila is None:
+        pila = _local.pila = []
+    return pila
+
+def _actualizar_picos(pila):
+    """
+    Lleva el pico de tracemalloc a todas las etapas abiertas del hilo y lo
+    reinicia, así cada etapa anidada ve su propio pico sin perder el de
+    las de afuera
+
+    Returns:
+        bytes asignados en este momento
+    """
+    actual, pico = tracemalloc.get_traced_memory()
+    for abierta in pila:
+        abierta['pico'] = max(abierta['pico'], pico)
+    tracemalloc.reset_peak()
+    return actual
+
+def _guardar(sesion, medicion):
+    with sesion.candado:
+        sesion.mediciones.append(medicion)
+
+@contextmanager
+def medir(etapa, **datos):
+    """
+    Mide el bloque como la etapa `etapa`
+
+    Args:
+        etapa: nombre, por convención 'area.paso' ('sympy.simplify', 'ocr.reconocer')
+        **datos: valores extra que se guardan con la medición
+    """
+    sesion = sesion_actual()
+    if not sesion.activa:
+        yield
+        return
+
+    pila = _pila()
+    abierta = {'etapa': etapa, 'pico': 0, 'memoria_inicio': None}
+    if sesion.memoria and tracemalloc.is_tracing():
+        abierta['memoria_inicio'] = abierta['pico'] = _actualizar_picos(pila)
+    padre = pila[-1]['etapa'] if pila else None
+    pila.append(abierta)
+
+    error = False
+    marca = time.time()
+    inicio, inicio_cpu = time.perf_counter(), time.process_time()
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        pared = time.perf_counter() - inicio
+        cpu = time.process_time() - inicio_cpu
+        asignado_kb = pico_kb = None
+        if abierta['memoria_inicio'] is not None and tracemalloc.is_tracing():
+            actual = _actualizar_picos(pila)
+            asignado_kb = (actual - abierta['memoria_inicio']) / 1024
+            pico_kb = (abierta['pico'] - abierta['memoria_inicio']) / 1024
+        pila.pop()
+
+        medicion = {
+            'etapa': etapa, 'inicio': marca, 'pared_ms': pared * 1000, 'cpu_ms': cpu * 1000,
+            'asignado_kb': asignado_kb, 'pico_kb': pico_kb, 'padre': padre,
+            'proceso': os.getpid(), 'error': error,
+        }
+        if datos:
+            medicion['datos'] = datos
+        _guardar(sesion, medicion)
+
+def medido(etapa=None):
+    """
+    Decorador: mide cada llamada a la función (por defecto la etapa se
+    llama 'modulo.funcion')
+    """
+    def decorar(funcion):
+        nombre = etapa or f"{funcion.__module__.rsplit('.', 1)[-1]}.{funcion.__name__}"
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if not sesion_actual().activa:
+                return funcion(*args, **kwargs)
+            with medir(nombre):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorar
+
+def registrar(etapa, segundos, **datos):
+    """
+    Guarda una etapa que ya midió otro código (por ejemplo los tiempos por
+    etapa del pipeline de OCR); solo tiene tiempo real
+    """
+    sesion = sesion_actual()
+    if not sesion.activa:
+        return
+    pila = _pila()
+    medicion = {
+        'etapa': etapa, 'inicio': time.time() - segundos, 'pared_ms': segundos * 1000, 'cpu_ms': None,
+        'asignado_kb': None, 'pico_kb': None, 'padre': pila[-1]['etapa'] if pila else None,
+        'proceso': os.getpid(), 'error': False,
+    }
+    if datos:
+        medicion['datos'] = datos
+    _guardar(sesion, medicion)
+
+def mediciones():
+    """Copia de las mediciones de la sesión, de la más vieja a la más nueva"""
+    sesion = sesion_actual()
+    with sesion.candado:
+        return list(sesion.mediciones)
+
+def extraer():
+    """Devuelve las mediciones de la sesión y las borra (para enviarlas a otro proceso)"""
+    sesion = sesion_actual()
+    with sesion.candado:
+        salida = list(sesion.mediciones)
+        sesion.mediciones.clear()
+    return salida
+
+def incorporar(lista, sesion=None):
+    """Agrega mediciones hechas en otro proceso a `sesion` (por defecto la actual)"""
+    sesion = sesion or sesion_actual()
+    with sesion.candado:
+        sesion.mediciones.extend(lista)
+
+def limpiar():
+    """Borra las mediciones de la sesión"""
+    sesion = sesion_actual()
+    with sesion.candado:
+        sesion.mediciones.clear()
+
+def _sumar(valores):
+    valores = [v for v in valores if v is not None]
+    return sum(valores) if valores else None
+
+def resumen(lista=None):
+    """
+    Totales por etapa
+
+    Returns:
+        lista de dicts {'etapa', 'veces', 'total_ms', 'media_ms', 'p95_ms',
+        'max_ms', 'cpu_ms', 'asignado_kb', 'pico_kb'} ordenada por tiempo
+        total; cpu_ms y asignado_kb son sumas, pico_kb el mayor
+    """
+    por_etapa = {}
+    for medicion in (mediciones() if lista is None else lista):
+        por_etapa.setdefault(medicion['etapa'], []).append(medicion)
+
+    filas = []
+    for etapa, grupo in por_etapa.items():
+        tiempos = sorted(m['pared_ms'] for m in grupo)
+        picos = [m['pico_kb'] for m in grupo if m['pico_kb'] is not None]
+        filas.append({
+            'etapa': etapa,
+            'veces': len(grupo),
+            'total_ms': sum(tiempos),
+            'media_ms': sum(tiempos) / len(tiempos),
+            'p95_ms': tiempos[max(0, math.ceil(0.95 * len(tiempos)) - 1)],
+            'max_ms': tiempos[-1],
+            'cpu_ms': _sumar(m['cpu_ms'] for m in grupo),
+            'asignado_kb': _sumar(m['asignado_kb'] for m in grupo),
+            'pico_kb': max(picos) if picos else None,
+        })
+    filas.sort(key=lambda f: f['total_ms'], reverse=True)
+    return filas
+
+def exportar_json():
+    """
+    Mediciones y resumen como texto JSON, para analizarlos fuera de la
+    aplicación
+    """
+    lista = mediciones()
+    activa_, memoria = configuracion()
+    return json.dumps({
+        'generado': time.time(),
+        'proceso': os.getpid(),
+        'configuracion': {'activa': activa_, 'memoria': memoria},
+        'resumen': resumen(lista),
+        'mediciones': lista,
+    }, ensure_ascii=False, indent=1, default=str)
@@ -6,21 +6,79 @@ import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-import sympy as sp
-from utils.interpolacion_newton import diferencias_divididas, interpolacion_newton, evaluar_polinomio
-from utils.generador_desarrollo import generar_desarrollo_completo, generar_tabla_html, generar_desarrollo_visual
-from utils.ocr_definitivo import extraer_tabla
-from PIL import Image
+import hashlib
+from utils.interpolacion_newton import interpolacion_completa, evaluar_newton
+from utils.carga_diferida import modulo_diferido
+from utils.instrumentacion import medido, medir
+from utils.trabajos import (enviar_trabajo, recoger_trabajo, olvidar_trabajo,
+                            COMPLETADO, CANCELADO)
+
+# El OCR por lotes, el servicio de OCR y matplotlib solo se cargan al usarlos;
+# OpenCV y el pipeline de OCR nunca se cargan en este proceso (corren en los trabajos)
+desarrollo = modulo_diferido('utils.generador_desarrollo')
+ocr_definitivo = modulo_diferido('utils.ocr_definitivo')
+lote_ocr = modulo_diferido('utils.lote_ocr')
+servicio_ocr = modulo_diferido('utils.servicio_ocr')
 
 def detectar_tabla_y_extraer_datos(imagen):
     """
     Detecta tabla y extrae datos - DEFINITIVO
     """
-    x, y = extraer_tabla(imagen)
+    x, y = ocr_definitivo.extraer_tabla(imagen)
     if x and y:
         return x, y, True
     return None, None, False
 
+def mostrar_lote_ocr():
+    """
+    Procesa un ZIP con varias fotos de ejercicios en un solo trabajo
+    """
+    with st.expander("📦 Procesar varias imágenes (ZIP)"):
+        st.caption("Sube un ZIP con fotos de ejercicios: se extrae la tabla de cada una "
+                   "y se descargan todas juntas en CSV o JSONL.")
+        archivo_zip = st.file_uploader("📁 Archivo ZIP", type=['zip'], key="lote_zip")
+        if archivo_zip is None:
+            return
+        
+        datos_zip = archivo_zip.getvalue()
+        clave_zip = hashlib.sha1(datos_zip).hexdigest()
+        trabajo_lote = st.session_state.get('trabajo_lote')
+        if trabajo_lote is None or trabajo_lote['clave'] != clave_zip:
+            if not st.button("🚀 Extraer tablas", key="btn_lote"):
+                return
+            if trabajo_lote is not None:
+                olvidar_trabajo(trabajo_lote['id'])
+            trabajo_lote = {
+                'id': enviar_trabajo(lote_ocr.procesar_lote, (datos_zip,), descripcion="Lote OCR"),
+                'clave': clave_zip
+            }
+            st.session_state['trabajo_lote'] = trabajo_lote
+        
+        estado = recoger_trabajo(trabajo_lote, "🤖 Procesando lote...")
+        if estado['estado'] == CANCELADO:
+            st.warning("⚠️ Lote cancelado")
+            return
+        if estado['estado'] != COMPLETADO:
+            st.error("⚠️ No se pudo procesar el lote")
+            return
+        
+        lote = trabajo_lote['resultado']
+        m = lote['metricas']
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Tablas extraídas", f"{m['extraidas']}/{m['imagenes']}")
+        col2.metric("Tiempo total", f"{m['segundos']:.1f} s")
+        col3.metric("Imágenes por segundo", f"{m['imagenes_por_segundo']:.2f}")
+        
+        st.dataframe(pd.DataFrame(lote['filas']))
+        
+        col_csv, col_jsonl = st.columns(2)
+        with col_csv:
+            st.download_button("📥 Descargar CSV", lote_ocr.filas_a_csv(lote['filas']),
+                               file_name="tablas_extraidas.csv", mime="text/csv")
+        with col_jsonl:
+            st.download_button("📥 Descargar JSONL", lote_ocr.filas_a_jsonl(lote['filas']),
+                               file_name="tablas_extraidas.jsonl", mime="application/jsonl")
+
 def crear_interfaz_interpolacion():
     """
     Crea la interfaz completa de interpolación con carga de imágenes
@@ -84,59 +142,81 @@ def crear_interfaz_interpolacion():
             uploaded_file = imagen_source
         
         if uploaded_file is not None:
-            # Mostrar imagen original
-            imagen = Image.open(uploaded_file)
+            # Los bytes del archivo se muestran tal cual (los decodifica el
+            # navegador) y el OCR los decodifica en gris y reducidos
+            datos_imagen = uploaded_file.getvalue()
             
             # Mostrar solo imagen original
-            st.image(imagen, caption="📸 Imagen Cargada", use_column_width=True)
+            st.image(datos_imagen, caption="📸 Imagen Cargada", use_column_width=True)
+            
+            # Análisis INTERNO en segundo plano (sin mostrar procesamiento)
+            clave_imagen = hashlib.sha1(datos_imagen).hexdigest()
+            x_ext, y_ext = None, None
+            
+            # La caché de OCR se consulta dentro del trabajo (ejecutar_pipeline
+            # con usar_cache=True, en el servicio o en el trabajador): este
+            # proceso no carga OpenCV ni el pipeline
+            trabajo_ocr = st.session_state.get('trabajo_ocr')
+            if trabajo_ocr is None or trabajo_ocr['clave'] != clave_imagen:
+                if trabajo_ocr is not None:
+                    olvidar_trabajo(trabajo_ocr['id'])
+                trabajo_ocr = {
+                    # En el servicio de OCR si hay uno (MN_SERVICIO_OCR); si no, en el trabajador
+                    'id': enviar_trabajo(servicio_ocr.extraer_con_respaldo, (datos_imagen, 'definitivo'),
+                                         descripcion="Extracción OCR"),
+                    'clave': clave_imagen
+                }
+                st.session_state['trabajo_ocr'] = trabajo_ocr
             
-            # Análisis INTERNO (sin mostrar procesamiento)
-            with st.spinner("🤖 Analizando imagen internamente..."):
-                x_ext, y_ext, exito_tabla = detectar_tabla_y_extraer_datos(imagen)
+            estado_ocr = recoger_trabajo(trabajo_ocr, "🤖 Analizando imagen internamente...")
+            
+            if estado_ocr['estado'] == COMPLETADO:
+                resultado_ocr = trabajo_ocr['resultado']
+                x_ext, y_ext = resultado_ocr['x'], resultado_ocr['y']
+            
+            if x_ext and y_ext and len(x_ext) >= 2:
+                st.success(f"✓ Se detectaron {len(x_ext)} puntos automáticamente")
                 
-                if x_ext and y_ext and len(x_ext) >= 2:
-                    st.success(f"✓ Se detectaron {len(x_ext)} puntos automáticamente")
-                    
-                    # Mostrar puntos detectados en formato visual
-                    col_det1, col_det2 = st.columns(2)
-                    with col_det1:
-                        st.markdown("**Valores de X detectados:**")
-                        st.code(", ".join([str(x) for x in x_ext]))
-                    with col_det2:
-                        st.markdown("**Valores de Y detectados:**")
-                        st.code(", ".join([str(y) for y in y_ext]))
-                    
-                    # Tabla de puntos
-                    df_puntos = pd.DataFrame({'X': x_ext, 'Y': y_ext})
-                    st.dataframe(df_puntos)
-                    
-                    # Botones en columnas
-                    col_btn1, col_btn2 = st.columns(2)
-                    
-                    with col_btn1:
-                        if st.button("✅ Usar y Calcular Automáticamente", key="btn_auto_calc", type="primary"):
-                            st.session_state['x_datos'] = np.array(x_ext)
-                            st.session_state['y_datos'] = np.array(y_ext)
-                            st.session_state['calcular_automatico'] = True
-                            st.success("✓ Datos cargados y calculando...")
-                            st.rerun()
-                    
-                    with col_btn2:
-                        if st.button("📝 Solo Cargar Datos", key="btn_image"):
-                            st.session_state['x_datos'] = np.array(x_ext)
-                            st.session_state['y_datos'] = np.array(y_ext)
-                            st.session_state['calcular_automatico'] = False
-                            st.success("✓ Datos cargados desde imagen")
-                            st.rerun()
-                else:
-                    st.warning("⚠️ No se pudieron detectar puntos automáticamente.")
-                    st.info("""
-                    **💡 Consejos para mejorar la detección:**
-                    - Asegúrate de que la imagen tenga buena iluminación
-                    - El texto debe ser claro y legible
-                    - Evita imágenes borrosas o con mucho ruido
-                    - Los números deben estar bien separados
-                    """)
+                # Mostrar puntos detectados en formato visual
+                col_det1, col_det2 = st.columns(2)
+                with col_det1:
+                    st.markdown("**Valores de X detectados:**")
+                    st.code(", ".join([str(x) for x in x_ext]))
+                with col_det2:
+                    st.markdown("**Valores de Y detectados:**")
+                    st.code(", ".join([str(y) for y in y_ext]))
+                
+                # Tabla de puntos
+                df_puntos = pd.DataFrame({'X': x_ext, 'Y': y_ext})
+                st.dataframe(df_puntos)
+                
+                # Botones en columnas
+                col_btn1, col_btn2 = st.columns(2)
+                
+                with col_btn1:
+                    if st.button("✅ Usar y Calcular Automáticamente", key="btn_auto_calc", type="primary"):
+                        st.session_state['x_datos'] = np.array(x_ext)
+                        st.session_state['y_datos'] = np.array(y_ext)
+                        st.session_state['calcular_automatico'] = True
+                        st.success("✓ Datos cargados y calculando...")
+                        st.rerun()
+                
+                with col_btn2:
+                    if st.button("📝 Solo Cargar Datos", key="btn_image"):
+                        st.session_state['x_datos'] = np.array(x_ext)
+                        st.session_state['y_datos'] = np.array(y_ext)
+                        st.session_state['calcular_automatico'] = False
+                        st.success("✓ Datos cargados desde imagen")
+                        st.rerun()
+            else:
+                st.warning("⚠️ No se pudieron detectar puntos automáticamente.")
+                st.info("""
+                **💡 Consejos para mejorar la detección:**
+                - Asegúrate de que la imagen tenga buena iluminación
+                - El texto debe ser claro y legible
+                - Evita imágenes borrosas o con mucho ruido
+                - Los números deben estar bien separados
+                """)
             
             # Opción de entrada manual después de ver la imagen
             st.markdown("---")
@@ -178,6 +258,8 @@ def crear_interfaz_interpolacion():
                     st.error(f"⚠️ Error: Asegúrate de ingresar solo números separados por comas")
                 except Exception as e:
                     st.error(f"⚠️ Error: {e}")
+        
+        mostrar_lote_ocr()
     
     # TAB 3: Ejemplos
     with tab3:
@@ -240,6 +322,13 @@ def crear_interfaz_interpolacion():
         # Verificar si debe calcular automáticamente
         calcular_auto = st.session_state.get('calcular_automatico', False)
         
+        # Descartar el trabajo anterior si los datos cambiaron
+        trabajo = st.session_state.get('trabajo_interpolacion')
+        if trabajo is not None and not _mismos_datos(trabajo, x_datos, y_datos):
+            olvidar_trabajo(trabajo['id'])
+            st.session_state['trabajo_interpolacion'] = None
+            trabajo = None
+        
         # Botón principal de cálculo
         if st.button("🚀 CALCULAR INTERPOLACIÓN", type="primary") or calcular_auto:
             # Resetear flag de cálculo automático
@@ -247,6 +336,19 @@ def crear_interfaz_interpolacion():
                 st.session_state['calcular_automatico'] = False
                 st.info("🤖 Calculando automáticamente con los datos detectados...")
             
+            # Forzar un cálculo nuevo
+            if trabajo is not None:
+                olvidar_trabajo(trabajo['id'])
+            st.session_state['trabajo_interpolacion'] = None
+            trabajo = None
+            
+            calcular_y_mostrar_resultados(
+                x_datos, y_datos, 
+                mostrar_tabla, mostrar_pasos, mostrar_graficas, 
+                mostrar_estadisticas, puntos_grafica, evaluar_punto
+            )
+        elif trabajo is not None:
+            # Continuar con el trabajo en curso o mostrar su resultado
             calcular_y_mostrar_resultados(
                 x_datos, y_datos, 
                 mostrar_tabla, mostrar_pasos, mostrar_graficas, 
@@ -255,6 +357,15 @@ def crear_interfaz_interpolacion():
     else:
         st.info("👆 Selecciona un método de entrada de datos arriba para comenzar")
 
+def _mismos_datos(trabajo, x_datos, y_datos):
+    """Verifica si un trabajo de interpolación corresponde a los datos actuales"""
+    return (np.array_equal(trabajo['x'], x_datos) and
+            np.array_equal(trabajo['y'], y_datos))
+
+# Tamaño de la ventana visible de la tabla de diferencias divididas
+FILAS_VENTANA = 50
+COLUMNAS_VENTANA = 10
+
 def calcular_y_mostrar_resultados(x_datos, y_datos, mostrar_tabla, mostrar_pasos, 
                                    mostrar_graficas, mostrar_estadisticas, 
                                    puntos_grafica, evaluar_punto):
@@ -273,9 +384,29 @@ def calcular_y_mostrar_resultados(x_datos, y_datos, mostrar_tabla, mostrar_pasos
             st.error("⚠️ Los valores de X deben ser únicos")
             return
         
-        # Calcular interpolación
-        with st.spinner("🔄 Calculando interpolación..."):
-            polinomio, tabla, detalles = interpolacion_newton(x_datos, y_datos)
+        # Calcular interpolación en segundo plano
+        trabajo = st.session_state.get('trabajo_interpolacion')
+        if trabajo is None:
+            trabajo = {
+                # SymPy (expandir, simplificar, LaTeX) y los textos del
+                # desarrollo también se calculan en el trabajo, una sola vez
+                'id': enviar_trabajo(interpolacion_completa, (x_datos, y_datos),
+                                     descripcion="Interpolación de Newton"),
+                'x': np.array(x_datos),
+                'y': np.array(y_datos)
+            }
+            st.session_state['trabajo_interpolacion'] = trabajo
+        
+        estado = recoger_trabajo(trabajo, "🔄 Calculando interpolación...")
+        if estado['estado'] == CANCELADO:
+            st.session_state['trabajo_interpolacion'] = None
+            st.warning("⚠️ Cálculo cancelado")
+            return
+        if estado['estado'] != COMPLETADO:
+            return
+        
+        resultado = trabajo['resultado']
+        tabla, coeficientes = resultado['tabla'], resultado['coeficientes']
         
         st.success("✅ ¡Interpolación calculada exitosamente!")
         
@@ -286,48 +417,77 @@ def calcular_y_mostrar_resultados(x_datos, y_datos, mostrar_tabla, mostrar_pasos
         
         if mostrar_pasos:
             with st.expander("📝 CONSTRUCCIÓN PASO A PASO", expanded=True):
-                mostrar_construccion_paso_a_paso(tabla, detalles, x_datos)
+                mostrar_construccion_paso_a_paso(tabla, resultado['detalles'])
         
         # Polinomio final
         with st.expander("🎓 POLINOMIO DE INTERPOLACIÓN", expanded=True):
-            mostrar_polinomio_final(polinomio)
+            mostrar_polinomio_final(resultado)
         
         # Evaluación
         if evaluar_punto:
             with st.expander("🔍 EVALUACIÓN EN PUNTO ESPECÍFICO", expanded=True):
-                evaluar_en_punto(polinomio, evaluar_punto, x_datos)
+                evaluar_en_punto(coeficientes, evaluar_punto, x_datos)
         
         # Gráficas
         if mostrar_graficas:
             with st.expander("📊 VISUALIZACIONES INTERACTIVAS", expanded=True):
-                crear_graficas_interactivas(x_datos, y_datos, polinomio, puntos_grafica, evaluar_punto)
+                crear_graficas_interactivas(x_datos, y_datos, coeficientes, puntos_grafica, evaluar_punto)
         
         # Estadísticas
         if mostrar_estadisticas:
             with st.expander("📈 ESTADÍSTICAS Y ANÁLISIS", expanded=True):
-                mostrar_estadisticas_completas(x_datos, y_datos, polinomio, tabla)
+                mostrar_estadisticas_completas(x_datos, y_datos, coeficientes)
         
         # Desarrollo completo tipo libro
         with st.expander("📚 DESARROLLO COMPLETO (Formato Libro de Texto)", expanded=False):
-            mostrar_desarrollo_completo_libro(x_datos, y_datos, tabla, polinomio, detalles)
+            mostrar_desarrollo_completo_libro(x_datos, y_datos, resultado)
     
     except Exception as e:
         st.error(f"⚠️ Error en el cálculo: {e}")
         st.exception(e)
 
+def ventana_diferencias(x_datos, tabla, fila_inicio, num_filas, col_inicio, num_cols):
+    """
+    Materializa solo una ventana de la tabla de diferencias divididas
+    
+    Solo se leen las celdas del triángulo válido (i + j < n); el resto
+    de la ventana queda como NaN y se muestra vacío.
+    """
+    n = len(x_datos)
+    f1 = min(n, fila_inicio + num_filas)
+    c1 = min(n, col_inicio + num_cols)
+    
+    datos = {'x': np.asarray(x_datos, dtype=float)[fila_inicio:f1]}
+    for j in range(col_inicio, c1):
+        columna = np.full(f1 - fila_inicio, np.nan)
+        validas = max(0, min(f1, n - j) - fila_inicio)
+        if validas:
+            columna[:validas] = tabla[fila_inicio:fila_inicio + validas, j]
+        datos['f(x)' if j == 0 else f'DD{j}'] = columna
+    
+    return pd.DataFrame(datos, index=np.arange(fila_inicio, f1))
+
 def mostrar_tabla_diferencias(x_datos, y_datos, tabla):
-    """Muestra la tabla de diferencias divididas"""
+    """Muestra la tabla de diferencias divididas (por ventanas si es grande)"""
     n = len(x_datos)
-    columnas = ['x', 'f(x)'] + [f'DD{i}' for i in range(1, n)]
-    
-    tabla_mostrar = np.zeros((n, n+1))
-    tabla_mostrar[:, 0] = x_datos
-    tabla_mostrar[:, 1:] = tabla
-    
-    df_tabla = pd.DataFrame(tabla_mostrar, columns=columnas)
+    fila_inicio, col_inicio = 0, 0
+    
+    if n > FILAS_VENTANA or n > COLUMNAS_VENTANA:
+        st.caption(f"Tabla de {n} filas × {n} órdenes: se muestra una ventana de "
+                   f"{FILAS_VENTANA} filas × {COLUMNAS_VENTANA} columnas")
+        col_fila, col_orden = st.columns(2)
+        with col_fila:
+            fila_inicio = int(st.number_input("Fila inicial", 0, n - 1, 0,
+                                              step=FILAS_VENTANA, key="dd_fila_inicio"))
+        with col_orden:
+            col_inicio = int(st.number_input("Orden inicial", 0, n - 1, 0,
+                                             step=COLUMNAS_VENTANA, key="dd_col_inicio"))
+    
+    df_tabla = ventana_diferencias(x_datos, tabla, fila_inicio, FILAS_VENTANA,
+                                   col_inicio, COLUMNAS_VENTANA)
     
     st.dataframe(
-        df_tabla.style.format("{:.8f}").background_gradient(cmap='RdYlGn', axis=None)
+        df_tabla.style.format("{:.8f}", na_rep="").background_gradient(cmap='RdYlGn', axis=None)
     )
     
     st.markdown("#### 🎯 Coeficientes del Polinomio")
@@ -337,7 +497,7 @@ def mostrar_tabla_diferencias(x_datos, y_datos, tabla):
         with col:
             st.metric(f"a{i}", f"{coef:.6f}")
 
-def mostrar_construccion_paso_a_paso(tabla, detalles, x_datos):
+def mostrar_construccion_paso_a_paso(tabla, detalles):
     """Muestra la construcción paso a paso del polinomio"""
     st.latex(r"P_n(x) = a_0 + a_1(x-x_0) + a_2(x-x_0)(x-x_1) + \cdots")
     
@@ -351,32 +511,31 @@ def mostrar_construccion_paso_a_paso(tabla, detalles, x_datos):
             with col1:
                 st.write(f"Coeficiente: `{detalle['coeficiente']:.8f}`")
             with col2:
-                termino_str = sp.latex(detalle['termino'])
-                st.latex(f"+ {termino_str}")
+                st.latex(f"+ {detalle['latex']}")
 
-def mostrar_polinomio_final(polinomio):
-    """Muestra el polinomio final en diferentes formatos"""
-    polinomio_expandido = sp.expand(polinomio)
-    polinomio_simplificado = sp.simplify(polinomio_expandido)
-    
+def mostrar_polinomio_final(resultado):
+    """
+    Muestra el polinomio final en diferentes formatos (las formas ya
+    vienen calculadas por el trabajo de interpolacion_completa)
+    """
     col1, col2 = st.columns(2)
     
     with col1:
         st.markdown("**Forma Expandida:**")
-        st.latex(sp.latex(polinomio_expandido))
+        st.latex(resultado['latex_expandido'])
     
     with col2:
         st.markdown("**Forma Simplificada:**")
-        st.latex(sp.latex(polinomio_simplificado))
+        st.latex(resultado['latex_simplificado'])
     
     st.markdown("**Formato de Texto (copiable):**")
-    st.code(str(polinomio_simplificado), language="python")
+    st.code(str(resultado['simplificado']), language="python")
 
-def evaluar_en_punto(polinomio, punto_str, x_datos):
+def evaluar_en_punto(coeficientes, punto_str, x_datos):
     """Evalúa el polinomio en un punto específico"""
     try:
         x_eval = float(punto_str)
-        y_eval = evaluar_polinomio(polinomio, x_eval)
+        y_eval = evaluar_newton(x_datos, coeficientes, x_eval)
         
         col1, col2, col3 = st.columns(3)
         
@@ -393,13 +552,23 @@ def evaluar_en_punto(polinomio, punto_str, x_datos):
     except ValueError:
         st.error("⚠️ Ingresa un número válido")
 
-def crear_graficas_interactivas(x_datos, y_datos, polinomio, puntos_grafica, evaluar_punto):
+def crear_graficas_interactivas(x_datos, y_datos, coeficientes, puntos_grafica, evaluar_punto):
     """Crea gráficas interactivas con Plotly"""
+    fig = _figura_interactiva(x_datos, y_datos, coeficientes, puntos_grafica, evaluar_punto)
+    with medir('st.plotly_chart'):
+        st.plotly_chart(fig)
+
+@medido('plotly.figura')
+def _figura_interactiva(x_datos, y_datos, coeficientes, puntos_grafica, evaluar_punto):
+    """
+    Arma la figura de Plotly de crear_graficas_interactivas (el polinomio
+    se evalúa con la forma de Newton, sin lambdify)
+    """
     # Generar puntos para la gráfica
     x_min, x_max = min(x_datos), max(x_datos)
     rango = x_max - x_min
     x_plot = np.linspace(x_min - 0.2*rango, x_max + 0.2*rango, puntos_grafica)
-    y_plot = evaluar_polinomio(polinomio, x_plot)
+    y_plot = evaluar_newton(x_datos, coeficientes, x_plot)
     
     # Crear subplots
     fig = make_subplots(
@@ -426,7 +595,7 @@ def crear_graficas_interactivas(x_datos, y_datos, polinomio, puntos_grafica, eva
     if evaluar_punto:
         try:
             x_eval = float(evaluar_punto)
-            y_eval = evaluar_polinomio(polinomio, x_eval)
+            y_eval = evaluar_newton(x_datos, coeficientes, x_eval)
             fig.add_trace(
                 go.Scatter(x=[x_eval], y=[y_eval], mode='markers', name='Evaluación',
                           marker=dict(size=15, color='green', symbol='star')),
@@ -436,7 +605,7 @@ def crear_graficas_interactivas(x_datos, y_datos, polinomio, puntos_grafica, eva
             pass
     
     # Gráfica 2: Errores
-    y_interpolados = evaluar_polinomio(polinomio, x_datos)
+    y_interpolados = evaluar_newton(x_datos, coeficientes, x_datos)
     errores = np.abs(y_datos - y_interpolados)
     fig.add_trace(
         go.Bar(x=list(range(len(x_datos))), y=errores, name='Error',
@@ -445,7 +614,6 @@ def crear_graficas_interactivas(x_datos, y_datos, polinomio, puntos_grafica, eva
     )
     
     # Gráfica 3: Coeficientes
-    tabla, coeficientes = diferencias_divididas(x_datos, y_datos)
     fig.add_trace(
         go.Bar(x=[f'a{i}' for i in range(len(coeficientes))], 
                y=np.abs(coeficientes), name='Coeficientes',
@@ -455,7 +623,7 @@ def crear_graficas_interactivas(x_datos, y_datos, polinomio, puntos_grafica, eva
     
     # Gráfica 4: Vista detallada
     x_zoom = np.linspace(x_min, x_max, puntos_grafica)
-    y_zoom = evaluar_polinomio(polinomio, x_zoom)
+    y_zoom = evaluar_newton(x_datos, coeficientes, x_zoom)
     fig.add_trace(
         go.Scatter(x=x_zoom, y=y_zoom, mode='lines', name='Detalle',
                   line=dict(color='purple', width=2), fill='tozeroy'),
@@ -468,11 +636,11 @@ def crear_graficas_interactivas(x_datos, y_datos, polinomio, puntos_grafica, eva
     )
     
     fig.update_layout(height=800, showlegend=True, title_text="Análisis Completo de Interpolación")
-    st.plotly_chart(fig)
+    return fig
 
-def mostrar_estadisticas_completas(x_datos, y_datos, polinomio, tabla):
+def mostrar_estadisticas_completas(x_datos, y_datos, coeficientes):
     """Muestra estadísticas completas del análisis"""
-    y_interpolados = evaluar_polinomio(polinomio, x_datos)
+    y_interpolados = evaluar_newton(x_datos, coeficientes, x_datos)
     errores = np.abs(y_datos - y_interpolados)
     
     col1, col2, col3, col4 = st.columns(4)
@@ -497,7 +665,7 @@ def mostrar_estadisticas_completas(x_datos, y_datos, polinomio, tabla):
     st.markdown("### 📊 Tabla de Valores Interpolados")
     n_tabla = min(20, len(x_datos) * 3)
     x_tabla = np.linspace(min(x_datos), max(x_datos), n_tabla)
-    y_tabla = evaluar_polinomio(polinomio, x_tabla)
+    y_tabla = evaluar_newton(x_datos, coeficientes, x_tabla)
     
     df_valores = pd.DataFrame({
         'X': x_tabla,
@@ -505,15 +673,16 @@ def mostrar_estadisticas_completas(x_datos, y_datos, polinomio, tabla):
     })
     st.dataframe(df_valores.style.format("{:.6f}"))
 
-def mostrar_desarrollo_completo_libro(x_datos, y_datos, tabla, polinomio, detalles):
+def mostrar_desarrollo_completo_libro(x_datos, y_datos, resultado):
     """
-    Muestra el desarrollo completo en formato de libro de texto
+    Muestra el desarrollo completo en formato de libro de texto (los
+    textos vienen del trabajo de interpolacion_completa)
     """
+    tabla, coeficientes = resultado['tabla'], resultado['coeficientes']
     st.markdown("### 📖 Desarrollo Completo del Ejercicio")
     st.info("Este es el desarrollo detallado como aparece en los libros de Métodos Numéricos")
     
-    # Generar desarrollo en texto
-    desarrollo_texto = generar_desarrollo_completo(x_datos, y_datos, tabla, polinomio, detalles)
+    desarrollo_texto = resultado['desarrollo']['txt']
     
     # Tabs para diferentes formatos
     tab1, tab2, tab3 = st.tabs(["📝 Texto Completo", "📊 Visualización", "🌐 Tabla HTML"])
@@ -527,30 +696,41 @@ def mostrar_desarrollo_completo_libro(x_datos, y_datos, tabla, polinomio, detall
             key="desarrollo_completo"
         )
         
-        # Botón para descargar
-        st.download_button(
-            label="📥 Descargar Desarrollo Completo (.txt)",
-            data=desarrollo_texto,
-            file_name="desarrollo_interpolacion_newton.txt",
-            mime="text/plain"
-        )
+        # Botones para descargar en distintos formatos
+        col_txt, col_md, col_tex = st.columns(3)
+        with col_txt:
+            st.download_button(
+                label="📥 Descargar Desarrollo Completo (.txt)",
+                data=desarrollo_texto,
+                file_name="desarrollo_interpolacion_newton.txt",
+                mime="text/plain"
+            )
+        with col_md:
+            st.download_button(
+                label="📥 Descargar en Markdown (.md)",
+                data=resultado['desarrollo']['md'],
+                file_name="desarrollo_interpolacion_newton.md",
+                mime="text/markdown"
+            )
+        with col_tex:
+            st.download_button(
+                label="📥 Descargar en LaTeX (.tex)",
+                data=resultado['desarrollo']['latex'],
+                file_name="desarrollo_interpolacion_newton.tex",
+                mime="application/x-tex"
+            )
     
     with tab2:
         st.markdown("#### Visualización Gráfica del Desarrollo")
         
         try:
-            fig_desarrollo = generar_desarrollo_visual(x_datos, y_datos, tabla, polinomio)
-            st.pyplot(fig_desarrollo)
-            
-            # Guardar figura
-            import io
-            buf = io.BytesIO()
-            fig_desarrollo.savefig(buf, format='png', dpi=150, bbox_inches='tight')
-            buf.seek(0)
+            # PNG en caché por conjunto de datos (no se redibuja en cada rerun)
+            png_desarrollo = desarrollo.generar_desarrollo_visual_png(x_datos, y_datos, tabla)
+            st.image(png_desarrollo, use_column_width=True)
             
             st.download_button(
                 label="📥 Descargar Visualización (.png)",
-                data=buf,
+                data=png_desarrollo,
                 file_name="desarrollo_visual_newton.png",
                 mime="image/png"
             )
@@ -560,15 +740,34 @@ def mostrar_desarrollo_completo_libro(x_datos, y_datos, tabla, polinomio, detall
     with tab3:
         st.markdown("#### Tabla de Diferencias Divididas (HTML)")
         
-        tabla_html = generar_tabla_html(x_datos, y_datos, tabla)
-        st.markdown(tabla_html, unsafe_allow_html=True)
+        n = len(x_datos)
+        tabla_grande = n > FILAS_VENTANA or n > COLUMNAS_VENTANA
         
-        st.download_button(
-            label="📥 Descargar Tabla HTML",
-            data=tabla_html,
-            file_name="tabla_diferencias_divididas.html",
-            mime="text/html"
-        )
+        if tabla_grande:
+            # Vista previa: solo la primera ventana de la tabla
+            st.caption(f"Vista previa de las primeras {FILAS_VENTANA} filas y {COLUMNAS_VENTANA} órdenes")
+            st.markdown(desarrollo.generar_tabla_html(x_datos, y_datos, tabla, 0, FILAS_VENTANA, 1, COLUMNAS_VENTANA),
+                        unsafe_allow_html=True)
+        else:
+            st.markdown(desarrollo.generar_tabla_html(x_datos, y_datos, tabla), unsafe_allow_html=True)
+        
+        # La exportación completa se arma solo cuando se pide (puede ser muy grande)
+        if not tabla_grande or st.checkbox("Preparar exportación completa", key="exportar_tabla_dd"):
+            col_html, col_csv = st.columns(2)
+            with col_html:
+                st.download_button(
+                    label="📥 Descargar Tabla HTML",
+                    data=desarrollo.generar_tabla_html(x_datos, y_datos, tabla),
+                    file_name="tabla_diferencias_divididas.html",
+                    mime="text/html"
+                )
+            with col_csv:
+                st.download_button(
+                    label="📥 Descargar Tabla CSV",
+                    data=desarrollo.generar_tabla_csv(x_datos, tabla),
+                    file_name="tabla_diferencias_divididas.csv",
+                    mime="text/csv"
+                )
     
     # Sección de ejemplo de evaluación
     st.markdown("---")
@@ -580,18 +779,14 @@ def mostrar_desarrollo_completo_libro(x_datos, y_datos, tabla, polinomio, detall
         st.markdown("#### Evaluación en x = 2.1")
         st.markdown("**Usando diferentes grados del polinomio:**")
         
-        from utils.interpolacion_newton import interpolacion_newton as interp_newton
-        
+        # El polinomio de grado g usa los primeros g+1 coeficientes de Newton
         for grado in range(1, min(4, len(x_datos))):
-            x_temp = x_datos[:grado+1]
-            y_temp = y_datos[:grado+1]
-            poli_temp, _, _ = interp_newton(x_temp, y_temp)
-            resultado = evaluar_polinomio(poli_temp, 2.1)
+            resultado = evaluar_newton(x_datos, coeficientes[:grado+1], 2.1)
             st.write(f"**P{grado}(2.1)** = {resultado:.10f}")
     
     with col_eval2:
         st.markdown("#### Resultado Final")
-        resultado_final = evaluar_polinomio(polinomio, 2.1)
+        resultado_final = evaluar_newton(x_datos, coeficientes, 2.1)
         st.success(f"**P{len(x_datos)-1}(2.1) = {resultado_final:.10f}**")
         
         st.markdown("**Interpretación:**")
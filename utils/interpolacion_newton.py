@@ -3,26 +3,35 @@ Módulo de Interpolación de Newton con Diferencias Divididas
 """
 import numpy as np
 import sympy as sp
+from utils.instrumentacion import medido, medir
+from utils.tabla_triangular import TablaTriangular
+from utils.trabajos import reportar_progreso
 
+@medido('newton.diferencias')
 def diferencias_divididas(x_datos, y_datos):
     """
     Calcula la tabla de diferencias divididas
     
+    Cada orden se calcula de una vez a partir del anterior y se guarda en
+    una TablaTriangular (solo las celdas i + j < n).
+    
     Returns:
-        tabla: matriz con las diferencias divididas
+        tabla: TablaTriangular con las diferencias divididas
         coeficientes: coeficientes del polinomio de Newton
     """
+    x_datos = np.asarray(x_datos, dtype=float)
     n = len(x_datos)
-    tabla = np.zeros((n, n))
-    tabla[:, 0] = y_datos
+    tabla = TablaTriangular(n)
+    tabla.columna(0)[:] = y_datos
     
     for j in range(1, n):
-        for i in range(n - j):
-            tabla[i][j] = (tabla[i+1][j-1] - tabla[i][j-1]) / (x_datos[i+j] - x_datos[i])
+        anterior = tabla.columna(j - 1)
+        tabla.columna(j)[:] = (anterior[1:] - anterior[:-1]) / (x_datos[j:] - x_datos[:n-j])
     
-    coeficientes = tabla[0, :]
+    coeficientes = tabla.fila(0)
     return tabla, coeficientes
 
+@medido('newton.polinomio')
 def interpolacion_newton(x_datos, y_datos):
     """
     Calcula el polinomio de interpolación de Newton
@@ -39,6 +48,7 @@ def interpolacion_newton(x_datos, y_datos):
     detalles = []
     
     for i in range(1, len(coeficientes)):
+        reportar_progreso(i / len(coeficientes), f"Término de orden {i}")
         termino = coeficientes[i]
         producto = 1
         
@@ -54,7 +64,8 @@ def interpolacion_newton(x_datos, y_datos):
             'termino': termino_completo
         })
     
-    polinomio = sp.expand(polinomio)
+    with medir('sympy.expand'):
+        polinomio = sp.expand(polinomio)
     return polinomio, tabla, detalles
 
 def evaluar_polinomio(polinomio, valores_x):
@@ -62,5 +73,99 @@ def evaluar_polinomio(polinomio, valores_x):
     Evalúa el polinomio en un conjunto de valores
     """
     x = sp.Symbol('x')
-    f = sp.lambdify(x, polinomio, 'numpy')
+    with medir('sympy.lambdify'):
+        f = sp.lambdify(x, polinomio, 'numpy')
     return f(valores_x)
+
+def terminos_expandidos(x_datos, coeficientes):
+    """
+    Genera cada término de Newton ya expandido, sin usar SymPy
+
+    El producto (x-x0)(x-x1)...(x-x_{i-1}) se lleva como arreglo de
+    coeficientes y se multiplica por (x - x_i) en cada paso, así que
+    expandir todos los términos cuesta O(n^2) operaciones numéricas.
+
+    Yields:
+        (i, termino): termino es un array de coeficientes en potencias
+        crecientes (termino[k] acompaña a x**k)
+    """
+    n = len(coeficientes)
+    base = np.zeros(n)
+    base[0] = 1.0
+
+    for i in range(n):
+        yield i, coeficientes[i] * base[:i+1]
+        if i < n - 1:
+            # base <- base * (x - x_i)
+            base[1:i+2] = base[:i+1] - x_datos[i] * base[1:i+2]
+            base[0] = -x_datos[i] * base[0]
+
+def coeficientes_expandidos(x_datos, coeficientes):
+    """
+    Convierte los coeficientes de Newton a la forma expandida
+
+    Returns:
+        array con los coeficientes en potencias crecientes (a0 + a1*x + ...)
+    """
+    resultado = np.zeros(len(coeficientes))
+    for i, termino in terminos_expandidos(x_datos, coeficientes):
+        resultado[:i+1] += termino
+    return resultado
+
+def evaluar_newton(x_datos, coeficientes, valores_x):
+    """
+    Evalúa la forma de Newton con el esquema anidado (Horner)
+
+    Funciona con escalares o arrays de valores_x y usa solo los primeros
+    len(coeficientes) nodos, así que evaluar_newton(x, coef[:g+1], v)
+    da directamente el polinomio de grado g.
+    """
+    valores_x = np.asarray(valores_x, dtype=float)
+    resultado = np.full(valores_x.shape, coeficientes[-1], dtype=float)
+    for k in range(len(coeficientes) - 2, -1, -1):
+        resultado = resultado * (valores_x - x_datos[k]) + coeficientes[k]
+    if resultado.ndim == 0:
+        return float(resultado)
+    return resultado
+
+def interpolacion_completa(x_datos, y_datos):
+    """
+    Todo lo que muestra la interfaz de una interpolación, calculado de una
+    vez para correr como trabajo en segundo plano: el polinomio en sus
+    formas expandida y simplificada (ya en LaTeX), los coeficientes y el
+    desarrollo tipo libro en texto, Markdown y LaTeX
+
+    Returns:
+        dict con 'polinomio', 'tabla', 'detalles' (cada uno con su
+        'latex'), 'coeficientes', 'expandido', 'simplificado',
+        'latex_expandido', 'latex_simplificado' y 'desarrollo'
+        ({'txt', 'md', 'latex'} -> texto)
+    """
+    # generador_desarrollo importa este módulo
+    from utils.generador_desarrollo import generar_desarrollo_completo
+
+    polinomio, tabla, detalles = interpolacion_newton(x_datos, y_datos)
+    reportar_progreso(0.95, "Simplificando")
+    with medir('sympy.expand'):
+        expandido = sp.expand(polinomio)
+    with medir('sympy.simplify'):
+        simplificado = sp.simplify(expandido)
+    with medir('sympy.latex'):
+        latex_expandido, latex_simplificado = sp.latex(expandido), sp.latex(simplificado)
+        for detalle in detalles:
+            detalle['latex'] = sp.latex(detalle['termino'])
+
+    reportar_progreso(0.98, "Desarrollo")
+    desarrollo = {formato: generar_desarrollo_completo(x_datos, y_datos, tabla, formato=formato)
+                  for formato in ('txt', 'md', 'latex')}
+    return {
+        'polinomio': polinomio,
+        'tabla': tabla,
+        'detalles': detalles,
+        'coeficientes': np.asarray(tabla[0, :], dtype=float),
+        'expandido': expandido,
+        'simplificado': simplificado,
+        'latex_expandido': latex_expandido,
+        'latex_simplificado': latex_simplificado,
+        'desarrollo': desarrollo,
+    }
@@ -0,0 +1,213 @@
+"""
+Extracción de tablas por lotes: una carpeta o un ZIP de fotos de ejercicios
+
+Las imágenes se leen y decodifican por adelantado en un pool de hilos
+mientras el OCR procesa las anteriores, y todas comparten los lectores
+de utils.pool_easyocr (los modelos se cargan una sola vez para el lote).
+El resultado se puede escribir como CSV o JSONL con una fila por archivo.
+"""
+import csv
+import io
+import json
+import os
+import time
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.ocr_pipeline import MAX_HILOS, CONFIGURACION_POR_DEFECTO, ContextoImagen, cargar_para, ejecutar_pipeline
+from utils.pool_easyocr import TAMANO_POOL
+from utils.registro import en_contexto, obtener_registro, registrar_tiempos, solicitud
+from utils.trabajos import reportar_progreso
+
+log = obtener_registro(__name__)
+
+EXTENSIONES = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+
+# Columnas de la salida, en orden
+COLUMNAS = ('archivo', 'x', 'y', 'confianza', 'motor', 'variante', 'segundos', 'desde_cache', 'error')
+
+def _es_imagen(nombre):
+    base = os.path.basename(nombre)
+    return (base.lower().endswith(EXTENSIONES) and not base.startswith('.')
+            and '__MACOSX' not in nombre)
+
+def listar_imagenes(origen):
+    """
+    Enumera las imágenes de una carpeta o de un ZIP
+
+    Args:
+        origen: ruta de una carpeta, ruta de un .zip o bytes de un .zip
+
+    Returns:
+        lista de (nombre, leer), donde leer() devuelve los bytes del archivo
+    """
+    if isinstance(origen, (bytes, bytearray)):
+        origen = io.BytesIO(origen)
+    elif os.path.isdir(origen):
+        rutas = []
+        for raiz, _, archivos in os.walk(origen):
+            rutas.extend(os.path.join(raiz, a) for a in archivos if _es_imagen(a))
+
+        def leer_archivo(ruta):
+            with open(ruta, 'rb') as f:
+                return f.read()
+        return [(os.path.relpath(r, origen), lambda r=r: leer_archivo(r)) for r in sorted(rutas)]
+
+    # ZipFile admite lecturas desde varios hilos sobre el mismo archivo
+    archivo_zip = zipfile.ZipFile(origen)
+    nombres = sorted(n for n in archivo_zip.namelist() if not n.endswith('/') and _es_imagen(n))
+    return [(n, lambda n=n: archivo_zip.read(n)) for n in nombres]
+
+def _decodificar(leer, config):
+    """
+    Lee y decodifica una imagen (corre en el pool de lectura)
+
+    Returns:
+        (bytes, ContextoImagen)
+    """
+    datos = leer()
+    return datos, ContextoImagen(cargar_para(datos, config))
+
+def _procesar(nombre, pendiente, config):
+    """Espera la decodificación de una imagen y ejecuta el OCR sobre ella"""
+    inicio = time.perf_counter()
+    fila = dict.fromkeys(COLUMNAS)
+    fila['archivo'] = nombre
+    try:
+        datos, contexto = pendiente.result()
+        # La caché de OCR la consulta el pipeline con la huella de los bytes
+        res = ejecutar_pipeline(datos, config, contexto=contexto)
+    except Exception as e:
+        log.warning("No se pudo procesar %s: %s", nombre, e)
+        fila.update({'error': str(e), 'desde_cache': False, 'segundos': time.perf_counter() - inicio})
+        return fila, {}
+
+    fila.update({campo: res[campo] for campo in ('x', 'y', 'confianza', 'motor', 'variante')})
+    fila['desde_cache'] = bool(res.get('desde_cache'))
+    fila['segundos'] = time.perf_counter() - inicio
+    return fila, ({} if fila['desde_cache'] else res['tiempos'])
+
+def procesar_lote(origen, config=CONFIGURACION_POR_DEFECTO, salida=None, hilos=MAX_HILOS,
+                  simultaneas=TAMANO_POOL):
+    """
+    Extrae la tabla de cada imagen de una carpeta o ZIP
+
+    Args:
+        origen: carpeta, ruta de .zip o bytes de un .zip
+        config: configuración del pipeline (ver ocr_pipeline.CONFIGURACIONES)
+        salida: ruta opcional .csv o .jsonl donde escribir las filas
+        hilos: hilos que leen y decodifican imágenes por adelantado
+        simultaneas: imágenes en OCR a la vez (por defecto, una por lector
+            del pool de EasyOCR)
+
+    Returns:
+        dict con 'filas' (una por archivo, columnas COLUMNAS) y 'metricas'
+    """
+    # Los registros de todas las imágenes del lote comparten id
+    with solicitud():
+        return _procesar_lote(origen, config, salida, hilos, simultaneas)
+
+def _procesar_lote(origen, config, salida, hilos, simultaneas):
+    imagenes = listar_imagenes(origen)
+    total = len(imagenes)
+    inicio = time.perf_counter()
+    filas = []
+    tiempos = {}
+    reportar_progreso(0.0, f"0/{total} imágenes")
+
+    # Se decodifican a lo sumo `anticipo` imágenes por delante del OCR para acotar la memoria
+    anticipo = max(2, hilos) + simultaneas
+    with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="lote_leer") as lectura, \
+            ThreadPoolExecutor(max_workers=simultaneas, thread_name_prefix="lote_ocr") as ocr:
+        cola = iter(imagenes)
+        en_curso = deque()
+
+        def encolar():
+            for nombre, leer in cola:
+                pendiente = lectura.submit(en_contexto(_decodificar), leer, config)
+                en_curso.append(ocr.submit(en_contexto(_procesar), nombre, pendiente, config))
+                return True
+            return False
+
+        while len(en_curso) < anticipo and encolar():
+            pass
+
+        # Las filas salen en el orden de los archivos aunque terminen desordenadas
+        try:
+            while en_curso:
+                fila, tiempos_imagen = en_curso.popleft().result()
+                filas.append(fila)
+                for etapa, t in tiempos_imagen.items():
+                    tiempos[etapa] = tiempos.get(etapa, 0.0) + t
+                encolar()
+                reportar_progreso(len(filas) / total, f"{len(filas)}/{total} imágenes")
+        except BaseException:
+            # Trabajo cancelado: no se empiezan las imágenes que faltan
+            for futuro in en_curso:
+                futuro.cancel()
+            raise
+
+    segundos = time.perf_counter() - inicio
+    extraidas = sum(1 for f in filas if f['x'])
+    metricas = {
+        'imagenes': total,
+        'extraidas': extraidas,
+        'fallidas': total - extraidas,
+        'desde_cache': sum(1 for f in filas if f['desde_cache']),
+        'segundos': segundos,
+        'imagenes_por_segundo': total / segundos if segundos > 0 else 0.0,
+        'tiempos': tiempos,
+    }
+
+    registrar_tiempos(log, 'lote', **{k: v for k, v in metricas.items() if k != 'tiempos'})
+
+    if salida:
+        escribir_resultados(filas, salida)
+    return {'filas': filas, 'metricas': metricas}
+
+def _valor_texto(valor):
+    """Listas como JSON y el resto tal cual (para CSV)"""
+    if isinstance(valor, (list, tuple)):
+        return json.dumps(list(valor))
+    return '' if valor is None else valor
+
+def filas_a_csv(filas):
+    """
+    Texto CSV con una fila por archivo (x e y como listas JSON)
+    """
+    texto = io.StringIO()
+    escritor = csv.DictWriter(texto, fieldnames=COLUMNAS)
+    escritor.writeheader()
+    for fila in filas:
+        escritor.writerow({c: _valor_texto(fila.get(c)) for c in COLUMNAS})
+    return texto.getvalue()
+
+def filas_a_jsonl(filas):
+    """
+    Texto JSONL con un objeto por archivo
+    """
+    return ''.join(json.dumps({c: fila.get(c) for c in COLUMNAS}, ensure_ascii=False) + '\n'
+                   for fila in filas)
+
+def escribir_resultados(filas, salida):
+    """
+    Escribe las filas en CSV o JSONL según la extensión de `salida`
+    """
+    texto = filas_a_jsonl(filas) if salida.lower().endswith(('.jsonl', '.json')) else filas_a_csv(filas)
+    with open(salida, 'w', encoding='utf-8', newline='') as f:
+        f.write(texto)
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.lote_ocr carpeta_o_zip [salida.csv|salida.jsonl] [configuracion]")
+        sys.exit(1)
+    salida = sys.argv[2] if len(sys.argv) > 2 else None
+    config = sys.argv[3] if len(sys.argv) > 3 else CONFIGURACION_POR_DEFECTO
+    lote = procesar_lote(sys.argv[1], config, salida)
+    m = lote['metricas']
+    print(f"{m['extraidas']}/{m['imagenes']} tablas extraídas en {m['segundos']:.1f} s "
+          f"({m['imagenes_por_segundo']:.2f} imágenes/s, {m['desde_cache']} desde caché)")
+    etapas = ', '.join(f"{k}={v:.1f}s" for k, v in m['tiempos'].items() if k != 'total')
+    print(f"Tiempo acumulado por etapa: {etapas}")
@@ -0,0 +1,51 @@
+"""
+Módulo de Descomposición LU (método de Doolittle)
+"""
+import numpy as np
+from utils.instrumentacion import medido
+from utils.trabajos import reportar_progreso
+
+@medido('lu.factorizar')
+def descomposicion_lu(A, b):
+    """
+    Descompone A = L·U y resuelve el sistema Ax = b
+
+    Args:
+        A: matriz cuadrada (numpy array)
+        b: vector de términos independientes
+
+    Returns:
+        L: matriz triangular inferior
+        U: matriz triangular superior
+        x: vector solución
+    """
+    n = len(A)
+    L = np.zeros((n, n))
+    U = np.zeros((n, n))
+
+    # --- Cálculo manual LU ---
+    for i in range(n):
+        reportar_progreso(i / n, f"Fila {i+1} de {n}")
+        # Calcular U
+        for k in range(i, n):
+            suma = sum(L[i][j] * U[j][k] for j in range(i))
+            U[i][k] = A[i][k] - suma
+        # Calcular L
+        for k in range(i, n):
+            if i == k:
+                L[i][i] = 1
+            else:
+                suma = sum(L[k][j] * U[j][i] for j in range(i))
+                L[k][i] = (A[k][i] - suma) / U[i][i]
+
+    # --- Sustitución hacia adelante (Ly = b) ---
+    y = np.zeros(n)
+    for i in range(n):
+        y[i] = b[i] - np.dot(L[i, :i], y[:i])
+
+    # --- Sustitución hacia atrás (Ux = y) ---
+    x = np.zeros(n)
+    for i in range(n-1, -1, -1):
+        x[i] = (y[i] - np.dot(U[i, i+1:], x[i+1:])) / U[i][i]
+
+    return L, U, x
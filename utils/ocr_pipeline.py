@@ -0,0 +1,1369 @@
+"""
+Pipeline unificado de OCR para tablas de interpolación
+
+Etapas: cargar → preprocesar → detectar → reconocer → organizar
+
+Cada módulo de OCR histórico (definitivo, rápido, real, directo,
+profesional, ultra) queda descrito como una configuración de este
+pipeline en CONFIGURACIONES. Los pasos de preprocesamiento se memorizan
+por imagen, así que las variantes que comparten pasos (gris, CLAHE,
+denoise...) los calculan una sola vez; cada paso se libera en cuanto lo
+usaron todos los que dependen de él y su memoria se reutiliza (dst=) en
+los pasos siguientes.
+"""
+import atexit
+import io
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from utils import cache_ocr, instrumentacion
+from utils.fusion_ocr import ACUERDO_SALIDA, SOPORTE_MINIMO, fusionar
+from utils.organizador import agrupar_filas, dividir_lista, organizar
+from utils.pool_easyocr import MODO_LIGERO, lector_ocr
+from utils.registro import en_contexto, obtener_registro, registrar_tiempos, solicitud
+from utils.table_detector import enderezar, region_tabla
+
+try:
+    import fcntl
+except ImportError:   # Windows
+    fcntl = None
+
+log = obtener_registro(__name__)
+
+# Hilos para preprocesar y para reconocer (OpenCV, Torch y Tesseract liberan el GIL)
+MAX_HILOS = max(1, int(os.environ.get('MN_HILOS_OCR', os.cpu_count() or 2)))
+
+_candado = threading.Lock()
+_pools = {}
+
+def _pool_hilos(nombre):
+    """
+    Pool de hilos compartido por etapa ('preprocesar' o 'reconocer')
+
+    Van separados para que los hilos que esperan un lector de EasyOCR no
+    dejen sin hilos al preprocesamiento.
+    """
+    with _candado:
+        if nombre not in _pools:
+            _pools[nombre] = ThreadPoolExecutor(max_workers=MAX_HILOS, thread_name_prefix=f"ocr_{nombre}")
+        return _pools[nombre]
+
+def _sumar_tiempo(tiempos, etapa, segundos):
+    with _candado:
+        tiempos[etapa] = tiempos.get(etapa, 0.0) + segundos
+
+# ==================== PASOS DE PREPROCESAMIENTO ====================
+
+class Paso(namedtuple('Paso', ['nombre', 'parametros'])):
+    """
+    Descripción inmutable (y usable como clave) de un paso de preprocesamiento
+    """
+    __slots__ = ()
+
+    def __repr__(self):
+        args = ', '.join(f"{k}={v!r}" for k, v in self.parametros)
+        return f"{self.nombre}({args})"
+
+def P(nombre, **parametros):
+    """Atajo para construir un Paso: P('clahe', clip=3.0, fuente=P('base'))"""
+    return Paso(nombre, tuple(sorted(parametros.items())))
+
+# Marcador de la imagen escalada de la configuración activa
+BASE = P('base')
+
+def _paso_escalar(ctx, alto_minimo=0, ancho_minimo=0, fuente=P('gris')):
+    gray = ctx.obtener(fuente)
+    h, w = gray.shape
+    if h < alto_minimo or w < ancho_minimo:
+        escala = max(alto_minimo / h, ancho_minimo / w)
+        tamano = (round(w * escala), round(h * escala))
+        gray = cv2.resize(gray, tamano, dst=ctx.buffer(tamano[::-1]), interpolation=cv2.INTER_CUBIC)
+    return gray
+
+def estimar_alto_texto(gray):
+    """
+    Alto típico (mediana, en píxeles) de los caracteres de la imagen, o
+    None si no se encuentran componentes con forma de texto
+
+    Se mide sobre una miniatura de ~1000 px para que cueste poco aunque
+    la foto sea de 12 MP.
+    """
+    h, w = gray.shape
+    factor = max(1.0, max(h, w) / 1000)
+    mini = cv2.resize(gray, (int(w / factor), int(h / factor)), interpolation=cv2.INTER_AREA) if factor > 1 else gray
+    _, binaria = cv2.threshold(mini, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(binaria, connectivity=8)
+    alturas = stats[1:, cv2.CC_STAT_HEIGHT]
+    anchos = stats[1:, cv2.CC_STAT_WIDTH]
+    # Descarta ruido (muy pequeño) y líneas o manchas (muy altas o muy anchas)
+    texto = ((alturas >= 4) & (alturas <= mini.shape[0] / 8) & (anchos <= mini.shape[1] / 8)
+             & (stats[1:, cv2.CC_STAT_AREA] >= 8))
+    if np.count_nonzero(texto) < 3:
+        return None
+    return float(np.median(alturas[texto])) * factor
+
+def _paso_reducir(ctx, fuente, lado_maximo=0, alto_texto=0):
+    """
+    Reduce fotos grandes: el texto queda de unos alto_texto píxeles y el
+    lado mayor no pasa de lado_maximo (nunca amplía)
+    """
+    gray = ctx.obtener(fuente)
+    h, w = gray.shape
+    escala = 1.0
+    if lado_maximo:
+        escala = min(escala, lado_maximo / max(h, w))
+    if alto_texto:
+        alto_actual = estimar_alto_texto(gray)
+        if alto_actual:
+            escala = min(escala, alto_texto / alto_actual)
+    if escala < 1.0:
+        tamano = (max(1, int(w * escala)), max(1, int(h * escala)))
+        gray = cv2.resize(gray, tamano, dst=ctx.buffer(tamano[::-1]), interpolation=cv2.INTER_AREA)
+    return gray
+
+def _paso_enderezar(ctx, fuente):
+    """Corrige perspectiva o inclinación una sola vez, antes de todas las variantes"""
+    return enderezar(ctx.obtener(fuente))
+
+def _paso_recortar(ctx, fuente):
+    """Recorta a la región de la tabla (por sus líneas); si no hay líneas, no recorta"""
+    gray = ctx.obtener(fuente)
+    region = region_tabla(gray)
+    if region is None:
+        return gray
+    x, y, w, h = region
+    return gray[y:y + h, x:x + w]
+
+# Los pasos escriben en ctx.buffer() (memoria de un paso ya liberado) o,
+# si son operaciones píxel a píxel, en ctx.destino() (la propia fuente
+# cuando nadie más la necesita). Si no hay nada que reutilizar, OpenCV
+# reserva memoria nueva como siempre.
+
+def _paso_gris(ctx):
+    img = ctx.imagen
+    if img.ndim == 3:
+        return cv2.cvtColor(img, cv2.COLOR_RGB2GRAY, dst=ctx.buffer(img.shape[:2]))
+    return img
+
+def _paso_clahe(ctx, fuente, clip=3.0):
+    clahe = cv2.createCLAHE(clipLimit=clip, tileGridSize=(8, 8))
+    img = ctx.obtener(fuente)
+    return clahe.apply(img, dst=ctx.buffer(img.shape))
+
+def _paso_denoise(ctx, fuente, h=10):
+    img = ctx.obtener(fuente)
+    return cv2.fastNlMeansDenoising(img, ctx.buffer(img.shape), h=h, templateWindowSize=7, searchWindowSize=21)
+
+def _paso_nitidez(ctx, fuente, centro=9):
+    kernel = np.array([[-1, -1, -1], [-1, centro, -1], [-1, -1, -1]])
+    img = ctx.obtener(fuente)
+    return cv2.filter2D(img, -1, kernel, dst=ctx.buffer(img.shape))
+
+def _paso_otsu(ctx, fuente):
+    img = ctx.obtener(fuente)
+    _, binaria = cv2.threshold(img, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=ctx.destino(fuente))
+    return binaria
+
+def _paso_adaptativo(ctx, fuente, bloque=11, c=2):
+    img = ctx.obtener(fuente)
+    return cv2.adaptiveThreshold(img, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+                                 cv2.THRESH_BINARY, bloque, c, dst=ctx.buffer(img.shape))
+
+def _paso_invertir(ctx, fuente):
+    img = ctx.obtener(fuente)
+    return cv2.bitwise_not(img, dst=ctx.destino(fuente))
+
+def _paso_morfologia(ctx, fuente, operacion, k=2, iteraciones=1):
+    kernel = np.ones((k, k), np.uint8)
+    operaciones = {
+        'cierre': lambda img, dst: cv2.morphologyEx(img, cv2.MORPH_CLOSE, kernel, dst=dst, iterations=iteraciones),
+        'apertura': lambda img, dst: cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel, dst=dst, iterations=iteraciones),
+        'erosion': lambda img, dst: cv2.erode(img, kernel, dst=dst, iterations=iteraciones),
+        'dilatacion': lambda img, dst: cv2.dilate(img, kernel, dst=dst, iterations=iteraciones),
+    }
+    return operaciones[operacion](ctx.obtener(fuente), ctx.destino(fuente))
+
+def _paso_bilateral(ctx, fuente, d=9, sigma=75):
+    img = ctx.obtener(fuente)
+    return cv2.bilateralFilter(img, d, sigma, sigma, dst=ctx.buffer(img.shape))
+
+PASOS = {
+    'gris': _paso_gris,
+    'escalar': _paso_escalar,
+    'reducir': _paso_reducir,
+    'enderezar': _paso_enderezar,
+    'recortar': _paso_recortar,
+    'clahe': _paso_clahe,
+    'denoise': _paso_denoise,
+    'nitidez': _paso_nitidez,
+    'otsu': _paso_otsu,
+    'adaptativo': _paso_adaptativo,
+    'invertir': _paso_invertir,
+    'morfologia': _paso_morfologia,
+    'bilateral': _paso_bilateral,
+}
+
+# Buffers libres que se guardan por forma para reutilizar (el resto se suelta)
+BUFFERS_POR_FORMA = 2
+
+def _fuentes(paso):
+    """Pasos de los que depende directamente un paso"""
+    return [v for _, v in paso.parametros if isinstance(v, Paso)]
+
+def _raiz(arr):
+    """Array dueño de la memoria (los recortes son vistas de otro array)"""
+    while isinstance(arr.base, np.ndarray):
+        arr = arr.base
+    return arr
+
+class ContextoImagen:
+    """
+    Imagen de entrada más la memoria de pasos ya calculados
+
+    Es seguro usarlo desde varios hilos: si dos variantes piden el mismo
+    paso a la vez, una lo calcula y la otra espera el resultado.
+
+    Con planificar() se indica qué variantes se van a consumir; cada paso
+    intermedio se libera cuando lo usaron todos los pasos que dependen de
+    él y cada variante cuando su consumidor llama a consumir(). La memoria
+    liberada vuelve a usarse como destino (dst=) de los pasos siguientes.
+    Con liberar=False se conserva todo, para reutilizar el contexto entre
+    configuraciones sin recalcular pasos.
+    """
+
+    def __init__(self, imagen, liberar=True):
+        self.imagen = imagen
+        self.liberar = liberar
+        self._pasos = {}
+        self._pendientes = {}   # paso planificado -> usos que faltan
+        self._planificados = set()  # pasos cuyas fuentes ya se contaron
+        self._raices = {}       # id(raíz) -> [raíz, pasos vivos que la usan]
+        self._libres = {}       # (forma, dtype) -> buffers sin usar
+        self._candado = threading.Lock()
+        self._memoria = imagen.nbytes
+        self.memoria_pico = imagen.nbytes
+        self.reutilizados = 0
+
+    def planificar(self, pasos):
+        """
+        Anota que cada paso de `pasos` se consumirá una vez desde fuera;
+        sus fuentes, una vez por cada paso que depende de ellas
+        """
+        if not self.liberar:
+            return
+        with self._candado:
+            pila = []
+            for paso in pasos:
+                self._pendientes[paso] = self._pendientes.get(paso, 0) + 1
+                pila.append(paso)
+            while pila:
+                paso = pila.pop()
+                if paso in self._planificados:
+                    continue
+                self._planificados.add(paso)
+                for fuente in _fuentes(paso):
+                    self._pendientes[fuente] = self._pendientes.get(fuente, 0) + 1
+                    pila.append(fuente)
+
+    def obtener(self, paso):
+        """Devuelve el resultado de un paso, calculándolo solo la primera vez"""
+        with self._candado:
+            futuro = self._pasos.get(paso)
+            propio = futuro is None
+            if propio:
+                futuro = self._pasos[paso] = Future()
+
+        if propio:
+            try:
+                resultado = PASOS[paso.nombre](self, **dict(paso.parametros))
+            except BaseException as e:
+                futuro.set_exception(e)
+                raise
+            self._registrar(resultado)
+            futuro.set_result(resultado)
+            if paso in self._planificados:
+                for fuente in _fuentes(paso):
+                    self.consumir(fuente)
+        return futuro.result()
+
+    def consumir(self, paso):
+        """Marca un uso de `paso`; en el último se libera su memoria"""
+        with self._candado:
+            restantes = self._pendientes.get(paso)
+            if restantes is None:
+                return
+            if restantes > 1:
+                self._pendientes[paso] = restantes - 1
+                return
+            del self._pendientes[paso]
+            self._planificados.discard(paso)
+            futuro = self._pasos.pop(paso, None)
+            if futuro is None or not futuro.done() or futuro.exception() is not None:
+                return
+            self._soltar(futuro.result())
+
+    def buffer(self, forma, dtype=np.uint8):
+        """Buffer libre con esa forma para usar como dst=, o None"""
+        with self._candado:
+            libres = self._libres.get((tuple(forma), np.dtype(dtype)))
+            if not libres:
+                return None
+            self.reutilizados += 1
+            buffer = libres.pop()
+            # Se vuelve a contar cuando se registre el paso que lo usa
+            self._memoria -= buffer.nbytes
+            return buffer
+
+    def destino(self, fuente):
+        """
+        dst= para una operación píxel a píxel sobre `fuente`: la propia
+        fuente si este es su último uso y nadie más comparte su memoria,
+        si no un buffer libre de la misma forma
+        """
+        with self._candado:
+            img = self._pasos[fuente].result()
+            raiz = _raiz(img)
+            if (self._pendientes.get(fuente) == 1 and raiz is not _raiz(self.imagen)
+                    and self._raices[id(raiz)][1] == 1
+                    and img.flags.c_contiguous and img.flags.writeable):
+                self.reutilizados += 1
+                return img
+        return self.buffer(img.shape, img.dtype)
+
+    def _registrar(self, img):
+        """Cuenta un paso vivo más sobre la memoria de `img`"""
+        raiz = _raiz(img)
+        with self._candado:
+            entrada = self._raices.get(id(raiz))
+            if entrada is not None:
+                entrada[1] += 1
+                return
+            self._raices[id(raiz)] = [raiz, 1]
+            if raiz is not _raiz(self.imagen):
+                self._memoria += raiz.nbytes
+                self.memoria_pico = max(self.memoria_pico, self._memoria)
+
+    def _soltar(self, img):
+        """Resta un paso vivo sobre la memoria de `img` (con el candado tomado)"""
+        raiz = _raiz(img)
+        entrada = self._raices.get(id(raiz))
+        if entrada is None:
+            return
+        entrada[1] -= 1
+        if entrada[1] > 0:
+            return
+        del self._raices[id(raiz)]
+        if raiz is _raiz(self.imagen):
+            return
+        libres = self._libres.setdefault((raiz.shape, raiz.dtype), [])
+        if raiz.flags.c_contiguous and raiz.flags.writeable and len(libres) < BUFFERS_POR_FORMA:
+            libres.append(raiz)
+        else:
+            self._memoria -= raiz.nbytes
+
+def _sustituir_base(paso, base):
+    """Reemplaza BASE por el paso de escalado de la configuración"""
+    if paso == BASE:
+        return base
+    parametros = tuple((k, _sustituir_base(v, base) if isinstance(v, Paso) else v)
+                       for k, v in paso.parametros)
+    return Paso(paso.nombre, parametros)
+
+# ==================== CONFIGURACIONES ====================
+
+# Limpieza de caracteres que el OCR confunde con dígitos
+REEMPLAZOS = {
+    'basico': {',': '.', 'O': '0', 'o': '0'},
+    # Lo que hacía ocr_definitivo con EasyOCR (con Tesseract usaba 'basico')
+    'basico_l': {',': '.', 'O': '0', 'o': '0', 'l': '1'},
+    'medio': {',': '.', 'O': '0', 'o': '0', 'l': '1', 'I': '1', 'S': '5', 's': '5'},
+    'agresivo': {
+        ',': '.', 'O': '0', 'o': '0', 'l': '1', 'I': '1',
+        'S': '5', 's': '5', 'Z': '2', 'z': '2', 'B': '8',
+        'G': '6', 'T': '7', '|': '1', 'i': '1', 'D': '0'
+    },
+}
+
+_clahe3 = P('clahe', fuente=BASE, clip=3.0)
+_prof_mejorado = P('clahe', fuente=P('denoise', fuente=BASE, h=15), clip=4.0)
+_prof_nitidez = P('nitidez', fuente=_prof_mejorado)
+_prof_binaria = P('adaptativo', fuente=_prof_nitidez, bloque=15, c=3)
+_ultra_mejorado = P('clahe', fuente=P('denoise', fuente=BASE, h=20), clip=5.0)
+_ultra_v1 = P('nitidez', fuente=_ultra_mejorado, centro=10)
+_ultra_otsu = P('otsu', fuente=_ultra_v1)
+_ultra_adapt = P('adaptativo', fuente=_ultra_v1, bloque=21, c=5)
+
+# Antes de escalar: reducir fotos grandes, enderezar fotos inclinadas o en
+# perspectiva y recortar a la tabla (ver _pasos_variantes)
+ACOTAR = {'lado_maximo': 2000, 'alto_texto': 48, 'enderezar': True, 'recortar_tabla': True}
+
+CONFIGURACIONES = {
+    # Una sola lectura sobre CLAHE; Tesseract sobre Otsu como respaldo.
+    # 'reemplazos_easyocr', si está, reemplaza a 'reemplazos' con EasyOCR
+    'definitivo': {
+        'alto_minimo': 600, 'ancho_minimo': 0, **ACOTAR,
+        'variantes': [('CLAHE', _clahe3)],
+        'variantes_tesseract': [('Otsu', P('otsu', fuente=_clahe3))],
+        'motores': ['easyocr', 'tesseract'],
+        'pasadas_easyocr': [{}],
+        'config_tesseract': ['--psm 6'],
+        'confianza_minima': 0.3, 'reemplazos': 'basico', 'reemplazos_easyocr': 'basico_l',
+        'combinar': 'mejor', 'tolerancia_fila': 40,
+    },
+    'rapido': {
+        'alto_minimo': 500, 'ancho_minimo': 500, **ACOTAR,
+        'variantes': [('CLAHE', _clahe3)],
+        'variantes_tesseract': [('Otsu', P('otsu', fuente=_clahe3))],
+        'motores': ['easyocr', 'tesseract'],
+        'pasadas_easyocr': [{}],
+        'config_tesseract': ['--psm 6'],
+        'confianza_minima': 0.3, 'reemplazos': 'basico',
+        'combinar': 'mejor', 'tolerancia_fila': 40,
+    },
+    'real': {
+        'alto_minimo': 400, 'ancho_minimo': 400, **ACOTAR,
+        'variantes': [('Gris', BASE)],
+        'variantes_tesseract': [('Otsu', P('otsu', fuente=BASE))],
+        'motores': ['easyocr', 'tesseract'],
+        'pasadas_easyocr': [{}],
+        'config_tesseract': ['--psm 6 -c tessedit_char_whitelist=0123456789.,-'],
+        'confianza_minima': 0.2, 'reemplazos': 'basico',
+        'combinar': 'mejor', 'tolerancia_fila': 30,
+    },
+    'directo': {
+        'alto_minimo': 300, 'ancho_minimo': 300, **ACOTAR,
+        'variantes': [
+            ('CLAHE', _clahe3),
+            ('Denoise+CLAHE', P('clahe', fuente=P('denoise', fuente=BASE, h=10), clip=3.0)),
+            ('Otsu', P('otsu', fuente=BASE)),
+            ('Adaptativo', P('adaptativo', fuente=BASE, bloque=11, c=2)),
+            ('Morfología', P('morfologia', fuente=P('otsu', fuente=BASE), operacion='cierre')),
+        ],
+        'motores': ['easyocr', 'tesseract'],
+        'pasadas_easyocr': [{'paragraph': False}],
+        'config_tesseract': ['--psm 6 --oem 3 -c tessedit_char_whitelist=0123456789.,-'],
+        'confianza_minima': 0.3, 'reemplazos': {',': '.'},
+        'combinar': 'votacion', 'tolerancia_fila': 40,
+    },
+    'profesional': {
+        'alto_minimo': 600, 'ancho_minimo': 600, **ACOTAR,
+        'variantes': [
+            ('Original mejorado', _prof_mejorado),
+            ('Binarizado', _prof_binaria),
+            ('Limpio', P('morfologia', operacion='apertura',
+                         fuente=P('morfologia', fuente=_prof_binaria, operacion='cierre'))),
+            ('Sharpened', _prof_nitidez),
+        ],
+        'motores': ['easyocr', 'tesseract'],
+        'pasadas_easyocr': [{'paragraph': False, 'min_size': 10, 'text_threshold': 0.3}],
+        'config_tesseract': ['--psm 6 --oem 3', '--psm 4 --oem 3', '--psm 11 --oem 3'],
+        'confianza_minima': 0.0, 'reemplazos': 'medio',
+        'combinar': 'votacion', 'tolerancia_fila': 40,
+    },
+    'ultra': {
+        'alto_minimo': 800, 'ancho_minimo': 800, **ACOTAR,
+        'variantes': [
+            ('Ultra Enhanced', _ultra_v1),
+            ('Otsu', _ultra_otsu),
+            ('Adaptativo', _ultra_adapt),
+            ('Invertido', P('invertir', fuente=_ultra_adapt)),
+            ('Morfología', P('morfologia', operacion='apertura', k=3,
+                             fuente=P('morfologia', fuente=_ultra_otsu, operacion='cierre', k=3, iteraciones=2))),
+            ('Bilateral', P('otsu', fuente=P('bilateral', fuente=BASE))),
+            ('Erosión-Dilatación', P('morfologia', operacion='dilatacion', k=3,
+                                     fuente=P('morfologia', fuente=_ultra_otsu, operacion='erosion', k=3))),
+            ('Original Mejorado', _ultra_mejorado),
+        ],
+        'motores': ['easyocr', 'tesseract'],
+        'pasadas_easyocr': [
+            {'paragraph': False, 'min_size': 5, 'text_threshold': 0.2},
+            {'paragraph': False, 'min_size': 10, 'text_threshold': 0.3},
+            {'paragraph': True, 'min_size': 5, 'text_threshold': 0.2},
+        ],
+        'config_tesseract': ['--psm 6 --oem 3', '--psm 4 --oem 3', '--psm 11 --oem 3',
+                             '--psm 12 --oem 3', '--psm 3 --oem 3'],
+        'confianza_minima': 0.0, 'reemplazos': 'agresivo',
+        'combinar': 'union', 'radio_duplicado': 30, 'tolerancia_fila': 50,
+    },
+    # Sin EasyOCR: Tesseract con posiciones (image_to_data), solo dígitos y dos
+    # pistas de diseño (bloque uniforme y texto disperso). Es la que se usa
+    # en todo el proceso con MN_MODO_OCR=ligero
+    'ligera': {
+        'alto_minimo': 600, 'ancho_minimo': 0, **ACOTAR,
+        'variantes': [('Otsu', P('otsu', fuente=_clahe3))],
+        'motores': ['tesseract_datos'],
+        'config_tesseract': [
+            '--psm 6 --oem 1 -c tessedit_char_whitelist=0123456789.,- -c preserve_interword_spaces=1',
+            '--psm 11 --oem 1 -c tessedit_char_whitelist=0123456789.,-',
+        ],
+        'confianza_minima': 0.3, 'reemplazos': 'basico',
+        'combinar': 'mejor', 'tolerancia_fila': 40,
+    },
+    # Usada por analizador_inteligente, que valida y organiza por su cuenta
+    'analizador': {
+        'alto_minimo': 0, 'ancho_minimo': 0,
+        'variantes': [('Gris', BASE)],
+        'variantes_tesseract': [
+            ('CLAHE+Denoise', P('denoise', fuente=_clahe3, h=10)),
+            ('Adaptativo', P('adaptativo', fuente=BASE, bloque=11, c=2)),
+            ('Otsu', P('otsu', fuente=BASE)),
+            ('Morfología', P('morfologia', fuente=P('otsu', fuente=BASE), operacion='cierre')),
+        ],
+        'motores': ['easyocr', 'tesseract'],
+        'pasadas_easyocr': [{'paragraph': False}],
+        'config_tesseract': ['--psm 6 --oem 3 -c tessedit_char_whitelist=0123456789.,-'],
+        'confianza_minima': 0.3, 'reemplazos': {},
+        'combinar': 'mejor', 'tolerancia_fila': 40,
+    },
+}
+
+CONFIGURACION_POR_DEFECTO = 'definitivo'
+
+def _configuracion(config):
+    """
+    Acepta el nombre de una configuración o un dict propio
+
+    En modo ligero toda configuración con nombre se convierte en 'ligera'
+    y a las propias se les quita EasyOCR.
+    """
+    if isinstance(config, str):
+        return CONFIGURACIONES['ligera' if MODO_LIGERO else config]
+    if MODO_LIGERO and 'easyocr' in config['motores']:
+        motores = [m for m in config['motores'] if m != 'easyocr'] or ['tesseract_datos']
+        config = dict(config, motores=motores)
+    return config
+
+def _nombre_configuracion(config):
+    """Nombre con el que se guardan las estadísticas de una configuración"""
+    if isinstance(config, str):
+        return 'ligera' if MODO_LIGERO else config
+    return config.get('nombre', 'personalizada')
+
+# ==================== ESTADÍSTICAS DE VARIANTES ====================
+
+# Confianza media mínima para aceptar la tabla de una sola variante y parar
+CONFIANZA_SALIDA = 0.6
+
+# Archivo opcional donde se conservan las estadísticas entre ejecuciones.
+# Lo comparten todos los procesos (trabajadores, lotes y servicio de OCR):
+# cada uno guarda solo lo que sumó desde su último guardado, sobre lo que
+# ya tenga el archivo
+ARCHIVO_ESTADISTICAS = os.environ.get('MN_ESTADISTICAS_OCR')
+
+# El archivo se actualiza cada GUARDAR_CADA registros y al terminar el
+# proceso, no en cada lectura
+GUARDAR_CADA = int(os.environ.get('MN_ESTADISTICAS_OCR_CADA', 20))
+
+_estadisticas = None   # "config|motor|variante" -> {'intentos', 'victorias'}
+_pendientes = {}       # lo sumado en este proceso que aún no llegó al archivo
+_sin_guardar = 0       # registros desde el último guardado
+_candado_archivo = threading.Lock()
+
+def _leer_archivo_estadisticas():
+    """Contenido de ARCHIVO_ESTADISTICAS ({} si no existe o no se puede leer)"""
+    try:
+        with open(ARCHIVO_ESTADISTICAS, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _sumar_entradas(destino, origen):
+    """Suma los intentos y victorias de `origen` a `destino`"""
+    for clave, entrada in origen.items():
+        total = destino.setdefault(clave, {'intentos': 0, 'victorias': 0})
+        total['intentos'] += entrada['intentos']
+        total['victorias'] += entrada['victorias']
+
+@contextmanager
+def _bloqueo_archivo():
+    """
+    Bloqueo entre procesos del archivo de estadísticas (un archivo .lock al
+    lado); donde no hay fcntl (Windows) solo se excluyen los hilos
+    """
+    with _candado_archivo:
+        if fcntl is None:
+            yield
+            return
+        with open(ARCHIVO_ESTADISTICAS + '.lock', 'a') as bloqueo:
+            fcntl.flock(bloqueo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(bloqueo, fcntl.LOCK_UN)
+
+def _tabla_estadisticas():
+    """Carga las estadísticas la primera vez (desde ARCHIVO_ESTADISTICAS si existe)"""
+    global _estadisticas
+    if _estadisticas is None:
+        _estadisticas = _leer_archivo_estadisticas() if ARCHIVO_ESTADISTICAS else {}
+    return _estadisticas
+
+def registrar_lecturas(config, motor, lecturas):
+    """
+    Suma un intento a cada variante leída y una victoria a las que por
+    sí solas dieron una tabla válida
+
+    Args:
+        lecturas: lista de (nombre_variante, gano)
+    """
+    global _sin_guardar
+    clave_base = f"{_nombre_configuracion(config)}|{motor}|"
+    suma = {}
+    for nombre, gano in lecturas:
+        entrada = suma.setdefault(clave_base + nombre, {'intentos': 0, 'victorias': 0})
+        entrada['intentos'] += 1
+        entrada['victorias'] += int(gano)
+    with _candado:
+        _sumar_entradas(_tabla_estadisticas(), suma)
+        _sumar_entradas(_pendientes, suma)
+        _sin_guardar += 1
+        guardar = _sin_guardar >= GUARDAR_CADA
+    if guardar:
+        guardar_estadisticas()
+
+def guardar_estadisticas():
+    """
+    Suma al archivo ARCHIVO_ESTADISTICAS lo registrado en este proceso
+    desde el último guardado (se llama sola cada GUARDAR_CADA registros y
+    al salir) y trae lo que guardaron los demás procesos
+    """
+    global _estadisticas, _pendientes, _sin_guardar
+    if not ARCHIVO_ESTADISTICAS:
+        return
+    with _candado:
+        if not _pendientes:
+            return
+        pendientes, _pendientes, _sin_guardar = _pendientes, {}, 0
+
+    carpeta = os.path.dirname(os.path.abspath(ARCHIVO_ESTADISTICAS))
+    try:
+        with _bloqueo_archivo():
+            tabla = _leer_archivo_estadisticas()
+            _sumar_entradas(tabla, pendientes)
+            descriptor, temporal = tempfile.mkstemp(dir=carpeta, suffix='.tmp')
+            try:
+                with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                    json.dump(tabla, f, indent=1)
+                os.replace(temporal, ARCHIVO_ESTADISTICAS)
+            except BaseException:
+                os.unlink(temporal)
+                raise
+    except OSError as e:
+        log.warning("No se pudieron guardar las estadísticas de OCR: %s", e)
+        with _candado:
+            _sumar_entradas(_pendientes, pendientes)
+        return
+
+    # Lo guardado más lo que se registró mientras tanto
+    with _candado:
+        _sumar_entradas(tabla, _pendientes)
+        _estadisticas = tabla
+
+atexit.register(guardar_estadisticas)
+
+def tasa_exito(config, motor, variante):
+    """Tasa de victorias suavizada ((victorias+1)/(intentos+2)) de una variante"""
+    entrada = _tabla_estadisticas().get(f"{_nombre_configuracion(config)}|{motor}|{variante}")
+    if entrada is None:
+        return 0.5
+    return (entrada['victorias'] + 1) / (entrada['intentos'] + 2)
+
+def orden_variantes(config, motor, nombres):
+    """
+    Índices de las variantes ordenados de mayor a menor tasa de éxito
+    (a igual tasa se respeta el orden de la configuración)
+    """
+    tasas = [tasa_exito(config, motor, nombre) for nombre in nombres]
+    return sorted(range(len(nombres)), key=lambda i: -tasas[i])
+
+def estadisticas_variantes(config=None):
+    """
+    Devuelve las estadísticas acumuladas, opcionalmente de una configuración
+
+    Returns:
+        lista de dicts con 'config', 'motor', 'variante', 'intentos',
+        'victorias' y 'tasa'
+    """
+    filas = []
+    for clave, entrada in sorted(_tabla_estadisticas().items()):
+        nombre_config, motor, variante = clave.split('|', 2)
+        if config is not None and nombre_config != _nombre_configuracion(config):
+            continue
+        filas.append({'config': nombre_config, 'motor': motor, 'variante': variante,
+                      'intentos': entrada['intentos'], 'victorias': entrada['victorias'],
+                      'tasa': (entrada['victorias'] + 1) / (entrada['intentos'] + 2)})
+    return filas
+
+def reiniciar_estadisticas():
+    """Borra las estadísticas en memoria y el archivo ARCHIVO_ESTADISTICAS"""
+    global _estadisticas, _pendientes, _sin_guardar
+    with _candado:
+        _estadisticas, _pendientes, _sin_guardar = {}, {}, 0
+    if ARCHIVO_ESTADISTICAS:
+        with _bloqueo_archivo():
+            try:
+                os.remove(ARCHIVO_ESTADISTICAS)
+            except FileNotFoundError:
+                pass
+
+# ==================== ETAPAS ====================
+
+# Lecturas reducidas de OpenCV (JPEG las decodifica a menor escala sin pasar
+# por la resolución completa); se ignora la orientación EXIF igual que con PIL
+_LECTURAS_REDUCIDAS = (
+    (8, cv2.IMREAD_REDUCED_GRAYSCALE_8),
+    (4, cv2.IMREAD_REDUCED_GRAYSCALE_4),
+    (2, cv2.IMREAD_REDUCED_GRAYSCALE_2),
+    (1, cv2.IMREAD_GRAYSCALE),
+)
+
+def decodificar_gris(datos, lado_minimo=0):
+    """
+    Decodifica los bytes de un archivo directo a un array en gris, sin
+    la copia RGB a resolución completa
+
+    Args:
+        datos: bytes del archivo (JPEG, PNG...)
+        lado_minimo: si es > 0, la imagen se decodifica reducida a 1/2,
+            1/4 u 1/8 mientras el lado mayor no quede por debajo de este
+            valor
+
+    Returns:
+        array uint8 de 2 dimensiones, o None si OpenCV no reconoce el formato
+    """
+    factor_maximo = 1
+    if lado_minimo:
+        try:
+            ancho, alto = Image.open(io.BytesIO(datos)).size   # solo lee la cabecera
+            factor_maximo = max(1, max(ancho, alto) // lado_minimo)
+        except (OSError, ValueError):
+            pass
+    modo = next(m for f, m in _LECTURAS_REDUCIDAS if f <= factor_maximo)
+    return cv2.imdecode(np.frombuffer(datos, np.uint8), modo | cv2.IMREAD_IGNORE_ORIENTATION)
+
+def cargar(imagen, gris=False, lado_minimo=0):
+    """
+    Etapa 1: convierte la entrada (PIL, numpy, bytes o ruta) en un array
+
+    Con gris=True los archivos (bytes o ruta) se decodifican directo en
+    gris y, si lado_minimo > 0, ya reducidos (ver decodificar_gris). Los
+    arrays se devuelven tal cual.
+    """
+    if isinstance(imagen, np.ndarray):
+        return imagen
+    if gris and isinstance(imagen, (bytes, bytearray, str)):
+        datos = imagen
+        if isinstance(imagen, str):
+            with open(imagen, 'rb') as f:
+                datos = f.read()
+        img = decodificar_gris(datos, lado_minimo)
+        if img is not None:
+            return img
+        imagen = datos
+    if isinstance(imagen, (bytes, bytearray)):
+        imagen = Image.open(io.BytesIO(imagen))
+    elif isinstance(imagen, str):
+        imagen = Image.open(imagen)
+    if isinstance(imagen, Image.Image):
+        if gris:
+            return np.asarray(imagen.convert('L'))
+        if imagen.mode not in ('RGB', 'L'):
+            imagen = imagen.convert('RGB')
+        return np.array(imagen)
+    raise TypeError(f"Tipo de imagen no soportado: {type(imagen).__name__}")
+
+def cargar_para(imagen, config=CONFIGURACION_POR_DEFECTO):
+    """
+    Etapa 1 para una configuración: todos los pasos parten del gris, así
+    que se decodifica en gris; si la configuración acota el lado mayor
+    (lado_maximo), ya reducida al decodificar
+    """
+    return cargar(imagen, gris=True, lado_minimo=_configuracion(config).get('lado_maximo', 0))
+
+def _pasos_variantes(config, motor):
+    """Pasos concretos (con BASE ya sustituido) de las variantes de un motor"""
+    fuente = P('gris')
+    if config.get('lado_maximo') or config.get('alto_texto'):
+        fuente = P('reducir', fuente=fuente, lado_maximo=config.get('lado_maximo', 0),
+                   alto_texto=config.get('alto_texto', 0))
+    if config.get('enderezar'):
+        fuente = P('enderezar', fuente=fuente)
+    if config.get('recortar_tabla'):
+        fuente = P('recortar', fuente=fuente)
+    base = P('escalar', fuente=fuente, alto_minimo=config['alto_minimo'], ancho_minimo=config['ancho_minimo'])
+    variantes = config['variantes']
+    if motor.startswith('tesseract'):
+        variantes = config.get('variantes_tesseract', variantes)
+    return [(nombre, _sustituir_base(paso, base)) for nombre, paso in variantes]
+
+def variantes_a_medida(contexto, config, motor='easyocr', tiempos=None, orden=None, detener=None):
+    """
+    Calcula las variantes en paralelo y las entrega según van terminando
+
+    Args:
+        orden: índices de las variantes en el orden en que se encolan
+            (por defecto, el de la configuración)
+        detener: threading.Event opcional; al activarse se dejan de
+            entregar variantes y se cancelan las pendientes
+
+    Yields:
+        (indice, nombre, imagen), donde indice es la posición de la
+        variante en la configuración
+    """
+    config = _configuracion(config)
+    pasos = _pasos_variantes(config, motor)
+    if orden is None:
+        orden = range(len(pasos))
+    # Cada variante la consume una vez quien la recibe (ver ContextoImagen.consumir)
+    contexto.planificar([pasos[i][1] for i in orden])
+
+    def calcular(paso):
+        inicio = time.perf_counter()
+        img = contexto.obtener(paso)
+        if tiempos is not None:
+            _sumar_tiempo(tiempos, 'preprocesar', time.perf_counter() - inicio)
+        return img
+
+    if len(pasos) == 1:
+        yield 0, pasos[0][0], calcular(pasos[0][1])
+        return
+
+    pool = _pool_hilos('preprocesar')
+    futuros = {pool.submit(en_contexto(calcular), pasos[i][1]): (i, pasos[i][0]) for i in orden}
+    pendientes = set(futuros)
+    try:
+        while pendientes and not (detener is not None and detener.is_set()):
+            listos, pendientes = wait(pendientes, timeout=0.05, return_when=FIRST_COMPLETED)
+            for futuro in listos:
+                i, nombre = futuros[futuro]
+                yield i, nombre, futuro.result()
+    finally:
+        # Si quien consume se detuvo antes (salida temprana), no se calcula el resto
+        for futuro in futuros:
+            futuro.cancel()
+
+def preprocesar(contexto, config, motor='easyocr'):
+    """
+    Etapa 2: genera las variantes de la configuración para un motor
+
+    Returns:
+        lista de (nombre, imagen) en el orden de la configuración
+    """
+    variantes = sorted(variantes_a_medida(contexto, config, motor), key=lambda v: v[0])
+    return [(nombre, img) for _, nombre, img in variantes]
+
+# Argumentos de readtext que corresponden a la detección (el resto va al reconocimiento)
+_ARGS_DETECCION = {'min_size', 'text_threshold', 'low_text', 'link_threshold', 'canvas_size',
+                   'mag_ratio', 'slope_ths', 'ycenter_ths', 'height_ths', 'width_ths', 'add_margin'}
+
+def _separar_argumentos(pasada):
+    deteccion = {k: v for k, v in pasada.items() if k in _ARGS_DETECCION}
+    reconocimiento = {k: v for k, v in pasada.items() if k not in _ARGS_DETECCION}
+    return deteccion, reconocimiento
+
+def detectar(reader, imagen, **argumentos):
+    """
+    Etapa 3: cajas de texto con el detector de EasyOCR
+
+    Returns:
+        (cajas_horizontales, cajas_libres)
+    """
+    horizontales, libres = reader.detect(imagen, **argumentos)
+    return horizontales[0], libres[0]
+
+def reconocer(reader, imagen, cajas, **argumentos):
+    """
+    Etapa 4: reconoce el texto dentro de las cajas detectadas
+
+    Returns:
+        lista de (bbox, texto, confianza)
+    """
+    horizontales, libres = cajas
+    argumentos.setdefault('detail', 1)
+    return reader.recognize(imagen, horizontales, libres, **argumentos)
+
+def limpiar_texto(texto, reemplazos='basico'):
+    """Reemplaza los caracteres que el OCR suele confundir con dígitos"""
+    if isinstance(reemplazos, str):
+        reemplazos = REEMPLAZOS[reemplazos]
+    for viejo, nuevo in reemplazos.items():
+        texto = texto.replace(viejo, nuevo)
+    return texto
+
+def numeros_de_resultados(resultados, reemplazos='basico', confianza_minima=0.0):
+    """
+    Extrae los números (con la posición del centro de su caja) de la
+    salida de EasyOCR
+
+    Returns:
+        lista de dicts {'val', 'x', 'y', 'conf', 'h', 'w'} (h y w: alto y
+        ancho de la caja, para organizar sin depender de la resolución)
+    """
+    numeros = []
+    for bbox, texto, conf in resultados:
+        if confianza_minima > 0 and conf <= confianza_minima:
+            continue
+        texto = limpiar_texto(texto.strip(), reemplazos)
+        x = int((bbox[0][0] + bbox[2][0]) / 2)
+        y = int((bbox[0][1] + bbox[2][1]) / 2)
+        h = abs(int(bbox[2][1] - bbox[0][1]))
+        w = abs(int(bbox[2][0] - bbox[0][0]))
+        for n in re.findall(r'-?\d+\.?\d*', texto):
+            try:
+                numeros.append({'val': float(n), 'x': x, 'y': y, 'conf': float(conf), 'h': h, 'w': w})
+            except ValueError:
+                pass
+    return numeros
+
+def _leer_easyocr(nombre, img, config, tiempos):
+    """Lee una variante con cada pasada; devuelve [(nombre, numeros)]"""
+    numeros = []
+    cajas_memo = {}
+    with lector_ocr() as reader:
+        for pasada in config.get('pasadas_easyocr', [{}]):
+            args_det, args_rec = _separar_argumentos(pasada)
+            clave = tuple(sorted(args_det.items()))
+            inicio = time.perf_counter()
+            if clave not in cajas_memo:
+                cajas_memo[clave] = detectar(reader, img, **args_det)
+            _sumar_tiempo(tiempos, 'detectar', time.perf_counter() - inicio)
+
+            inicio = time.perf_counter()
+            resultados = reconocer(reader, img, cajas_memo[clave], **args_rec)
+            _sumar_tiempo(tiempos, 'reconocer', time.perf_counter() - inicio)
+            numeros.extend(numeros_de_resultados(resultados,
+                                                 config.get('reemplazos_easyocr', config['reemplazos']),
+                                                 config['confianza_minima']))
+
+    # Varias pasadas sobre la misma imagen repiten casi todas las lecturas
+    if len(config.get('pasadas_easyocr', [{}])) > 1:
+        numeros = sin_duplicados(numeros, config.get('radio_duplicado', 20))
+    return [(nombre, numeros)]
+
+def _leer_tesseract(nombre, img, config, tiempos):
+    """Tesseract no da posiciones útiles: los números quedan con x = y = 0"""
+    import pytesseract
+    salida = []
+    for opciones in config.get('config_tesseract', ['--psm 6']):
+        inicio = time.perf_counter()
+        texto = pytesseract.image_to_string(img, config=opciones)
+        _sumar_tiempo(tiempos, 'reconocer', time.perf_counter() - inicio)
+        numeros = [{'val': float(n), 'x': 0, 'y': 0, 'conf': 0.5}
+                   for n in re.findall(r'-?\d+\.?\d*', limpiar_texto(texto, config['reemplazos']))]
+        salida.append((f"{nombre} {opciones}", numeros))
+    return salida
+
+def _leer_tesseract_datos(nombre, img, config, tiempos):
+    """
+    Tesseract con image_to_data: cada número queda con la posición, el
+    tamaño y la confianza de su palabra, así se organiza igual que EasyOCR
+    """
+    import pytesseract
+    salida = []
+    for opciones in config.get('config_tesseract', ['--psm 6']):
+        inicio = time.perf_counter()
+        datos = pytesseract.image_to_data(img, config=opciones, output_type=pytesseract.Output.DICT)
+        _sumar_tiempo(tiempos, 'reconocer', time.perf_counter() - inicio)
+
+        numeros = []
+        for k, texto in enumerate(datos['text']):
+            conf = float(datos['conf'][k]) / 100
+            if not texto.strip() or conf < 0 or conf <= config['confianza_minima']:
+                continue
+            w, h = datos['width'][k], datos['height'][k]
+            x, y = datos['left'][k] + w // 2, datos['top'][k] + h // 2
+            for n in re.findall(r'-?\d+\.?\d*', limpiar_texto(texto.strip(), config['reemplazos'])):
+                numeros.append({'val': float(n), 'x': x, 'y': y, 'conf': conf, 'h': h, 'w': w})
+        salida.append((f"{nombre} {opciones.split(' -c')[0]}", numeros))
+    return salida
+
+MOTORES = {
+    'easyocr': _leer_easyocr,
+    'tesseract': _leer_tesseract,
+    'tesseract_datos': _leer_tesseract_datos,
+}
+
+def reconocer_variantes(variantes, config, motor, tiempos, validar=None, detener=None, al_leer=None):
+    """
+    Reconoce las variantes en paralelo a medida que llegan
+
+    Args:
+        variantes: iterable de (indice, nombre, imagen); puede ser el
+            generador de variantes_a_medida, así el reconocimiento de una
+            variante empieza mientras las demás aún se preprocesan
+        validar: función opcional numeros -> bool. En cuanto una lectura
+            la cumple se activa `detener` y se cancelan las variantes
+            pendientes (salida temprana)
+        detener: threading.Event compartido con variantes_a_medida
+        al_leer: función opcional indice -> None que se llama cuando una
+            variante ya no se necesita (para liberar su imagen)
+
+    Returns:
+        (lecturas, ganadora): lecturas es una lista de (indice, nombre,
+        numeros) en el orden de la configuración; ganadora es la lectura
+        que cumplió validar, o None
+    """
+    leer = MOTORES[motor]
+    pool = _pool_hilos('reconocer')
+    detener = detener or threading.Event()
+
+    def leer_y_validar(i, nombre, img):
+        try:
+            if detener.is_set():
+                return [], None
+            lecturas = leer(nombre, img, config, tiempos)
+        finally:
+            if al_leer is not None:
+                al_leer(i)
+        if validar is not None:
+            for nombre_lectura, numeros in lecturas:
+                if validar(numeros):
+                    detener.set()
+                    return lecturas, (nombre_lectura, numeros)
+        return lecturas, None
+
+    futuros = {}
+    por_indice = {}
+    ganadora = None
+    try:
+        for i, nombre, img in variantes:
+            futuros[pool.submit(en_contexto(leer_y_validar), i, nombre, img)] = i
+            if detener.is_set():
+                break
+
+        for futuro in as_completed(futuros):
+            i = futuros[futuro]
+            lecturas, valida = futuro.result()
+            if lecturas:
+                por_indice[i] = lecturas
+            if valida is not None and ganadora is None:
+                ganadora = (i,) + valida
+                break
+    finally:
+        for futuro in futuros:
+            futuro.cancel()
+        if hasattr(variantes, 'close'):
+            variantes.close()
+
+    lecturas = [(i, nombre, numeros) for i in sorted(por_indice) for nombre, numeros in por_indice[i]]
+    return lecturas, ganadora
+
+def _validador(config):
+    """
+    Criterio de salida temprana: la variante sola da una tabla X/Y
+    consistente con confianza media suficiente
+    """
+    if not config.get('salida_temprana', True):
+        return None
+    umbral = config.get('confianza_salida', CONFIANZA_SALIDA)
+
+    def validar(numeros):
+        if len(numeros) < 4 or np.mean([n['conf'] for n in numeros]) < umbral:
+            return False
+        x_vals, y_vals = organizar(numeros, config['tolerancia_fila'])
+        return bool(x_vals) and len(x_vals) == len(y_vals) and np.all(np.isfinite(x_vals + y_vals))
+    return validar
+
+def _validador_acuerdo(config, previas):
+    """
+    Criterio de salida temprana de combinar='votacion': las lecturas
+    hechas hasta el momento (más las de motores anteriores) coinciden,
+    votadas por celda, en al menos `acuerdo_minimo` y dan una tabla X/Y
+
+    La primera vez que se cumple guarda en validar.acordadas las lecturas
+    que llegaron a ese acuerdo: son las que hay que fusionar, porque otros
+    hilos pueden haber votado antes de que su futuro se recoja.
+    """
+    if not config.get('salida_temprana', True):
+        return None
+    umbral = config.get('acuerdo_minimo', ACUERDO_SALIDA)
+    acumuladas = list(previas)
+    candado = threading.Lock()
+
+    def validar(numeros):
+        with candado:
+            acumuladas.append(numeros)
+            if len(acumuladas) < 2:
+                return False
+            vistas = list(acumuladas)
+        fusion, acuerdo = fusionar(vistas, soporte_minimo=config.get('soporte_minimo', SOPORTE_MINIMO))
+        if acuerdo < umbral:
+            return False
+        x_vals, y_vals = organizar(fusion, config['tolerancia_fila'])
+        if not x_vals or len(x_vals) != len(y_vals):
+            return False
+        with candado:
+            if validar.acordadas is None:
+                validar.acordadas = vistas
+        return True
+    validar.acordadas = None
+    return validar
+
+def _leer_con_estadisticas(variantes, config, nombre_config, motor, tiempos, detener=None, al_leer=None,
+                           previas=None):
+    """
+    Reconoce con salida temprana y actualiza las estadísticas de victorias
+
+    Args:
+        previas: con combinar='votacion', lista de lecturas de motores
+            anteriores que también votan; se le agregan las de este motor
+
+    Returns:
+        (numeros, nombre_variante)
+    """
+    validar = _validador(config)
+    votacion = config.get('combinar') == 'votacion'
+    previas = [] if previas is None else previas
+    parar = _validador_acuerdo(config, previas) if votacion else validar
+    lecturas, ganadora = reconocer_variantes(variantes, config, motor, tiempos, parar, detener, al_leer)
+
+    # Gana toda variante que por sí sola dio una tabla válida
+    validar = validar or (lambda numeros: False)
+    registrar_lecturas(nombre_config, motor,
+                       [(nombre, (not votacion and (i, nombre, numeros) == ganadora) or validar(numeros))
+                        for i, nombre, numeros in lecturas])
+
+    if votacion:
+        if ganadora is not None:
+            previas[:] = parar.acordadas
+        else:
+            previas.extend(numeros for _, _, numeros in lecturas)
+        return combinar_variantes([(None, numeros) for numeros in previas], config)
+    if ganadora is not None:
+        return list(ganadora[2]), ganadora[1]
+    return combinar_variantes([(nombre, numeros) for _, nombre, numeros in lecturas], config)
+
+def leer_variantes(variantes, config=CONFIGURACION_POR_DEFECTO, motor='easyocr', tiempos=None):
+    """
+    Etapas 3 y 4 sobre variantes ya preprocesadas
+
+    Las variantes se leen en orden de tasa de éxito histórica y se para
+    en cuanto una da una tabla consistente (ver _validador).
+
+    Returns:
+        (numeros, nombre_variante) combinados según la configuración
+    """
+    nombre_config = _nombre_configuracion(config)
+    config = _configuracion(config)
+    if MODO_LIGERO and motor == 'easyocr':
+        motor = 'tesseract_datos'
+    if tiempos is None:
+        tiempos = {'detectar': 0.0, 'reconocer': 0.0}
+    variantes = list(variantes)
+    orden = orden_variantes(nombre_config, motor, [nombre for nombre, _ in variantes])
+    indexadas = [(i, variantes[i][0], variantes[i][1]) for i in orden]
+    return _leer_con_estadisticas(indexadas, config, nombre_config, motor, tiempos)
+
+def combinar_variantes(por_variante, config):
+    """
+    Une los números leídos en varias variantes
+
+    'mejor' se queda con la variante que más números dio; 'union' junta
+    todas descartando duplicados cercanos (mismo valor y posición);
+    'votacion' alinea las lecturas por celda y vota cada valor ponderado
+    por confianza (ver utils.fusion_ocr).
+
+    Returns:
+        (numeros, nombre_variante)
+    """
+    if not por_variante:
+        return [], None
+
+    if config.get('combinar', 'mejor') == 'mejor':
+        nombre, numeros = max(por_variante, key=lambda par: len(par[1]))
+        return list(numeros), nombre
+
+    if config['combinar'] == 'votacion':
+        lecturas = [numeros for _, numeros in por_variante]
+        numeros, acuerdo = fusionar(lecturas, soporte_minimo=config.get('soporte_minimo', SOPORTE_MINIMO))
+        if numeros:
+            return numeros, f"votación ({len(lecturas)} lecturas, acuerdo {acuerdo:.0%})"
+        # Sin posiciones (Tesseract) no hay celdas que votar
+        nombre, numeros = max(por_variante, key=lambda par: len(par[1]))
+        return list(numeros), nombre
+
+    todos = [num for _, numeros in por_variante for num in numeros]
+    return sin_duplicados(todos, config.get('radio_duplicado', 20)), 'union'
+
+def sin_duplicados(numeros, radio=20):
+    """Descarta números con el mismo valor leídos a menos de `radio` píxeles"""
+    unicos = []
+    for num in numeros:
+        duplicado = any(abs(t['val'] - num['val']) < 0.01 and
+                        abs(t['x'] - num['x']) < radio and
+                        abs(t['y'] - num['y']) < radio for t in unicos)
+        if not duplicado:
+            unicos.append(num)
+    return unicos
+
+# ==================== PIPELINE ====================
+
+def ejecutar_pipeline(imagen, config=CONFIGURACION_POR_DEFECTO, contexto=None, usar_cache=True):
+    """
+    Ejecuta el pipeline completo sobre una imagen
+
+    Args:
+        imagen: PIL Image, numpy array, bytes o ruta
+        config: nombre en CONFIGURACIONES o dict con la misma forma
+        contexto: ContextoImagen ya cargado (con liberar=False se puede
+            reutilizar entre configuraciones); `imagen` puede ser None
+        usar_cache: buscar/guardar el resultado en utils.cache_ocr (la
+            clave es la huella de la imagen tal como llega más la
+            configuración, así que con imagen=None no se usa la caché)
+
+    Returns:
+        dict con 'x', 'y' (None si falló), 'motor', 'variante',
+        'confianza', 'numeros', 'tiempos' por etapa, 'memoria_pico' (bytes
+        de imágenes vivas a la vez, entrada incluida) y
+        'buffers_reutilizados'. Las etapas de
+        preprocesamiento y reconocimiento corren en paralelo, así que sus
+        tiempos suman el de todos los hilos; 'total' es el tiempo real.
+    """
+    # Todos los registros de esta imagen (también los de los hilos) llevan el mismo id
+    with solicitud():
+        return _ejecutar_pipeline(imagen, config, contexto, usar_cache)
+
+def _ejecutar_pipeline(imagen, config, contexto, usar_cache):
+    nombre_config = _nombre_configuracion(config)
+    config = _configuracion(config)
+
+    clave = None
+    if usar_cache and imagen is not None:
+        clave = cache_ocr.clave_ocr(imagen, config)
+        resultado = cache_ocr.buscar(clave)
+        if resultado is not None:
+            log.debug("Resultado de %s desde la caché", nombre_config)
+            resultado.update({'tiempos': {'total': 0.0}, 'desde_cache': True, 'memoria_pico': 0})
+            return resultado
+
+    tiempos = {'cargar': 0.0, 'preprocesar': 0.0, 'detectar': 0.0, 'reconocer': 0.0, 'organizar': 0.0}
+    inicio_total = time.perf_counter()
+
+    if contexto is None:
+        contexto = ContextoImagen(cargar_para(imagen, config))
+    tiempos['cargar'] = time.perf_counter() - inicio_total
+
+    resultado = {'x': None, 'y': None, 'motor': None, 'variante': None,
+                 'confianza': 0.0, 'numeros': 0, 'tiempos': tiempos, 'desde_cache': False,
+                 'memoria_pico': 0, 'buffers_reutilizados': 0}
+    algun_motor = False
+
+    # Con combinar='votacion' las lecturas de un motor que no alcanzó siguen votando con el siguiente
+    previas = []
+    for motor in config['motores']:
+        pasos = _pasos_variantes(config, motor)
+        orden = orden_variantes(nombre_config, motor, [nombre for nombre, _ in pasos])
+        detener = threading.Event()
+        try:
+            variantes = variantes_a_medida(contexto, config, motor, tiempos, orden, detener)
+            numeros, variante = _leer_con_estadisticas(variantes, config, nombre_config, motor, tiempos,
+                                                       detener, lambda i: contexto.consumir(pasos[i][1]),
+                                                       previas)
+        except Exception as e:
+            # Motor no instalado o fallo de lectura: se prueba el siguiente
+            if isinstance(e, ImportError):
+                log.debug("%s no disponible: %s", motor, e)
+            else:
+                log.warning("%s falló: %s", motor, e, exc_info=True)
+            continue
+        algun_motor = True
+
+        inicio = time.perf_counter()
+        x_vals, y_vals = organizar(numeros, config['tolerancia_fila'])
+        tiempos['organizar'] += time.perf_counter() - inicio
+
+        if x_vals and y_vals:
+            resultado.update({
+                'x': x_vals, 'y': y_vals, 'motor': motor, 'variante': variante,
+                'confianza': float(np.mean([n['conf'] for n in numeros])),
+                'numeros': len(numeros)
+            })
+            break
+
+    tiempos['total'] = time.perf_counter() - inicio_total
+    resultado['memoria_pico'] = contexto.memoria_pico
+    resultado['buffers_reutilizados'] = contexto.reutilizados
+    registrar_tiempos(log, 'ocr', config=nombre_config, motor=resultado['motor'],
+                      variante=resultado['variante'], numeros=resultado['numeros'],
+                      extraida=bool(resultado['x']), memoria_pico_mb=contexto.memoria_pico / 2**20,
+                      buffers_reutilizados=contexto.reutilizados, **tiempos)
+    for etapa, segundos in tiempos.items():
+        instrumentacion.registrar(f"ocr.{etapa}", segundos, config=nombre_config, motor=resultado['motor'])
+
+    # Si ningún motor pudo ejecutarse no se guarda: el fallo no depende de la imagen
+    if clave is not None and algun_motor:
+        cache_ocr.guardar(clave, resultado)
+    return resultado
+
+def generar_variantes(imagen, config=CONFIGURACION_POR_DEFECTO, motor='easyocr'):
+    """
+    Devuelve solo las variantes preprocesadas de una configuración
+    """
+    return preprocesar(ContextoImagen(cargar_para(imagen, config)), config, motor)
+
+def comparar_configuraciones(imagenes, configuraciones=None, esperados=None, repeticiones=1):
+    """
+    Compara velocidad y acierto de varias configuraciones del pipeline
+
+    Args:
+        imagenes: lista de imágenes (cualquier tipo aceptado por cargar)
+        configuraciones: nombres a comparar (por defecto todas)
+        esperados: lista opcional de (x, y) correctos, uno por imagen
+        repeticiones: veces que se repite cada lectura para promediar
+
+    Returns:
+        lista de dicts por configuración con 'config', 'tiempo_medio',
+        'tiempos' medios por etapa, 'extraidas' y 'aciertos'
+    """
+    configuraciones = configuraciones or list(CONFIGURACIONES)
+    cargadas = [cargar(img) for img in imagenes]
+    filas = []
+
+    for nombre in configuraciones:
+        suma = {}
+        extraidas = aciertos = 0
+        for k, img in enumerate(cargadas):
+            for _ in range(repeticiones):
+                res = ejecutar_pipeline(img, nombre, usar_cache=False)
+                for etapa, t in res['tiempos'].items():
+                    suma[etapa] = suma.get(etapa, 0.0) + t
+            if res['x']:
+                extraidas += 1
+                if esperados is not None:
+                    x_ok, y_ok = esperados[k]
+                    if (len(res['x']) == len(x_ok) and np.allclose(res['x'], x_ok)
+                            and np.allclose(res['y'], y_ok)):
+                        aciertos += 1
+
+        lecturas = max(1, len(cargadas) * repeticiones)
+        medios = {etapa: t / lecturas for etapa, t in suma.items()}
+        filas.append({
+            'config': nombre,
+            'tiempo_medio': medios.get('total', 0.0),
+            'tiempos': medios,
+            'extraidas': extraidas,
+            'aciertos': aciertos if esperados is not None else None,
+        })
+
+    return sorted(filas, key=lambda f: f['tiempo_medio'])
+
+if __name__ == '__main__':
+    import sys
+    if len(sys.argv) < 2:
+        print("Uso: python -m utils.ocr_pipeline imagen1.png [imagen2.png ...]")
+        sys.exit(1)
+    for fila in comparar_configuraciones(sys.argv[1:]):
+        etapas = ', '.join(f"{k}={v*1000:.0f}ms" for k, v in fila['tiempos'].items() if k != 'total')
+        print(f"{fila['config']:<12} {fila['tiempo_medio']*1000:8.0f} ms  "
+              f"extraídas={fila['extraidas']}/{len(sys.argv)-1}  [{etapas}]")
@@ -0,0 +1,161 @@
+"""
+Organización de los números leídos por OCR en listas X e Y
+
+Compartido por el pipeline de OCR, sus módulos históricos, table_detector
+y analizador_inteligente. Las filas se separan donde hay un salto en y
+mayor que una fracción del alto mediano de los caracteres (así el
+resultado no depende de la resolución de la imagen) y todo se calcula
+con arrays de NumPy en O(k log k).
+"""
+import numpy as np
+
+# Salto vertical, en altos de carácter, a partir del cual empieza otra fila
+FACTOR_FILA = 0.75
+
+def _arrays(numeros):
+    """Columnas val, x, y, h, w de una lista de dicts (h y w valen 0 si faltan)"""
+    k = len(numeros)
+    val = np.fromiter((n['val'] for n in numeros), float, k)
+    x = np.fromiter((n['x'] for n in numeros), float, k)
+    y = np.fromiter((n['y'] for n in numeros), float, k)
+    h = np.fromiter((n.get('h', 0) for n in numeros), float, k)
+    w = np.fromiter((n.get('w', 0) for n in numeros), float, k)
+    return val, x, y, h, w
+
+def umbral_fila(h, tolerancia=40):
+    """
+    Salto en y que separa filas: FACTOR_FILA por el alto mediano de los
+    caracteres, o `tolerancia` píxeles si no se conocen los altos
+    """
+    altos = h[h > 0]
+    if len(altos):
+        return FACTOR_FILA * float(np.median(altos))
+    return tolerancia
+
+def indices_filas(x, y, umbral):
+    """
+    Agrupa por y (ordenando una sola vez) y ordena cada fila por x
+
+    Returns:
+        lista de arrays de índices, una por fila, de arriba hacia abajo
+    """
+    if len(y) == 0:
+        return []
+    orden = np.argsort(y, kind='stable')
+    fila = np.empty(len(y), dtype=int)
+    fila[orden] = np.concatenate(([0], np.cumsum(np.diff(y[orden]) >= umbral)))
+    orden = np.lexsort((x, fila))
+    return np.split(orden, np.flatnonzero(np.diff(fila[orden])) + 1)
+
+def agrupar_filas(numeros, tolerancia=40):
+    """
+    Agrupa números en filas por su coordenada y (y ordena cada fila por x)
+
+    Returns:
+        lista de filas, cada una lista de valores
+    """
+    val, x, y, h, _ = _arrays(numeros)
+    return [val[f].tolist() for f in indices_filas(x, y, umbral_fila(h, tolerancia))]
+
+def alinear_columnas(xa, wa, xb, wb, tolerancia):
+    """
+    Empareja los elementos de dos filas (ordenadas por x) que se
+    superponen horizontalmente
+
+    Sin anchos (w = 0) se aceptan centros a menos de `tolerancia`.
+
+    Returns:
+        (ia, ib): índices emparejados de cada fila, ordenados por x
+    """
+    if len(xa) == 0 or len(xb) == 0:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    # Vecino más cercano en la fila a para cada elemento de la fila b
+    pos = np.clip(np.searchsorted(xa, xb), 1, len(xa) - 1) if len(xa) > 1 else np.zeros(len(xb), dtype=int)
+    izquierda = np.maximum(pos - 1, 0)
+    ia = np.where(np.abs(xa[izquierda] - xb) <= np.abs(xa[pos] - xb), izquierda, pos)
+    distancia = np.abs(xa[ia] - xb)
+
+    limite = (wa[ia] + wb) / 2
+    limite = np.where(limite > 0, limite, tolerancia)
+    ib = np.flatnonzero(distancia <= limite)
+    ia, distancia = ia[ib], distancia[ib]
+
+    # Cada elemento de a se queda con el de b más cercano
+    orden = np.argsort(distancia, kind='stable')
+    _, primeros = np.unique(ia[orden], return_index=True)
+    elegidos = np.sort(orden[primeros])
+    return ia[elegidos], ib[elegidos]
+
+def dividir_lista(valores):
+    """Divide una lista par en mitades X, Y si X no tiene repetidos"""
+    if len(valores) >= 4 and len(valores) % 2 == 0:
+        mitad = len(valores) // 2
+        if len(set(valores[:mitad])) == mitad:
+            return valores[:mitad], valores[mitad:]
+    return None, None
+
+def x_sin_repetidos(x_vals, y_vals):
+    """Validación por defecto: los valores de X no se repiten"""
+    return len(set(x_vals)) == len(x_vals)
+
+def organizar(numeros, tolerancia=40, validar=x_sin_repetidos):
+    """
+    Etapa 5: convierte los números detectados en listas X e Y
+
+    En orden de preferencia:
+    1. dos filas de igual longitud (la primera fila que valide con una
+       posterior del mismo largo)
+    2. dos filas consecutivas alineadas por columnas (tablas con celdas
+       vacías o ilegibles)
+    3. una fila par dividida por la mitad
+    4. sin posiciones (Tesseract), la lista en orden de lectura dividida
+
+    Args:
+        numeros: dicts {'val', 'x', 'y'} y opcionalmente 'h', 'w' (alto y
+            ancho de la caja de texto)
+        tolerancia: salto en y en píxeles, solo si no hay altos
+        validar: función (x_vals, y_vals) -> bool
+    """
+    if len(numeros) < 4:
+        return None, None
+
+    val, x, y, h, w = _arrays(numeros)
+    if np.any((x > 0) | (y > 0)):
+        umbral = umbral_fila(h, tolerancia)
+        filas = indices_filas(x, y, umbral)
+        valores = [val[f].tolist() for f in filas]
+
+        # 1. Filas de igual longitud: por cada largo, las filas en orden
+        por_largo = {}
+        for i, fila in enumerate(valores):
+            por_largo.setdefault(len(fila), []).append(i)
+        for i, fila in enumerate(valores):
+            if len(fila) < 2:
+                continue
+            for j in por_largo[len(fila)]:
+                if j > i and validar(fila, valores[j]):
+                    return fila, valores[j]
+
+        # 2. Filas consecutivas alineadas por x (se elige la de más columnas)
+        mejor = None
+        for a, b in zip(filas, filas[1:]):
+            ia, ib = alinear_columnas(x[a], w[a], x[b], w[b], umbral)
+            if len(ia) >= 2 and (mejor is None or len(ia) > len(mejor[0])):
+                x_vals, y_vals = val[a][ia].tolist(), val[b][ib].tolist()
+                if validar(x_vals, y_vals):
+                    mejor = (x_vals, y_vals)
+        if mejor is not None:
+            return mejor
+
+        # 3. Una fila con X e Y seguidos
+        for fila in valores:
+            x_vals, y_vals = dividir_lista(fila)
+            if x_vals and validar(x_vals, y_vals):
+                return x_vals, y_vals
+
+    # 4. Sin posiciones: dividir la lista en orden de lectura
+    x_vals, y_vals = dividir_lista(val.tolist())
+    if x_vals and validar(x_vals, y_vals):
+        return x_vals, y_vals
+    return None, None
@@ -0,0 +1,236 @@
+"""
+Pool de lectores EasyOCR compartido por todos los módulos de OCR
+
+Crear un easyocr.Reader carga los modelos de detección y reconocimiento
+desde disco (varios segundos y cientos de MB), así que se crean una sola
+vez por proceso y se prestan con lector_ocr().
+"""
+import gc
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+IDIOMAS = ['es', 'en']
+
+# Número máximo de lectores por proceso (configurable por variable de entorno)
+TAMANO_POOL = max(1, int(os.environ.get('MN_LECTORES_OCR', 1)))
+
+# MN_MODO_OCR=ligero: despliegues sin EasyOCR (ni torch); solo Tesseract
+MODO_LIGERO = os.environ.get('MN_MODO_OCR', '').lower() == 'ligero'
+
+_candado = threading.Lock()
+_libres = queue.LifoQueue()
+_creados = []
+_reservados = 0     # lectores que se están cargando fuera del candado
+_en_uso = 0
+_estadisticas = {'prestamos': 0, 'espera_total': 0.0, 'tiempo_carga': 0.0}
+
+# Cada cuánto vuelve a mirar el pool un hilo que espera lector, por si la
+# carga de otro falló y dejó libre su lugar
+_REVISION_ESPERA = 0.5
+
+def _crear_lector():
+    """
+    Carga un easyocr.Reader nuevo (lanza ImportError si no está instalado
+    o si el proceso corre en modo ligero)
+    """
+    if MODO_LIGERO:
+        raise ImportError("EasyOCR desactivado (MN_MODO_OCR=ligero)")
+    import easyocr
+    inicio = time.time()
+    reader = easyocr.Reader(IDIOMAS, gpu=False, verbose=False)
+    with _candado:
+        _estadisticas['tiempo_carga'] += time.time() - inicio
+    return reader
+
+def _reservar(limite):
+    """
+    Reserva (con el candado tomado) el lugar de un lector nuevo si el pool
+    tiene menos de `limite` lectores creados o en carga
+    """
+    global _reservados
+    if len(_creados) + _reservados >= limite:
+        return False
+    _reservados += 1
+    return True
+
+def _crear_reservado():
+    """
+    Carga el lector de un lugar ya reservado, sin tener el candado, y lo
+    deja prestado a quien lo pidió; si la carga falla libera el lugar
+    """
+    global _reservados, _en_uso
+    try:
+        reader = _crear_lector()
+    except BaseException:
+        with _candado:
+            _reservados -= 1
+        raise
+    with _candado:
+        _reservados -= 1
+        _creados.append(reader)
+        _en_uso += 1
+    return reader
+
+def _tomar_lector(timeout=None):
+    """
+    Toma un lector libre; crea uno si el pool aún no está lleno
+    """
+    global _en_uso
+    limite = None if timeout is None else time.time() + timeout
+    while True:
+        with _candado:
+            try:
+                reader = _libres.get_nowait()
+            except queue.Empty:
+                reader = None
+            if reader is not None:
+                _en_uso += 1
+                return reader
+            crear = _reservar(TAMANO_POOL)
+        if crear:
+            # Cargar los modelos tarda segundos: los demás hilos siguen
+            # tomando y devolviendo lectores mientras tanto
+            return _crear_reservado()
+
+        # Pool lleno: esperar a que otro hilo devuelva su lector
+        espera = _REVISION_ESPERA if limite is None else min(_REVISION_ESPERA, limite - time.time())
+        if espera <= 0:
+            raise queue.Empty
+        try:
+            reader = _libres.get(timeout=espera)
+        except queue.Empty:
+            continue
+        with _candado:
+            _en_uso += 1
+        return reader
+
+def _devolver_lector(reader):
+    global _en_uso
+    with _candado:
+        _en_uso -= 1
+    _libres.put(reader)
+
+@contextmanager
+def lector_ocr(timeout=None):
+    """
+    Presta un easyocr.Reader del pool mientras dura el bloque with
+
+    Uso:
+        with lector_ocr() as reader:
+            results = reader.readtext(img)
+
+    Lanza ImportError si EasyOCR no está instalado y queue.Empty si no
+    se libera un lector antes de timeout segundos.
+    """
+    inicio = time.time()
+    reader = _tomar_lector(timeout)
+    with _candado:
+        _estadisticas['prestamos'] += 1
+        _estadisticas['espera_total'] += time.time() - inicio
+    try:
+        yield reader
+    finally:
+        _devolver_lector(reader)
+
+def precalentar(cantidad=1):
+    """
+    Crea por adelantado hasta `cantidad` lectores y hace una lectura de
+    prueba para que la primera imagen real no pague la carga de modelos
+
+    Returns:
+        bool: True si EasyOCR está disponible y quedó listo
+    """
+    cantidad = min(cantidad, TAMANO_POOL)
+    try:
+        while True:
+            with _candado:
+                if not _reservar(cantidad):
+                    break
+            _devolver_lector(_crear_reservado())
+    except ImportError:
+        return False
+
+    with lector_ocr() as reader:
+        reader.readtext(np.full((32, 96), 255, dtype=np.uint8))
+    return True
+
+def precalentar_en_segundo_plano(cantidad=1):
+    """
+    Lanza precalentar() en un hilo para no bloquear el arranque
+    """
+    hilo = threading.Thread(target=precalentar, args=(cantidad,), daemon=True)
+    hilo.start()
+    return hilo
+
+def _bytes_modelo(reader):
+    """Memoria aproximada de los pesos de un lector (detector + reconocedor)"""
+    total = 0
+    for nombre in ('detector', 'recognizer'):
+        modelo = getattr(reader, nombre, None)
+        parametros = getattr(modelo, 'parameters', None)
+        if parametros is None:
+            continue
+        for p in parametros():
+            total += p.numel() * p.element_size()
+    return total
+
+def _memoria_proceso():
+    """Memoria residente máxima del proceso en bytes (None si no se puede medir)"""
+    try:
+        import resource
+        maximo = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KB, macOS bytes
+        return maximo if os.uname().sysname == 'Darwin' else maximo * 1024
+    except (ImportError, AttributeError):
+        return None
+
+def uso_memoria():
+    """
+    Resume el estado del pool
+
+    Returns:
+        dict con 'lectores', 'en_uso', 'libres', 'bytes_modelos',
+        'memoria_proceso', 'prestamos', 'espera_media' y 'tiempo_carga'
+    """
+    with _candado:
+        lectores = list(_creados)
+        en_uso = _en_uso
+        estadisticas = dict(_estadisticas)
+    prestamos = estadisticas['prestamos']
+    return {
+        'lectores': len(lectores),
+        'en_uso': en_uso,
+        'libres': len(lectores) - en_uso,
+        'bytes_modelos': sum(_bytes_modelo(r) for r in lectores),
+        'memoria_proceso': _memoria_proceso(),
+        'prestamos': prestamos,
+        'espera_media': estadisticas['espera_total'] / prestamos if prestamos else 0.0,
+        'tiempo_carga': estadisticas['tiempo_carga']
+    }
+
+def liberar_lectores():
+    """
+    Descarta los lectores libres para recuperar memoria
+
+    Los lectores prestados en este momento se conservan; el pool vuelve
+    a crear lectores bajo demanda.
+
+    Returns:
+        int: número de lectores liberados
+    """
+    liberados = 0
+    with _candado:
+        while True:
+            try:
+                reader = _libres.get_nowait()
+            except queue.Empty:
+                break
+            _creados.remove(reader)
+            liberados += 1
+    gc.collect()
+    return liberados
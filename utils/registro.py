@@ -0,0 +1,121 @@
+"""
+Registro (logging) de los módulos de OCR
+
+Reemplaza los print de diagnóstico: cada módulo pide su registro con
+obtener_registro(__name__) y escribe con niveles y formato perezoso
+(log.info("%d números", n)), así los mensajes que no se muestran no
+cuestan nada.
+
+Variables de entorno:
+    MN_NIVEL_LOG: DEBUG, INFO, WARNING (por defecto) o ERROR
+    MN_LOG_JSON: '1' para escribir un objeto JSON por línea
+    MN_MUESTREO_TIEMPOS: fracción (0 a 1) de registros de tiempos que se
+        emiten; por defecto 1.0
+"""
+import contextvars
+import json
+import logging
+import os
+import random
+import uuid
+from contextlib import contextmanager
+
+RAIZ = 'mn'
+NIVEL = os.environ.get('MN_NIVEL_LOG', 'WARNING').upper()
+FORMATO_JSON = os.environ.get('MN_LOG_JSON') == '1'
+MUESTREO_TIEMPOS = float(os.environ.get('MN_MUESTREO_TIEMPOS', 1.0))
+
+# Identificador de la solicitud en curso (una imagen, un lote...)
+_id_solicitud = contextvars.ContextVar('id_solicitud', default='-')
+
+class _FiltroSolicitud(logging.Filter):
+    """Agrega el id de la solicitud en curso a cada registro"""
+
+    def filter(self, record):
+        record.id_solicitud = _id_solicitud.get()
+        return True
+
+class _FormatoJSON(logging.Formatter):
+    """Un objeto JSON por línea con los campos del registro y sus datos"""
+
+    def format(self, record):
+        salida = {
+            'tiempo': self.formatTime(record),
+            'nivel': record.levelname,
+            'modulo': record.name,
+            'id_solicitud': getattr(record, 'id_solicitud', '-'),
+            'mensaje': record.getMessage(),
+        }
+        salida.update(getattr(record, 'datos', {}))
+        if record.exc_info:
+            salida['error'] = self.formatException(record.exc_info)
+        return json.dumps(salida, ensure_ascii=False, default=str)
+
+def _configurar():
+    """Configura el registro raíz 'mn' una sola vez por proceso"""
+    raiz = logging.getLogger(RAIZ)
+    if raiz.handlers:
+        return raiz
+    manejador = logging.StreamHandler()
+    manejador.addFilter(_FiltroSolicitud())
+    if FORMATO_JSON:
+        manejador.setFormatter(_FormatoJSON())
+    else:
+        manejador.setFormatter(logging.Formatter(
+            '%(asctime)s %(levelname)s %(name)s [%(id_solicitud)s] %(message)s'))
+    raiz.addHandler(manejador)
+    raiz.setLevel(NIVEL)
+    # Streamlit configura el registro raíz de Python: no duplicar líneas
+    raiz.propagate = False
+    return raiz
+
+def obtener_registro(nombre):
+    """
+    Registro de un módulo, por ejemplo obtener_registro(__name__)
+    """
+    _configurar()
+    return logging.getLogger(f"{RAIZ}.{nombre.rsplit('.', 1)[-1]}")
+
+@contextmanager
+def solicitud(id_solicitud=None):
+    """
+    Marca con un mismo id todos los registros emitidos dentro del bloque
+
+    Si ya hay una solicitud en curso y no se pasa id, se conserva la
+    actual (un lote y cada imagen del lote comparten id).
+    """
+    if id_solicitud is None and _id_solicitud.get() != '-':
+        yield _id_solicitud.get()
+        return
+    id_solicitud = id_solicitud or uuid.uuid4().hex[:8]
+    marca = _id_solicitud.set(id_solicitud)
+    try:
+        yield id_solicitud
+    finally:
+        _id_solicitud.reset(marca)
+
+def id_solicitud():
+    """Id de la solicitud en curso ('-' si no hay ninguna)"""
+    return _id_solicitud.get()
+
+def en_contexto(funcion):
+    """
+    Envuelve una función para que corra con el contexto actual (id de
+    solicitud incluido) aunque se ejecute en otro hilo de un pool
+    """
+    contexto = contextvars.copy_context()
+    return lambda *args, **kwargs: contexto.run(funcion, *args, **kwargs)
+
+def registrar_tiempos(registro, evento, **datos):
+    """
+    Emite un registro estructurado (nivel INFO) con tiempos y otros datos
+
+    Solo se emite una fracción MUESTREO_TIEMPOS de los eventos; en texto
+    los datos se agregan como clave=valor y en JSON como campos.
+    """
+    if not registro.isEnabledFor(logging.INFO):
+        return
+    if MUESTREO_TIEMPOS < 1.0 and random.random() >= MUESTREO_TIEMPOS:
+        return
+    texto = ' '.join(f"{k}={v:.4f}" if isinstance(v, float) else f"{k}={v}" for k, v in datos.items())
+    registro.info("%s %s", evento, texto, extra={'datos': dict(datos, evento=evento)})
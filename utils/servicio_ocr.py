@@ -0,0 +1,327 @@
+"""
+Servicio local de OCR: un proceso con los modelos cargados que atiende a
+todos los procesos de la aplicación
+
+Con el servicio, los modelos de EasyOCR se cargan una vez por máquina en
+lugar de una vez por proceso de Streamlit o trabajador. Las peticiones
+que llegan juntas se agrupan en lotes: las imágenes repetidas se leen una
+sola vez y el lote comparte los lectores de utils.pool_easyocr.
+
+Protocolo (HTTP/1.1 sobre TCP o socket Unix):
+    POST /ocr?config=definitivo   cuerpo: bytes de la imagen
+        -> {'x', 'y', 'confianza', 'motor', 'variante', 'desde_cache', 'tiempos'}
+    GET /salud -> estado y métricas del servicio
+
+Uso:
+    python -m utils.servicio_ocr [127.0.0.1:8765 | unix:/tmp/mn_ocr.sock]
+
+Los clientes lo usan si MN_SERVICIO_OCR tiene la dirección (ver
+extraer_con_respaldo); si no se puede conectar, el OCR corre en el
+proceso que lo pidió. Una vez conectado se espera la respuesta aunque el
+OCR tarde, y un error del servicio no repite la lectura localmente.
+"""
+import asyncio
+import hashlib
+import http.client
+import json
+import os
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from utils.registro import obtener_registro, registrar_tiempos
+
+log = obtener_registro(__name__)
+
+DIRECCION = os.environ.get('MN_SERVICIO_OCR', '')
+DIRECCION_POR_DEFECTO = '127.0.0.1:8765'
+# Conectar es inmediato si el servicio está vivo: al vencer, el OCR corre
+# localmente. La respuesta tarda lo que tarde el OCR de la imagen
+TIEMPO_CONEXION = float(os.environ.get('MN_TIEMPO_CONEXION_OCR', 2))
+TIEMPO_RESPUESTA = float(os.environ.get('MN_TIEMPO_SERVICIO_OCR', 120))
+ESPERA_LOTE = 0.02          # segundos que se esperan más peticiones para armar un lote
+LOTE_MAXIMO = 16
+TAMANO_MAXIMO = 20 * 2**20  # bytes por imagen
+
+# Campos del resultado del pipeline que viajan al cliente
+CAMPOS = ('x', 'y', 'confianza', 'motor', 'variante', 'numeros', 'desde_cache', 'tiempos')
+
+class ServicioNoDisponible(Exception):
+    """
+    El servicio no está configurado o no se pudo conectar con él
+    """
+
+class ErrorServicio(Exception):
+    """
+    El servicio atendió la petición pero no dio un resultado (respondió
+    con un error, se cortó o no respondió a tiempo)
+    """
+
+    def __init__(self, mensaje, estado=None):
+        super().__init__(mensaje)
+        self.estado = estado
+
+def _separar_direccion(direccion):
+    """'unix:/ruta', 'host:puerto' o 'http://host:puerto' -> ('unix', ruta) o ('tcp', (host, puerto))"""
+    if direccion.startswith('unix:'):
+        return 'unix', direccion[len('unix:'):]
+    partes = urlsplit(direccion if '//' in direccion else f"//{direccion}")
+    return 'tcp', (partes.hostname or '127.0.0.1', partes.port or 8765)
+
+# ==================== SERVIDOR ====================
+
+class ServicioOCR:
+    """
+    Cola de peticiones de OCR que se despachan en lotes
+
+    Cada lote se arma con las peticiones que llegan en ESPERA_LOTE
+    segundos (hasta `lote_maximo`); las de la misma imagen y
+    configuración comparten una sola lectura.
+    """
+
+    def __init__(self, simultaneas=None, espera_lote=ESPERA_LOTE, lote_maximo=LOTE_MAXIMO):
+        from utils.pool_easyocr import TAMANO_POOL
+        self.simultaneas = simultaneas or TAMANO_POOL
+        self.espera_lote = espera_lote
+        self.lote_maximo = lote_maximo
+        self.metricas = {'peticiones': 0, 'lotes': 0, 'lecturas': 0, 'repetidas': 0, 'errores': 0}
+        self._cola = None
+        self._tareas = set()   # lotes en curso (referencia para que no se recolecten)
+        self._ejecutor = ThreadPoolExecutor(max_workers=self.simultaneas, thread_name_prefix="servicio_ocr")
+
+    async def procesar(self, datos, config):
+        """Encola una imagen y espera su resultado"""
+        futuro = asyncio.get_running_loop().create_future()
+        self.metricas['peticiones'] += 1
+        await self._cola.put((datos, config, futuro))
+        return await futuro
+
+    async def _despachar(self):
+        """Arma lotes con la cola y lanza cada uno sin esperar al anterior"""
+        while True:
+            lote = [await self._cola.get()]
+            limite = asyncio.get_running_loop().time() + self.espera_lote
+            while len(lote) < self.lote_maximo:
+                restante = limite - asyncio.get_running_loop().time()
+                if restante <= 0:
+                    break
+                try:
+                    lote.append(await asyncio.wait_for(self._cola.get(), restante))
+                except asyncio.TimeoutError:
+                    break
+            tarea = asyncio.create_task(self._procesar_lote(lote))
+            self._tareas.add(tarea)
+            tarea.add_done_callback(self._tareas.discard)
+
+    async def _procesar_lote(self, lote):
+        from utils.ocr_pipeline import ejecutar_pipeline
+        inicio = time.perf_counter()
+        grupos = {}
+        for datos, config, futuro in lote:
+            clave = (hashlib.sha1(datos).hexdigest(), config)
+            grupos.setdefault(clave, (datos, config, []))[2].append(futuro)
+        self.metricas['lotes'] += 1
+        self.metricas['lecturas'] += len(grupos)
+        self.metricas['repetidas'] += len(lote) - len(grupos)
+
+        loop = asyncio.get_running_loop()
+
+        async def leer(datos, config, futuros):
+            try:
+                resultado = await loop.run_in_executor(self._ejecutor, ejecutar_pipeline, datos, config)
+                respuesta = {campo: resultado.get(campo) for campo in CAMPOS}
+            except Exception as e:
+                log.warning("Falló el OCR de una petición: %s", e, exc_info=True)
+                self.metricas['errores'] += 1
+                respuesta = e
+            for futuro in futuros:
+                if futuro.done():
+                    continue
+                if isinstance(respuesta, Exception):
+                    futuro.set_exception(respuesta)
+                else:
+                    futuro.set_result(respuesta)
+
+        await asyncio.gather(*(leer(*grupo) for grupo in grupos.values()))
+        registrar_tiempos(log, 'lote_servicio', peticiones=len(lote), lecturas=len(grupos),
+                          segundos=time.perf_counter() - inicio)
+
+    async def atender(self, lector, escritor):
+        """Atiende una conexión HTTP (una petición por conexión)"""
+        try:
+            try:
+                estado, cuerpo = await self._responder(lector)
+            except (asyncio.IncompleteReadError, ConnectionError):
+                return
+            except Exception as e:
+                log.warning("Petición inválida: %s", e)
+                estado, cuerpo = 400, {'error': 'petición inválida'}
+            texto = json.dumps(cuerpo, ensure_ascii=False).encode('utf-8')
+            razones = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                       500: 'Internal Server Error'}
+            escritor.write(f"HTTP/1.1 {estado} {razones[estado]}\r\nContent-Type: application/json\r\n"
+                           f"Content-Length: {len(texto)}\r\nConnection: close\r\n\r\n".encode('ascii') + texto)
+            await escritor.drain()
+        except ConnectionError:
+            pass
+        finally:
+            escritor.close()
+
+    async def _responder(self, lector):
+        linea = (await lector.readline()).decode('latin-1').split()
+        encabezados = {}
+        while True:
+            renglon = await lector.readline()
+            if renglon in (b'\r\n', b'\n', b''):
+                break
+            nombre, _, valor = renglon.decode('latin-1').partition(':')
+            encabezados[nombre.strip().lower()] = valor.strip()
+        if len(linea) < 2:
+            return 400, {'error': 'petición inválida'}
+        metodo, ruta = linea[0], urlsplit(linea[1])
+
+        if metodo == 'GET' and ruta.path == '/salud':
+            return 200, dict(self.metricas, estado='ok', pendientes=self._cola.qsize(),
+                             simultaneas=self.simultaneas)
+        if metodo != 'POST' or ruta.path != '/ocr':
+            return 404, {'error': f"{metodo} {ruta.path} no existe"}
+
+        try:
+            largo = int(encabezados.get('content-length', 0))
+        except ValueError:
+            return 400, {'error': 'Content-Length inválido'}
+        if largo <= 0:
+            return 400, {'error': 'falta la imagen'}
+        if largo > TAMANO_MAXIMO:
+            return 413, {'error': f"la imagen supera {TAMANO_MAXIMO // 2**20} MB"}
+        datos = await lector.readexactly(largo)
+
+        from utils.ocr_pipeline import CONFIGURACIONES, CONFIGURACION_POR_DEFECTO
+        config = parse_qs(ruta.query).get('config', [CONFIGURACION_POR_DEFECTO])[0]
+        if config not in CONFIGURACIONES:
+            return 400, {'error': f"configuración desconocida: {config}"}
+        try:
+            return 200, await self.procesar(datos, config)
+        except Exception as e:
+            return 500, {'error': str(e)}
+
+    async def iniciar(self, direccion=DIRECCION_POR_DEFECTO):
+        """Precalienta los lectores y empieza a escuchar (devuelve el servidor)"""
+        from utils.pool_easyocr import precalentar
+        self._cola = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        listos = await loop.run_in_executor(self._ejecutor, precalentar, self.simultaneas)
+        log.info("Lectores de EasyOCR %s", "listos" if listos else "no disponibles (se usará Tesseract)")
+        self._despachador = asyncio.create_task(self._despachar())
+
+        tipo, destino = _separar_direccion(direccion)
+        if tipo == 'unix':
+            if os.path.exists(destino):
+                os.remove(destino)
+            servidor = await asyncio.start_unix_server(self.atender, path=destino)
+        else:
+            servidor = await asyncio.start_server(self.atender, *destino)
+        log.info("Servicio de OCR escuchando en %s", direccion)
+        return servidor
+
+async def servir(direccion=DIRECCION_POR_DEFECTO, simultaneas=None):
+    """Ejecuta el servicio hasta que se interrumpa"""
+    servidor = await ServicioOCR(simultaneas).iniciar(direccion)
+    async with servidor:
+        await servidor.serve_forever()
+
+# ==================== CLIENTE ====================
+
+class _ConexionUnix(http.client.HTTPConnection):
+    """HTTPConnection sobre un socket Unix"""
+
+    def __init__(self, ruta, timeout):
+        super().__init__('localhost', timeout=timeout)
+        self._ruta = ruta
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._ruta)
+
+def _conectar(direccion, tiempo_limite):
+    tipo, destino = _separar_direccion(direccion)
+    if tipo == 'unix':
+        return _ConexionUnix(destino, tiempo_limite)
+    return http.client.HTTPConnection(*destino, timeout=tiempo_limite)
+
+def extraer_remoto(datos, config='definitivo', direccion=None,
+                   tiempo_conexion=TIEMPO_CONEXION, tiempo_respuesta=TIEMPO_RESPUESTA):
+    """
+    Pide el OCR de una imagen (bytes) al servicio
+
+    Returns:
+        dict con CAMPOS
+
+    Raises:
+        ServicioNoDisponible: sin dirección configurada o sin conexión en
+            tiempo_conexion segundos
+        ErrorServicio: el servicio respondió con un error o no respondió
+            en tiempo_respuesta segundos
+    """
+    direccion = direccion or DIRECCION
+    if not direccion:
+        raise ServicioNoDisponible("MN_SERVICIO_OCR no está configurado")
+    conexion = _conectar(direccion, tiempo_conexion)
+    try:
+        try:
+            conexion.connect()
+        except OSError as e:
+            raise ServicioNoDisponible(f"{direccion}: {e}") from e
+        conexion.sock.settimeout(tiempo_respuesta)
+        try:
+            conexion.request('POST', f"/ocr?config={config}", body=bytes(datos),
+                             headers={'Content-Type': 'application/octet-stream'})
+            respuesta = conexion.getresponse()
+            cuerpo = json.loads(respuesta.read() or b'{}')
+        except (OSError, http.client.HTTPException, ValueError) as e:
+            raise ErrorServicio(f"{direccion}: {e}") from e
+    finally:
+        conexion.close()
+    if respuesta.status != 200:
+        raise ErrorServicio(f"{direccion}: {respuesta.status} {cuerpo.get('error', '')}", respuesta.status)
+    return cuerpo
+
+def estado_servicio(direccion=None, tiempo_limite=2):
+    """Métricas del servicio (GET /salud) o None si no responde"""
+    direccion = direccion or DIRECCION
+    if not direccion:
+        return None
+    conexion = _conectar(direccion, tiempo_limite)
+    try:
+        conexion.request('GET', '/salud')
+        return json.loads(conexion.getresponse().read())
+    except (OSError, http.client.HTTPException, ValueError):
+        return None
+    finally:
+        conexion.close()
+
+def extraer_con_respaldo(datos, config='definitivo'):
+    """
+    OCR en el servicio si está configurado y se puede conectar; si no, en
+    este proceso con ejecutar_pipeline (mismo formato de resultado)
+
+    Los errores del servicio (ErrorServicio) se propagan: el pipeline ya
+    corrió allí y repetirlo aquí cargaría los modelos en este proceso.
+    """
+    if DIRECCION:
+        try:
+            return extraer_remoto(datos, config)
+        except ServicioNoDisponible as e:
+            log.warning("Servicio de OCR no disponible, se lee localmente: %s", e)
+    from utils.ocr_pipeline import ejecutar_pipeline
+    return ejecutar_pipeline(datos, config)
+
+if __name__ == '__main__':
+    import sys
+    direccion = sys.argv[1] if len(sys.argv) > 1 else (DIRECCION or DIRECCION_POR_DEFECTO)
+    try:
+        asyncio.run(servir(direccion))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,155 @@
+"""
+Almacenamiento compacto para tablas triangulares (diferencias divididas)
+"""
+import numpy as np
+
+class TablaTriangular:
+    """
+    Tabla n x n de la que solo se guardan las celdas con i + j < n
+
+    Los valores viven en un único array plano ordenado por columnas: la
+    columna j ocupa n - j posiciones a partir de j*n - j*(j-1)/2, así que
+    cada columna es una vista contigua. Ocupa n(n+1)/2 valores en lugar
+    de n^2.
+
+    La indexación con enteros (también negativos), slices y arrays de
+    enteros de una dimensión imita a la de una matriz densa (tabla[i, j],
+    tabla[0, :], tabla[:, j], tabla[::-1, j], tabla[i, a:b], tabla[[0, 2], j];
+    con arrays en los dos ejes se toman las celdas punto a punto, como en
+    NumPy). Las celdas fuera del triángulo se leen como 0 y escribir en
+    ellas lanza IndexError; cualquier otro índice (floats, máscaras
+    booleanas, arrays de más dimensiones) lanza TypeError.
+    """
+
+    def __init__(self, n, dtype=float):
+        self.n = int(n)
+        self.datos = np.zeros(self.n * (self.n + 1) // 2, dtype=dtype)
+
+    @property
+    def shape(self):
+        return (self.n, self.n)
+
+    @property
+    def dtype(self):
+        return self.datos.dtype
+
+    @property
+    def nbytes(self):
+        return self.datos.nbytes
+
+    def __len__(self):
+        return self.n
+
+    def _desplazamiento(self, j):
+        """Posición en el array plano donde empieza la columna j"""
+        return j * self.n - j * (j - 1) // 2
+
+    def columna(self, j):
+        """Vista (sin copia) de las n - j celdas válidas de la columna j"""
+        if not 0 <= j < self.n:
+            raise IndexError(f"Columna fuera de rango: {j}")
+        inicio = self._desplazamiento(j)
+        return self.datos[inicio:inicio + self.n - j]
+
+    def fila(self, i):
+        """Copia de las n - i celdas válidas de la fila i"""
+        if not 0 <= i < self.n:
+            raise IndexError(f"Fila fuera de rango: {i}")
+        j = np.arange(self.n - i)
+        return self.datos[self._desplazamiento(j) + i]
+
+    def diagonal(self, m):
+        """
+        Celdas con i + j = m, ordenadas por j
+
+        Son los valores que aparecen al agregar el nodo x_m: la
+        diagonal n-1 es la última fila de la tabla escrita a mano.
+        """
+        if not 0 <= m < self.n:
+            raise IndexError(f"Diagonal fuera de rango: {m}")
+        j = np.arange(m + 1)
+        return self.datos[self._desplazamiento(j) + (m - j)]
+
+    def _indices(self, indice):
+        """Normaliza un entero, slice o array de enteros a (array de posiciones, es_escalar, es_array)"""
+        if isinstance(indice, slice):
+            return np.arange(*indice.indices(self.n)), False, False
+        arr = np.asarray(indice)
+        if arr.dtype.kind not in 'iu' or arr.ndim > 1:
+            raise TypeError(f"Índice no admitido: {indice!r} (se esperaban enteros, slices "
+                            "o arrays de enteros de una dimensión)")
+        posiciones = np.where(arr < 0, arr + self.n, arr).reshape(-1)
+        fuera = (posiciones < 0) | (posiciones >= self.n)
+        if fuera.any():
+            raise IndexError(f"Índice fuera de rango: {arr.reshape(-1)[fuera][0]}")
+        return posiciones, arr.ndim == 0, arr.ndim == 1
+
+    def _clave(self, clave):
+        """
+        tabla[i] o tabla[i, j] -> (filas, fila_escalar, cols, col_escalar, por_puntos)
+
+        por_puntos indica arrays en los dos ejes: filas y cols quedan
+        emparejadas elemento a elemento en lugar de combinarse todas con todas
+        """
+        if not isinstance(clave, tuple):
+            clave = (clave, slice(None))
+        if len(clave) != 2:
+            raise IndexError("Se esperaban dos índices: tabla[i, j]")
+        filas, fila_escalar, fila_array = self._indices(clave[0])
+        cols, col_escalar, col_array = self._indices(clave[1])
+        por_puntos = fila_array and col_array
+        if por_puntos and len(filas) != len(cols) and 1 not in (len(filas), len(cols)):
+            raise IndexError(f"Los arrays de índices no tienen el mismo largo: {len(filas)} y {len(cols)}")
+        return filas, fila_escalar, cols, col_escalar, por_puntos
+
+    def _celdas(self, filas, cols, por_puntos):
+        """Índices (ii, jj) de todas las celdas pedidas"""
+        if por_puntos:
+            return np.broadcast_arrays(filas, cols)
+        return np.meshgrid(filas, cols, indexing='ij')
+
+    def __getitem__(self, clave):
+        filas, fila_escalar, cols, col_escalar, por_puntos = self._clave(clave)
+
+        # Caso frecuente: una columna completa o un tramo de ella (en
+        # cualquier orden) sin salirse del triángulo
+        if col_escalar and not fila_escalar and (len(filas) == 0 or filas.max() < self.n - cols.max()):
+            return self.columna(cols[0])[filas]
+
+        ii, jj = self._celdas(filas, cols, por_puntos)
+        validas = ii + jj < self.n
+        resultado = np.zeros(ii.shape, dtype=self.dtype)
+        resultado[validas] = self.datos[self._desplazamiento(jj[validas]) + ii[validas]]
+
+        if por_puntos:
+            return resultado
+        if fila_escalar and col_escalar:
+            return resultado[0, 0]
+        if fila_escalar:
+            return resultado[0]
+        if col_escalar:
+            return resultado[:, 0]
+        return resultado
+
+    def __setitem__(self, clave, valor):
+        filas, fila_escalar, cols, col_escalar, por_puntos = self._clave(clave)
+        ii, jj = self._celdas(filas, cols, por_puntos)
+        fuera = ii + jj >= self.n
+        if fuera.any():
+            i, j = ii[fuera][0], jj[fuera][0]
+            raise IndexError(f"La celda ({i}, {j}) está fuera del triángulo")
+
+        # El valor se ajusta a la forma que devolvería tabla[clave]
+        if por_puntos:
+            forma = ii.shape
+        else:
+            forma = tuple(len(eje) for eje, escalar in ((filas, fila_escalar), (cols, col_escalar)) if not escalar)
+        valores = np.broadcast_to(np.asarray(valor, dtype=self.dtype), forma).reshape(ii.shape)
+        self.datos[self._desplazamiento(jj) + ii] = valores
+
+    def __array__(self, dtype=None, copy=None):
+        densa = self[:, :]
+        return densa if dtype is None else densa.astype(dtype)
+
+    def __repr__(self):
+        return f"TablaTriangular(n={self.n}, dtype={self.dtype})"
@@ -5,6 +5,11 @@ Usa detección de contornos y análisis de estructura
 import cv2
 import numpy as np
 import re
+from utils.organizador import organizar
+from utils.pool_easyocr import lector_ocr
+from utils.registro import obtener_registro
+
+log = obtener_registro(__name__)
 
 def detectar_tabla_y_extraer_datos(imagen):
     """
@@ -27,13 +32,16 @@ def detectar_tabla_y_extraer_datos(imagen):
         # Aplicar múltiples técnicas de detección
         resultados = []
         
+        # Una sola pasada de Tesseract sobre toda la imagen para las técnicas 1 y 2
+        palabras = palabras_numericas(gray)
+        
         # Técnica 1: Detección de líneas horizontales y verticales
-        x_datos, y_datos = detectar_por_lineas(gray)
+        x_datos, y_datos = detectar_por_lineas(gray, palabras)
         if x_datos and y_datos:
             resultados.append((x_datos, y_datos, len(x_datos)))
         
         # Técnica 2: Detección por contornos de celdas
-        x_datos, y_datos = detectar_por_contornos(gray)
+        x_datos, y_datos = detectar_por_contornos(gray, palabras)
         if x_datos and y_datos:
             resultados.append((x_datos, y_datos, len(x_datos)))
         
@@ -55,40 +63,256 @@ def detectar_tabla_y_extraer_datos(imagen):
         return None, None, False
     
     except Exception as e:
-        print(f"Error en detección de tabla: {e}")
+        log.warning("Error en detección de tabla: %s", e)
         return None, None, False
 
-def detectar_por_lineas(gray):
+def estructura_lineas(gray, largo=40):
+    """
+    Máscara con las líneas horizontales y verticales de la imagen
+    (los bordes de las celdas de una tabla)
+    """
+    # Binarizar
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    
+    # Detectar líneas horizontales
+    horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (largo, 1))
+    horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
+    
+    # Detectar líneas verticales
+    vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, largo))
+    vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
+    
+    # Combinar líneas
+    return cv2.add(horizontal_lines, vertical_lines)
+
+def _miniatura(gray, lado=1000):
+    """Copia reducida (lado mayor ~lado) y el factor para volver a la original"""
+    h, w = gray.shape[:2]
+    factor = max(1.0, max(h, w) / lado)
+    if factor == 1.0:
+        return gray, factor
+    return cv2.resize(gray, (int(w / factor), int(h / factor)), interpolation=cv2.INTER_AREA), factor
+
+def angulo_inclinacion(gray, angulo_maximo=30):
+    """
+    Inclinación en grados de las líneas casi horizontales (bordes de la
+    tabla y renglones): mediana, ponderada por largo, de los segmentos de
+    Hough. Positivo si bajan hacia la derecha; None si no hay segmentos.
+    """
+    mini, _ = _miniatura(gray)
+    bordes = cv2.Canny(mini, 50, 150)
+    segmentos = cv2.HoughLinesP(bordes, 1, np.pi / 360, threshold=60,
+                                minLineLength=max(20, mini.shape[1] // 10), maxLineGap=8)
+    if segmentos is None:
+        return None
+    x1, y1, x2, y2 = segmentos.reshape(-1, 4).T.astype(float)
+    angulos = (np.degrees(np.arctan2(y2 - y1, x2 - x1)) + 90) % 180 - 90
+    cerca = np.abs(angulos) <= angulo_maximo
+    if not cerca.any():
+        return None
+    angulos, largos = angulos[cerca], np.hypot(x2 - x1, y2 - y1)[cerca]
+    orden = np.argsort(angulos)
+    acumulado = np.cumsum(largos[orden])
+    return float(angulos[orden][np.searchsorted(acumulado, acumulado[-1] / 2)])
+
+def _ordenar_esquinas(puntos):
+    """Esquinas en orden superior izquierda, superior derecha, inferior derecha, inferior izquierda"""
+    suma, resta = puntos.sum(axis=1), puntos[:, 1] - puntos[:, 0]
+    return np.array([puntos[np.argmin(suma)], puntos[np.argmin(resta)],
+                     puntos[np.argmax(suma)], puntos[np.argmax(resta)]], dtype=np.float32)
+
+def cuadrilatero_tabla(gray, area_minima=0.03):
+    """
+    Esquinas (array 4x2) del borde exterior de la tabla cuando es un
+    cuadrilátero convexo, o None
+
+    Se binariza con umbral adaptativo para que el fondo (mesa, sombra)
+    no se confunda con la tabla; se descartan los contornos que ocupan
+    toda la imagen.
+    """
+    mini, factor = _miniatura(gray)
+    alto, ancho = mini.shape
+    binaria = cv2.adaptiveThreshold(mini, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, 10)
+    binaria = cv2.dilate(binaria, np.ones((3, 3), np.uint8))
+    contornos, _ = cv2.findContours(binaria, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+    for contorno in sorted(contornos, key=cv2.contourArea, reverse=True)[:5]:
+        if cv2.contourArea(contorno) < area_minima * alto * ancho:
+            break
+        x, y, w, h = cv2.boundingRect(contorno)
+        if x <= 1 and y <= 1 and x + w >= ancho - 1 and y + h >= alto - 1:
+            continue
+        envolvente = cv2.convexHull(contorno)
+        aprox = cv2.approxPolyDP(envolvente, 0.02 * cv2.arcLength(envolvente, True), True)
+        if len(aprox) == 4 and cv2.isContourConvex(aprox):
+            return _ordenar_esquinas(aprox.reshape(4, 2).astype(np.float32) * factor)
+    return None
+
+def enderezar(gray, angulo_minimo=0.5, margen=0.05):
+    """
+    Normaliza la geometría de una foto de tabla antes del OCR
+
+    Si el borde de la tabla es un cuadrilátero que no es ya un rectángulo
+    alineado, corrige la perspectiva (la tabla queda rectangular con un
+    `margen` alrededor); si no, corrige la inclinación cuando supera
+    `angulo_minimo` grados. Si no hace falta nada, devuelve `gray`.
+    """
+    esquinas = cuadrilatero_tabla(gray)
+    if esquinas is not None:
+        ancho = max(np.linalg.norm(esquinas[1] - esquinas[0]), np.linalg.norm(esquinas[2] - esquinas[3]))
+        alto = max(np.linalg.norm(esquinas[3] - esquinas[0]), np.linalg.norm(esquinas[2] - esquinas[1]))
+        m = margen * max(ancho, alto)
+        destino = np.array([[m, m], [m + ancho, m], [m + ancho, m + alto], [m, m + alto]], np.float32)
+        # Ya es un rectángulo alineado (salvo una traslación): no se remuestrea
+        desvio = (esquinas - esquinas[0]) - (destino - destino[0])
+        if np.abs(desvio).max() > max(2.0, 0.005 * max(ancho, alto)):
+            matriz = cv2.getPerspectiveTransform(esquinas, destino)
+            tamano = (int(round(ancho + 2 * m)), int(round(alto + 2 * m)))
+            log.debug("Perspectiva corregida: esquinas %s", esquinas.round().tolist())
+            return cv2.warpPerspective(gray, matriz, tamano, flags=cv2.INTER_LINEAR,
+                                       borderMode=cv2.BORDER_REPLICATE)
+        return gray
+
+    angulo = angulo_inclinacion(gray)
+    if angulo is None or abs(angulo) < angulo_minimo:
+        return gray
+    h, w = gray.shape[:2]
+    matriz = cv2.getRotationMatrix2D((w / 2, h / 2), angulo, 1.0)
+    # Lienzo ampliado para no cortar las esquinas al rotar
+    coseno, seno = abs(matriz[0, 0]), abs(matriz[0, 1])
+    nuevo_w, nuevo_h = int(h * seno + w * coseno), int(h * coseno + w * seno)
+    matriz[0, 2] += nuevo_w / 2 - w / 2
+    matriz[1, 2] += nuevo_h / 2 - h / 2
+    log.debug("Inclinación corregida: %.1f°", angulo)
+    return cv2.warpAffine(gray, matriz, (nuevo_w, nuevo_h), flags=cv2.INTER_LINEAR,
+                          borderMode=cv2.BORDER_REPLICATE)
+
+def region_tabla(gray, margen=0.05, area_minima=0.02):
+    """
+    Rectángulo (x, y, w, h) que encierra las líneas de la tabla
+
+    Se amplía en `margen` (fracción del tamaño de la imagen) para no
+    cortar encabezados o números pegados al borde. Devuelve None si no
+    hay líneas o si lo encontrado es demasiado pequeño para ser la tabla.
+    """
+    alto, ancho = gray.shape[:2]
+    estructura = estructura_lineas(gray)
+    contours, _ = cv2.findContours(estructura, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    cajas = [cv2.boundingRect(c) for c in contours]
+    if not cajas:
+        return None
+    
+    # Solo las líneas comparables a la más larga (descarta trazos de letras grandes)
+    largo_maximo = max(max(c[2], c[3]) for c in cajas)
+    cajas = [c for c in cajas if max(c[2], c[3]) >= max(20, largo_maximo / 4)]
+    if not cajas:
+        return None
+    
+    x0 = min(c[0] for c in cajas)
+    y0 = min(c[1] for c in cajas)
+    x1 = max(c[0] + c[2] for c in cajas)
+    y1 = max(c[1] + c[3] for c in cajas)
+    if (x1 - x0) * (y1 - y0) < area_minima * alto * ancho:
+        return None
+    
+    mx, my = int(margen * ancho), int(margen * alto)
+    x0, y0 = max(0, x0 - mx), max(0, y0 - my)
+    x1, y1 = min(ancho, x1 + mx), min(alto, y1 + my)
+    return x0, y0, x1 - x0, y1 - y0
+
+def palabras_numericas(gray):
+    """
+    Lee toda la imagen con una sola llamada a pytesseract.image_to_data
+
+    Returns:
+        lista de (x, y, w, h, texto) de las palabras leídas; vacía si
+        Tesseract no está disponible
+    """
+    try:
+        import pytesseract
+        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        config = r'--oem 3 --psm 11 -c tessedit_char_whitelist=0123456789.,-'
+        datos = pytesseract.image_to_data(binary, config=config, output_type=pytesseract.Output.DICT)
+    except Exception:
+        return []
+    
+    return [(datos['left'][i], datos['top'][i], datos['width'][i], datos['height'][i], texto.strip())
+            for i, texto in enumerate(datos['text']) if texto.strip()]
+
+def asignar_a_celdas(cajas, palabras):
+    """
+    Asigna cada palabra a la caja con la que más se superpone y lee el
+    número de cada caja
+
+    Con --psm 11 Tesseract puede partir un número en varias palabras
+    ("1", ".", "25"): las palabras de una celda que se tocan en
+    horizontal se pegan sin separador. Si quedan varios trozos separados,
+    se lee el que más se superpone con la celda.
+
+    Args:
+        cajas: lista de (x, y, w, h) de las celdas
+        palabras: lista de (x, y, w, h, texto) de palabras_numericas
+
+    Returns:
+        lista de (x, y, valor) de las celdas que contienen un número
+    """
+    if not cajas or not palabras:
+        return []
+    
+    c = np.array(cajas, dtype=float)
+    p = np.array([palabra[:4] for palabra in palabras], dtype=float)
+    
+    # Área de intersección de cada palabra (filas) con cada caja (columnas)
+    x0 = np.maximum(p[:, None, 0], c[None, :, 0])
+    y0 = np.maximum(p[:, None, 1], c[None, :, 1])
+    x1 = np.minimum(p[:, None, 0] + p[:, None, 2], c[None, :, 0] + c[None, :, 2])
+    y1 = np.minimum(p[:, None, 1] + p[:, None, 3], c[None, :, 1] + c[None, :, 3])
+    interseccion = np.clip(x1 - x0, 0, None) * np.clip(y1 - y0, 0, None)
+    
+    mejor = interseccion.argmax(axis=1)
+    trozos = {}  # celda -> [[texto, borde derecho, superposición], ...]
+    for k in np.argsort(p[:, 0], kind='stable'):  # de izquierda a derecha dentro de cada celda
+        j = mejor[k]
+        if interseccion[k, j] <= 0:
+            continue
+        x, _, w, h = p[k]
+        celda = trozos.setdefault(j, [])
+        # Pegada a la anterior (hueco menor que media altura de letra): mismo número
+        if celda and x - celda[-1][1] <= h / 2:
+            celda[-1][0] += palabras[k][4]
+            celda[-1][1] = max(celda[-1][1], x + w)
+            celda[-1][2] += interseccion[k, j]
+        else:
+            celda.append([palabras[k][4], x + w, interseccion[k, j]])
+    
+    celdas_datos = []
+    for j, celda in sorted(trozos.items()):
+        texto = max(celda, key=lambda trozo: trozo[2])[0]
+        numeros = re.findall(r'-?\d+\.?\d*', texto)
+        if numeros:
+            celdas_datos.append((cajas[j][0], cajas[j][1], float(numeros[0])))
+    return celdas_datos
+
+def detectar_por_lineas(gray, palabras=None):
     """
     Detecta tabla usando líneas horizontales y verticales
     """
     try:
-        # Binarizar
-        _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
-        
-        # Detectar líneas horizontales
-        horizontal_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (40, 1))
-        horizontal_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, horizontal_kernel)
-        
-        # Detectar líneas verticales
-        vertical_kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (1, 40))
-        vertical_lines = cv2.morphologyEx(binary, cv2.MORPH_OPEN, vertical_kernel)
-        
-        # Combinar líneas
-        table_structure = cv2.add(horizontal_lines, vertical_lines)
+        table_structure = estructura_lineas(gray)
         
         # Encontrar contornos de celdas
-        contours, _ = cv2.findContours(table_structure, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+        contours, jerarquia = cv2.findContours(table_structure, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
         
-        # Extraer regiones de celdas y aplicar OCR
-        celdas_datos = []
-        for contour in contours:
+        # Celdas: contornos sin hijos (el borde exterior de la tabla las contiene a todas)
+        cajas = []
+        for i, contour in enumerate(contours):
             x, y, w, h = cv2.boundingRect(contour)
-            if w > 20 and h > 20:  # Filtrar celdas muy pequeñas
-                celda = gray[y:y+h, x:x+w]
-                texto = extraer_numero_de_celda(celda)
-                if texto:
-                    celdas_datos.append((x, y, texto))
+            if w > 20 and h > 20 and jerarquia[0][i][2] == -1:  # Filtrar celdas muy pequeñas
+                cajas.append((x, y, w, h))
+        
+        if palabras is None:
+            palabras = palabras_numericas(gray)
+        celdas_datos = asignar_a_celdas(cajas, palabras)
         
         # Organizar celdas en filas
         if len(celdas_datos) >= 4:
@@ -99,7 +323,7 @@ def detectar_por_lineas(gray):
     except:
         return None, None
 
-def detectar_por_contornos(gray):
+def detectar_por_contornos(gray, palabras=None):
     """
     Detecta números usando contornos de regiones
     """
@@ -112,17 +336,19 @@ def detectar_por_contornos(gray):
         contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
         
         # Filtrar contornos que parezcan números
-        regiones_numeros = []
+        cajas = []
         for contour in contours:
             x, y, w, h = cv2.boundingRect(contour)
             aspect_ratio = w / float(h) if h > 0 else 0
             
             # Filtrar por tamaño y proporción
             if 10 < w < 100 and 10 < h < 100 and 0.1 < aspect_ratio < 3:
-                region = gray[y:y+h, x:x+w]
-                numero = extraer_numero_de_celda(region)
-                if numero:
-                    regiones_numeros.append((x, y, numero))
+                cajas.append((x, y, w, h))
+        
+        # Cada palabra queda en una sola región aunque abarque varios dígitos
+        if palabras is None:
+            palabras = palabras_numericas(gray)
+        regiones_numeros = asignar_a_celdas(cajas, palabras)
         
         if len(regiones_numeros) >= 4:
             return organizar_celdas_en_xy(regiones_numeros)
@@ -160,9 +386,8 @@ def ocr_mejorado_tabla(img_array):
         
         # Intentar con EasyOCR
         try:
-            import easyocr
-            reader = easyocr.Reader(['es', 'en'], gpu=False)
-            results = reader.readtext(dilated)
+            with lector_ocr() as reader:
+                results = reader.readtext(dilated)
             
             # Extraer todos los números
             numeros_detectados = []
@@ -238,6 +463,9 @@ def analizar_regiones_numericas(gray):
 def extraer_numero_de_celda(celda):
     """
     Extrae un número de una celda individual
+
+    Lanza un proceso de Tesseract por llamada: para muchas celdas usar
+    palabras_numericas + asignar_a_celdas.
     """
     try:
         # Preprocesar celda
@@ -289,44 +517,8 @@ def extraer_numeros_de_region(region):
 def organizar_celdas_en_xy(celdas_datos):
     """
     Organiza celdas detectadas en listas X e Y
-    basándose en su posición
+    basándose en su posición (ver utils.organizador)
     """
-    try:
-        # Ordenar por posición Y (fila) y luego X (columna)
-        celdas_ordenadas = sorted(celdas_datos, key=lambda c: (c[1], c[0]))
-        
-        # Agrupar por filas (Y similar)
-        filas = []
-        fila_actual = []
-        y_anterior = celdas_ordenadas[0][1]
-        
-        for celda in celdas_ordenadas:
-            x, y, valor = celda
-            
-            # Si Y es muy diferente, es una nueva fila
-            if abs(y - y_anterior) > 20:
-                if fila_actual:
-                    filas.append(fila_actual)
-                fila_actual = [valor]
-                y_anterior = y
-            else:
-                fila_actual.append(valor)
-        
-        if fila_actual:
-            filas.append(fila_actual)
-        
-        # Si tenemos 2 filas con la misma cantidad de elementos, son X e Y
-        if len(filas) >= 2:
-            for i in range(len(filas) - 1):
-                if len(filas[i]) == len(filas[i+1]) and len(filas[i]) >= 2:
-                    return filas[i], filas[i+1]
-        
-        # Si tenemos una sola fila con números pares, dividir
-        if len(filas) == 1 and len(filas[0]) >= 4 and len(filas[0]) % 2 == 0:
-            mitad = len(filas[0]) // 2
-            return filas[0][:mitad], filas[0][mitad:]
-        
-        return None, None
-    
-    except:
-        return None, None
+    x_vals, y_vals = organizar([{'val': valor, 'x': x, 'y': y} for x, y, valor in celdas_datos],
+                               tolerancia=20)
+    return x_vals, y_vals
@@ -0,0 +1,148 @@
+"""
+Lectura de puntos (x, y) en el texto que devuelve el OCR
+
+El texto se recorre una sola vez con una expresión precompilada que lo
+parte en tokens con tipo y posición (número, etiqueta, separador y salto
+de línea). Las cinco heurísticas de extraer_puntos_interpolacion se
+evalúan después sobre esos tokens, sin volver a buscar números con
+re.findall por patrón y por línea.
+
+Comparación con la cascada de expresiones anterior:
+    python -m utils.banco_puntos
+"""
+import re
+from collections import namedtuple
+
+NUMERO, ETIQUETA, SEPARADOR, SALTO = 'numero', 'etiqueta', 'separador', 'salto'
+
+# | : ; = cuentan como espacio (bordes de tabla y "x = ..." en el OCR).
+# Un '-' seguido de dígito siempre abre número, igual que en -?\d+\.?\d*
+_TOKEN = re.compile(
+    r'(?P<numero>-?\d+\.?\d*)'
+    r'|(?P<salto>\n)'
+    r'|(?P<etiqueta>[^\W\d_]+)'
+    r'|(?P<separador>,|(?:[^\w\s,|:;=-]|_|-(?!\d))+)'
+)
+
+Token = namedtuple('Token', 'tipo texto inicio fin')
+
+def tokenizar(texto):
+    """
+    Parte el texto en tokens
+
+    Returns:
+        lista de Token(tipo, texto, inicio, fin); los espacios (y | : ; =)
+        no generan token
+    """
+    return [Token(m.lastgroup, m.group(), m.start(), m.end()) for m in _TOKEN.finditer(texto)]
+
+def _recorrer(texto):
+    """
+    Una pasada por los tokens
+
+    Returns:
+        (pares, lineas, todos): pares "a, b" (con o sin paréntesis, la coma
+        puede ir en otra línea); por cada línea con números, (numeros,
+        tiene_x, tiene_y_o_f); y todos los números en orden
+    """
+    pares, lineas, todos = [], [], []
+    numeros, con_x, con_y = [], False, False
+    candidato = None        # valor que puede abrir un par "a, b"
+    coma = False
+    # Decimales de un número que no pudo abrir par porque lo sigue un
+    # punto: la expresión regular reintentaba desde ellos, así que en
+    # "1.5., 3" el par es (5, 3) y en "1.5.25, 3" es (5.25, 3)
+    decimales, fin_decimales = None, -1
+
+    # Sobre los match directamente: armar un Token por pieza cuesta más
+    # que todo el resto del recorrido
+    for m in _TOKEN.finditer(texto):
+        tipo = m.lastgroup
+        if tipo == NUMERO:
+            pieza = m.group()
+            valor = float(pieza)
+            todos.append(valor)
+            numeros.append(valor)
+            if coma:
+                pares.append((candidato, valor))
+                candidato, coma, decimales = None, False, None
+                continue
+            candidato = valor
+            if decimales is not None and m.start() == fin_decimales and pieza.isdigit():
+                candidato = float(decimales + '.' + pieza)
+            decimales = None
+            if '.' in pieza:
+                fraccion = pieza.partition('.')[2]
+                if fraccion:
+                    decimales, fin_decimales = fraccion, m.end()
+        elif tipo == SALTO:
+            if numeros:
+                lineas.append((numeros, con_x, con_y))
+            numeros, con_x, con_y = [], False, False
+        elif tipo == SEPARADOR and candidato is not None and not coma and m.group() == ',':
+            coma = True
+        elif (tipo == SEPARADOR and decimales is not None and m.start() == fin_decimales
+              and m.group() == '.'):
+            candidato, fin_decimales = float(decimales), m.end()
+        else:
+            if tipo == ETIQUETA and not (con_x and con_y):
+                letras = m.group().lower()
+                con_x = con_x or 'x' in letras
+                con_y = con_y or 'y' in letras or 'f' in letras
+            candidato, coma, decimales = None, False, None
+
+    if numeros:
+        lineas.append((numeros, con_x, con_y))
+    return pares, lineas, todos
+
+def _primer_par_misma_longitud(filas):
+    """Primer (i, j), i < j, con len(filas[i]) == len(filas[j]), o None"""
+    primera, mejor = {}, None
+    for j, fila in enumerate(filas):
+        i = primera.setdefault(len(fila), j)
+        if i != j and (mejor is None or i < mejor[0]):
+            mejor = (i, j)
+    return mejor
+
+def puntos_de_texto(texto):
+    """
+    Extrae puntos (x, y) del texto, probando en orden:
+    1. pares "x, y" o "(x, y)"
+    2. una línea con 'x' y la siguiente con 'y' o 'f'
+    3. dos líneas con la misma cantidad de números
+    4. todos los números, mitad x y mitad y
+    5. una línea por punto (dos números por línea)
+
+    Returns:
+        (x_vals, y_vals) o (None, None)
+    """
+    if not texto or len(texto.strip()) < 3:
+        return None, None
+
+    pares, lineas, todos = _recorrer(texto)
+
+    if len(pares) >= 2:
+        return [p[0] for p in pares], [p[1] for p in pares]
+
+    x_vals, y_vals = [], []
+    for numeros, con_x, con_y in lineas:
+        if con_x and not y_vals:
+            x_vals = numeros
+        elif con_y and x_vals and not y_vals:
+            y_vals = numeros
+    if x_vals and y_vals and len(x_vals) == len(y_vals) and len(x_vals) >= 2:
+        return x_vals, y_vals
+
+    filas = [numeros for numeros, _, _ in lineas if len(numeros) >= 2]
+    par = _primer_par_misma_longitud(filas)
+    if par:
+        return filas[par[0]], filas[par[1]]
+
+    if len(todos) >= 4 and len(todos) % 2 == 0:
+        mitad = len(todos) // 2
+        return todos[:mitad], todos[mitad:]
+
+    if len(filas) >= 2 and all(len(fila) == 2 for fila in filas):
+        return [fila[0] for fila in filas], [fila[1] for fila in filas]
+
+    return None, None
@@ -0,0 +1,346 @@
+"""
+Subsistema de trabajos en segundo plano
+Ejecuta cálculos costosos en un pool de procesos para que la interfaz no se bloquee
+"""
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from utils import instrumentacion
+
+# Estados posibles de un trabajo
+PENDIENTE = 'pendiente'
+EJECUTANDO = 'ejecutando'
+COMPLETADO = 'completado'
+FALLIDO = 'fallido'
+CANCELADO = 'cancelado'
+
+# Número de procesos trabajadores (configurable por variable de entorno)
+MAX_TRABAJADORES = int(os.environ.get('MN_TRABAJADORES', max(1, (os.cpu_count() or 2) - 1)))
+
+# Segundos que se conserva un trabajo terminado que nadie recogió (por
+# ejemplo si la sesión que lo envió se cerró antes de que terminara)
+RETENCION_TRABAJOS = float(os.environ.get('MN_RETENCION_TRABAJOS', 600))
+
+_candado = threading.Lock()
+_pool = None
+_manager = None
+_progreso = None     # dict compartido: id -> (fraccion, mensaje)
+_cancelados = None   # dict compartido: id -> True
+_mediciones = None   # dict compartido: id -> mediciones de instrumentación del trabajo
+_trabajos = {}       # id -> {'future', 'descripcion', 'creado', 'terminado'}
+
+# Contexto del trabajo que se está ejecutando dentro del proceso trabajador
+_contexto_trabajador = {'id': None, 'progreso': None, 'cancelados': None, 'mediciones': None}
+
+class TrabajoCancelado(Exception):
+    """
+    Se lanza dentro del trabajador cuando el trabajo fue cancelado
+    """
+
+def _inicializar_trabajador(progreso, cancelados, mediciones):
+    """
+    Guarda los diccionarios compartidos en cada proceso trabajador
+    """
+    _contexto_trabajador['progreso'] = progreso
+    _contexto_trabajador['cancelados'] = cancelados
+    _contexto_trabajador['mediciones'] = mediciones
+
+def _ejecutar(id_trabajo, funcion, args, kwargs, descripcion, medir):
+    """
+    Envoltura que corre dentro del proceso trabajador
+
+    Con la instrumentación encendida (`medir`, de
+    instrumentacion.configuracion() en el proceso que envía) el trabajo
+    entero es la etapa 'trabajo.<descripcion>' y sus mediciones quedan
+    en el dict compartido para que las recoja _marcar_terminado.
+    """
+    _contexto_trabajador['id'] = id_trabajo
+    instrumentacion.activar(*medir)
+    try:
+        with instrumentacion.medir(f"trabajo.{descripcion}"):
+            reportar_progreso(0.0, "Iniciando")
+            resultado = funcion(*args, **kwargs)
+            reportar_progreso(1.0, "Terminado")
+        return resultado
+    finally:
+        _contexto_trabajador['id'] = None
+        mediciones = instrumentacion.extraer()
+        if mediciones:
+            _contexto_trabajador['mediciones'][id_trabajo] = mediciones
+
+def reportar_progreso(fraccion, mensaje=""):
+    """
+    Reporta el avance del trabajo actual (0.0 a 1.0)
+
+    Si la función no se está ejecutando como trabajo no hace nada, así
+    los cálculos pueden seguir llamándose directamente.
+    Lanza TrabajoCancelado si el trabajo fue cancelado.
+    """
+    id_trabajo = _contexto_trabajador['id']
+    if id_trabajo is None:
+        return
+
+    if _contexto_trabajador['cancelados'].get(id_trabajo):
+        raise TrabajoCancelado(id_trabajo)
+
+    _contexto_trabajador['progreso'][id_trabajo] = (min(max(float(fraccion), 0.0), 1.0), mensaje)
+
+def _obtener_pool():
+    """
+    Crea el pool de procesos la primera vez que se necesita
+    """
+    global _pool, _manager, _progreso, _cancelados, _mediciones
+
+    if _pool is None:
+        # 'spawn' evita copiar los hilos del servidor de Streamlit al hacer fork
+        contexto = multiprocessing.get_context('spawn')
+        if _manager is None:
+            _manager = contexto.Manager()
+            _progreso = _manager.dict()
+            _cancelados = _manager.dict()
+            _mediciones = _manager.dict()
+        _pool = ProcessPoolExecutor(
+            max_workers=MAX_TRABAJADORES,
+            mp_context=contexto,
+            initializer=_inicializar_trabajador,
+            initargs=(_progreso, _cancelados, _mediciones)
+        )
+    return _pool
+
+def enviar_trabajo(funcion, args=(), kwargs=None, descripcion=""):
+    """
+    Envía una función al pool de procesos
+
+    Args:
+        funcion: función de nivel de módulo (debe poder serializarse)
+        args: argumentos posicionales
+        kwargs: argumentos con nombre
+        descripcion: texto para mostrar en la interfaz
+
+    Returns:
+        str: identificador del trabajo
+    """
+    id_trabajo = uuid.uuid4().hex[:12]
+    kwargs = kwargs or {}
+    descripcion = descripcion or getattr(funcion, '__name__', 'trabajo')
+    tarea = (_ejecutar, id_trabajo, funcion, args, kwargs, descripcion, instrumentacion.configuracion())
+
+    _purgar_terminados()
+    with _candado:
+        pool = _obtener_pool()
+        _progreso[id_trabajo] = (0.0, "En cola")
+        try:
+            future = pool.submit(*tarea)
+        except BrokenProcessPool:
+            # Un trabajador murió: se recrea el pool y se reintenta una vez
+            _reiniciar_pool()
+            future = _obtener_pool().submit(*tarea)
+
+        _trabajos[id_trabajo] = {
+            'future': future,
+            'descripcion': descripcion,
+            'sesion_instrumentacion': instrumentacion.sesion_actual(),
+            'creado': time.time(),
+            'terminado': None
+        }
+
+    future.add_done_callback(lambda f, i=id_trabajo: _marcar_terminado(i))
+    return id_trabajo
+
+def _marcar_terminado(id_trabajo):
+    """
+    Registra la hora de finalización de un trabajo y trae las mediciones
+    de instrumentación que dejó el trabajador
+    """
+    trabajo = _trabajos.get(id_trabajo)
+    if trabajo is not None and trabajo['terminado'] is None:
+        trabajo['terminado'] = time.time()
+    if _mediciones is not None and trabajo is not None:
+        try:
+            instrumentacion.incorporar(_mediciones.pop(id_trabajo, []), trabajo['sesion_instrumentacion'])
+        except (EOFError, OSError):
+            pass    # el manager ya se cerró
+
+def _purgar_terminados():
+    """
+    Olvida los trabajos que terminaron hace más de RETENCION_TRABAJOS
+    """
+    limite = time.time() - RETENCION_TRABAJOS
+    for id_trabajo, trabajo in list(_trabajos.items()):
+        if trabajo['terminado'] is not None and trabajo['terminado'] < limite:
+            olvidar_trabajo(id_trabajo)
+
+def _reiniciar_pool():
+    """
+    Descarta el pool actual (por ejemplo tras un BrokenProcessPool)
+    """
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+    _pool = None
+
+def estado_trabajo(id_trabajo):
+    """
+    Devuelve el estado actual de un trabajo
+
+    Returns:
+        dict con 'id', 'estado', 'progreso', 'mensaje', 'descripcion',
+        'duracion' y 'error' (texto de la excepción si falló, si no None)
+    """
+    trabajo = _trabajos.get(id_trabajo)
+    if trabajo is None:
+        raise KeyError(f"Trabajo desconocido: {id_trabajo}")
+
+    future = trabajo['future']
+    error = None
+    if future.cancelled():
+        estado = CANCELADO
+    elif future.done():
+        error = future.exception()
+        if error is None:
+            estado = COMPLETADO
+        elif isinstance(error, TrabajoCancelado):
+            estado, error = CANCELADO, None
+        else:
+            estado = FALLIDO
+            error = str(error) or type(error).__name__
+    elif future.running():
+        estado = EJECUTANDO
+    else:
+        estado = PENDIENTE
+
+    try:
+        fraccion, mensaje = _progreso.get(id_trabajo, (0.0, ""))
+    except (OSError, EOFError):
+        # El manager ya no responde (por ejemplo al cerrar la aplicación)
+        fraccion, mensaje = (1.0 if future.done() else 0.0), ""
+
+    fin = trabajo['terminado'] or time.time()
+    return {
+        'id': id_trabajo,
+        'estado': estado,
+        'progreso': fraccion,
+        'mensaje': mensaje,
+        'descripcion': trabajo['descripcion'],
+        'duracion': fin - trabajo['creado'],
+        'error': error
+    }
+
+def cancelar_trabajo(id_trabajo):
+    """
+    Cancela un trabajo pendiente o pide la cancelación de uno en ejecución
+
+    Returns:
+        bool: True si el trabajo se canceló o se marcó para cancelar
+    """
+    trabajo = _trabajos.get(id_trabajo)
+    if trabajo is None or trabajo['future'].done():
+        return False
+
+    if trabajo['future'].cancel():
+        return True
+
+    # Ya está corriendo: se avisa al trabajador en su próximo reportar_progreso
+    _cancelados[id_trabajo] = True
+    return True
+
+def obtener_resultado(id_trabajo, timeout=None):
+    """
+    Devuelve el resultado de un trabajo (espera si aún no termina)
+
+    Lanza la misma excepción que lanzó la función en el trabajador.
+    """
+    trabajo = _trabajos.get(id_trabajo)
+    if trabajo is None:
+        raise KeyError(f"Trabajo desconocido: {id_trabajo}")
+    return trabajo['future'].result(timeout=timeout)
+
+def listar_trabajos():
+    """
+    Lista el estado de todos los trabajos conocidos
+    """
+    return [estado_trabajo(id_trabajo) for id_trabajo in list(_trabajos)]
+
+def olvidar_trabajo(id_trabajo):
+    """
+    Elimina el registro de un trabajo (si aún no terminó, lo cancela)
+    """
+    trabajo = _trabajos.get(id_trabajo)
+    if trabajo is not None and not trabajo['future'].done():
+        cancelar_trabajo(id_trabajo)
+    _trabajos.pop(id_trabajo, None)
+    if _progreso is not None:
+        try:
+            _progreso.pop(id_trabajo, None)
+            _cancelados.pop(id_trabajo, None)
+            _mediciones.pop(id_trabajo, None)
+        except (EOFError, OSError):
+            pass    # el manager ya se cerró
+
+def cerrar_pool():
+    """
+    Cierra el pool de procesos y el manager compartido
+    """
+    global _pool, _manager
+    with _candado:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _manager is not None:
+            _manager.shutdown()
+            _manager = None
+
+def seguir_trabajo(id_trabajo, mensaje="⏳ Procesando...", intervalo=0.5):
+    """
+    Muestra el progreso de un trabajo en Streamlit y vuelve a ejecutar
+    el script hasta que termine
+
+    Returns:
+        dict: estado final del trabajo (completado, fallido o cancelado)
+    """
+    import streamlit as st
+
+    estado = estado_trabajo(id_trabajo)
+    if estado['estado'] in (COMPLETADO, FALLIDO, CANCELADO):
+        _avisar_fallo(st, estado)
+        return estado
+
+    texto = f"{mensaje} {estado['mensaje']}".strip()
+    st.progress(estado['progreso'], text=f"{texto} ({estado['duracion']:.1f} s)")
+    if st.button("✖ Cancelar", key=f"cancelar_{id_trabajo}"):
+        cancelar_trabajo(id_trabajo)
+
+    time.sleep(intervalo)
+    st.rerun()
+
+def _avisar_fallo(st, estado):
+    """Muestra el error de un trabajo fallido"""
+    if estado['estado'] == FALLIDO:
+        st.error(f"⚠️ {estado['descripcion']} falló: {estado['error']}")
+
+def recoger_trabajo(trabajo, mensaje="⏳ Procesando...", intervalo=0.5):
+    """
+    Sigue un trabajo guardado en st.session_state (dict con 'id') como
+    seguir_trabajo y, cuando termina, deja su estado final en
+    trabajo['estado'] y su resultado en trabajo['resultado'] y lo olvida
+    en el pool; las ejecuciones siguientes del script leen el dict
+
+    Returns:
+        dict: estado final del trabajo (completado, fallido o cancelado)
+    """
+    if 'estado' in trabajo:
+        import streamlit as st
+        _avisar_fallo(st, trabajo['estado'])
+        return trabajo['estado']
+
+    estado = seguir_trabajo(trabajo['id'], mensaje, intervalo)
+    if estado['estado'] == COMPLETADO:
+        trabajo['resultado'] = obtener_resultado(trabajo['id'])
+    trabajo['estado'] = estado
+    olvidar_trabajo(trabajo['id'])
+    return estado